@@ -2,6 +2,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import problem_router, hint_router, auth_router, user_router, submission_router, admin_router, generator_router, ranking_router
 from app.utils.scheduler import start_scheduler
+from app.services.judge_queue import start_judge_workers
+from app.services.rejudge import start_rejudge_worker
 import os
 
 # ROOT_PATH = os.getenv("ROOT_PATH", "")
@@ -15,6 +17,8 @@ app = FastAPI(
 @app.on_event("startup")
 def startup_event():
     start_scheduler()
+    start_judge_workers()
+    start_rejudge_worker()
 
 origins = [
     "http://localhost:5173",
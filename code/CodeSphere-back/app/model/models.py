@@ -1,12 +1,19 @@
+import hashlib
+import json
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import Column, Integer, Sequence, String, Text, JSON, TIMESTAMP, ForeignKey, Boolean, BigInteger
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, Sequence, String, Text, JSON, TIMESTAMP, ForeignKey, Boolean, BigInteger, event
+from sqlalchemy.orm import deferred, relationship
 from app.database import Base
 from datetime import datetime, timedelta, timezone
 
 
 KST = timezone(timedelta(hours=9))
 
+def testset_hash(testcases: list) -> str:
+    # 채점 서버(judge_service/testset_cache.py)와 같은 방식으로 직렬화해야 한다
+    canonical = json.dumps(testcases, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
 class Hint(Base):
     __tablename__ = "hints"
 
@@ -43,11 +50,28 @@ class Problem(Base):
     body = Column(Text, nullable=False)
 
     example_io = Column(JSON)  # 예제 입출력: [{"input": "...", "output": "..."}]
-    test_io = Column(JSON)  # 테스트 입출력: [{"input": "...", "output": "..."}]
+    # 테스트 입출력: [{"input": "...", "output": "..."}]
+    # 채점 서버가 해시로 캐시하므로 평소에는 읽지 않는다 (접근할 때만 로드)
+    test_io = deferred(Column(JSON))
+    test_io_hash = Column(String(64))  # test_io 의 sha256 (testset_hash)
 
     level = Column(Integer)
     tag = Column(JSON)  # 예: ["dfs", "graph"]
     made = Column(Boolean, default=False)
+    time_limit_ms = Column(Integer)  # 테스트케이스당 CPU 시간 제한 (없으면 채점 서버 기본값)
+    # time_limit_ms 를 기준 풀이로 정했을 때의 근거 (services/calibration.py).
+    # 비어 있는데 time_limit_ms 가 있으면 직접 정한 값이라 보정이 덮어쓰지 않는다
+    time_limit_calibration = Column(JSON)
+    # 시간 제한 보정용 기준 풀이 (생성 문제는 생성기가 만든 정답 코드). 없으면 가장 먼저 통과한 제출을 쓴다
+    reference_code = deferred(Column(Text))
+    reference_language = Column(String)
+    output_limit_kb = Column(Integer)  # 테스트케이스당 출력 크기 제한 (없으면 채점 서버 기본값)
+    # 출력 비교 방식 (없으면 exact). 예: "token", {"mode": "float", "abs_tol": 1e-6, "rel_tol": 1e-6},
+    # {"mode": "custom", "code": "..."} (judge_service/checker.py 참고)
+    checker = Column(JSON)
+    # true 면 제출 채점을 fail-fast 로: 자주 틀리는 케이스부터 실행하고 첫 실패에서 멈춘다.
+    # 빠르지만 판정이 "처음 발견한 실패" 라서 실패 통계에 따라 달라질 수 있고 passed 는 실행한 케이스만 센다
+    fail_fast = Column(Boolean, nullable=False, default=False)
 
     input = Column(Text)
     output = Column(Text)
@@ -61,9 +85,18 @@ class Problem(Base):
 
     embedding_problem_vector = relationship("ProblemEmbedding", back_populates="problemE")
     user_problem_scoreP = relationship("UserProblemScore", back_populates="problemS")
+
     creator = relationship("User", back_populates="created_problems")
 
 
+@event.listens_for(Problem.test_io, "set")
+def _rehash_test_io(problem, value, oldvalue, initiator):
+    # ORM 으로 test_io 를 새로 쓰면 해시도 같이 바꾼다. 옛 해시로 보내면 채점 서버가 예전 테스트셋으로 채점하거나
+    # (캐시에 있을 때) 새 내용과 해시가 맞지 않아 실패한다.
+    # SQL 로 직접 고칠 때는 test_io_hash 를 NULL 로 비우면 ensure_testset_hash 가 다시 계산한다
+    problem.test_io_hash = testset_hash(value) if value else None
+
+
 class ProblemSolution(Base):
     __tablename__ = "problem_solutions"
 
@@ -83,6 +116,69 @@ class ProblemSolution(Base):
 
     problem = relationship("Problem", back_populates="solutions", foreign_keys=[real_pid])
     user = relationship("User", back_populates="submissions")
+    judge_job = relationship("JudgeJob", back_populates="solution", uselist=False, cascade="all, delete-orphan")
+
+
+class SubmissionCaseResult(Base):
+    """제출의 테스트케이스별 채점 결과. 채점이 끝날 때 제출마다 한 번에 bulk insert 한다"""
+    __tablename__ = "submission_case_results"
+
+    solution_id = Column(BigInteger, ForeignKey("problem_solutions.solution_id", ondelete="CASCADE"), primary_key=True)
+    case_index = Column(Integer, primary_key=True)  # test_io 기준 순서 (fail-fast 로 실행하지 않은 케이스는 없음)
+    result = Column(String(8), nullable=False)
+    runtime_ms = Column(Integer)  # CPU 시간
+    memory_kb = Column(Integer)
+    output_hash = Column(String(64))  # 사용자 출력 전체의 sha256
+    output_preview = Column(Text)  # 사용자 출력(없으면 stderr) 앞부분
+    first_diff = Column(JSON)  # 오답일 때 사용자 출력에서 처음 달라지는 위치 {"line", "column"}
+
+
+class JudgeJob(Base):
+    """채점 대기열. 제출 시 PENDING 으로 쌓이고 디스패치 워커가 RUNNING -> DONE/ERROR 로 처리한다."""
+    __tablename__ = "judge_jobs"
+
+    job_id = Column(BigInteger, primary_key=True, index=True)
+    solution_id = Column(BigInteger, ForeignKey("problem_solutions.solution_id", ondelete="CASCADE"), nullable=False, unique=True)
+    status = Column(String, nullable=False, default="PENDING", index=True)  # PENDING / RUNNING / DONE / ERROR
+    attempts = Column(Integer, nullable=False, default=0)
+    passed = Column(Integer)
+    total = Column(Integer)
+    error = Column(Text)
+
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=lambda: datetime.now(KST))
+    started_at = Column(TIMESTAMP(timezone=True))
+    finished_at = Column(TIMESTAMP(timezone=True))
+
+    solution = relationship("ProblemSolution", back_populates="judge_job")
+
+
+class RejudgeRun(Base):
+    """
+    재채점 작업. 조건에 맞는 제출을 solution_id 순서로 다시 채점한다.
+    cursor 까지는 이미 반영된 상태라서 서버가 죽어도 이어서 진행할 수 있다.
+    """
+    __tablename__ = "rejudge_runs"
+
+    run_id = Column(BigInteger, primary_key=True, index=True)
+    # 대상 조건 (None 이면 조건 없음)
+    real_pid = Column(Integer, ForeignKey("problems.real_pid", ondelete="CASCADE"), index=True)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"))
+    result_filter = Column(JSON)  # 예: ["PASS"] -> 기존 결과가 PASS 인 제출만
+    # 빠른 재채점: fail-fast 로 첫 실패에서 멈춘다 (판정이 전체 실행과 다를 수 있음, Problem.fail_fast 참고)
+    fail_fast = Column(Boolean, nullable=False, default=False)
+
+    status = Column(String, nullable=False, default="PENDING", index=True)  # PENDING / RUNNING / DONE / ERROR / CANCELLED
+    cursor = Column(BigInteger, nullable=False, default=0)  # 마지막으로 반영한 solution_id
+    total = Column(Integer)
+    processed = Column(Integer, nullable=False, default=0)
+    changed = Column(Integer, nullable=False, default=0)  # 결과가 바뀐 제출 수
+    failed = Column(Integer, nullable=False, default=0)  # 채점 서버 오류로 건너뛴 제출 수
+    error = Column(Text)
+
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=lambda: datetime.now(KST))
+    started_at = Column(TIMESTAMP(timezone=True))
+    updated_at = Column(TIMESTAMP(timezone=True))
+    finished_at = Column(TIMESTAMP(timezone=True))
 
 
 class User(Base):
@@ -37,8 +37,10 @@ def get_problem_list(db: Session, limit: int = 10, page: int = 1, user_id: Optio
         real_pid = problem.real_pid
 
         # 전체 제출 수
+        # 채점이 끝난 제출만 (대기 중/채점 서버 오류는 result 가 비어 있다)
         submit_count = db.query(func.count()).select_from(ProblemSolution).filter(
-            ProblemSolution.real_pid == real_pid
+            ProblemSolution.real_pid == real_pid,
+            ProblemSolution.result.isnot(None)
         ).scalar()
 
         # 정답 수
@@ -54,7 +56,8 @@ def get_problem_list(db: Session, limit: int = 10, page: int = 1, user_id: Optio
         if user_id:
             user_submits = db.query(ProblemSolution).filter(
                 ProblemSolution.real_pid == real_pid,
-                ProblemSolution.submit_user == user_id
+                ProblemSolution.submit_user == user_id,
+                ProblemSolution.result.isnot(None)
             ).all()
 
             if not user_submits:
@@ -91,7 +94,7 @@ def build_problem_list_items(db: Session, problems: List[Problem]) -> List[Probl
         submit_count = (
             db.query(func.count())
             .select_from(ProblemSolution)
-            .filter(ProblemSolution.real_pid == real_pid)
+            .filter(ProblemSolution.real_pid == real_pid, ProblemSolution.result.isnot(None))
             .scalar()
         )
 
@@ -179,8 +182,10 @@ def build_problem_list_items_with_user(
     for problem in problems:
         real_pid = problem.real_pid
 
+        # 채점이 끝난 제출만 (대기 중/채점 서버 오류는 result 가 비어 있다)
         submit_count = db.query(func.count()).select_from(ProblemSolution).filter(
-            ProblemSolution.real_pid == real_pid
+            ProblemSolution.real_pid == real_pid,
+            ProblemSolution.result.isnot(None)
         ).scalar()
 
         correct_count = db.query(func.count()).select_from(ProblemSolution).filter(
@@ -193,7 +198,8 @@ def build_problem_list_items_with_user(
         # 유저 제출 결과
         user_solutions = db.query(ProblemSolution).filter(
             ProblemSolution.real_pid == real_pid,
-            ProblemSolution.submit_user == user_id
+            ProblemSolution.submit_user == user_id,
+            ProblemSolution.result.isnot(None)
         ).all()
 
         if not user_solutions:
@@ -231,7 +237,7 @@ def get_random_problems(db: Session, limit: int = 10) -> List[ProblemListItem]:
         submit_count = (
             db.query(func.count())
             .select_from(ProblemSolution)
-            .filter(ProblemSolution.real_pid == real_pid)
+            .filter(ProblemSolution.real_pid == real_pid, ProblemSolution.result.isnot(None))
             .scalar()
         )
 
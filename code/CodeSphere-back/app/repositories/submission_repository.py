@@ -1,12 +1,15 @@
 from datetime import datetime
+import os
 import requests
 from sqlalchemy.orm import Session
-from app.model.models import Problem, ProblemEmbedding, ProblemSolution, UserEmbedding
+from app.model.models import Problem, ProblemEmbedding, ProblemSolution, SubmissionCaseResult, UserEmbedding
 from pgvector.sqlalchemy import Vector
 import numpy as np
 
 EMBED_SVC = "http://127.0.0.1:7042/embedding/update"
 EMB_DIM = 384  # 문제 임베딩과 동일 차원
+# 테스트케이스별 결과에 남기는 출력 앞부분 길이 (전체 비교는 output_hash 로)
+CASE_OUTPUT_PREVIEW_CHARS = int(os.getenv("CASE_OUTPUT_PREVIEW_CHARS", 256))
 
 def _to_float_list(v):
     try:
@@ -61,4 +64,26 @@ def score(level: int, hint_used: int) -> int:
     hint_penalty = [0, int(10 * penalty_scale), int(20 * penalty_scale), int(30 * penalty_scale)]
     bonus = 10 if hint_used == 0 else 0
     raw_score = base - hint_penalty[hint_used] + bonus
-    return round(max(raw_score, min_score) / 10)
\ No newline at end of file
+    return round(max(raw_score, min_score) / 10)
+
+def save_case_results(db: Session, solution_id: int, results: list):
+    """채점 서버의 테스트케이스별 결과를 저장한다 (이전 결과는 지우고 bulk insert 한 번). 커밋은 호출한 쪽에서."""
+    db.query(SubmissionCaseResult).filter(
+        SubmissionCaseResult.solution_id == solution_id
+    ).delete(synchronize_session=False)
+    if not results:
+        return
+    db.bulk_insert_mappings(SubmissionCaseResult, [
+        {
+            "solution_id": solution_id,
+            "case_index": r["index"],
+            "result": r["result"],
+            "runtime_ms": r.get("runtime_ms"),
+            "memory_kb": r.get("memory_kb"),
+            "output_hash": r.get("output_hash"),
+            # 채점 서버는 echo 없이 부르면 output_preview 만, echo 면 user_output 을 돌려준다
+            "output_preview": (r.get("output_preview", r.get("user_output")) or "")[:CASE_OUTPUT_PREVIEW_CHARS],
+            "first_diff": r.get("first_diff"),
+        }
+        for r in results
+    ])
@@ -1,6 +1,14 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
 import requests
 
+from app.database import get_db
+from app.model.models import Problem, RejudgeRun
+from app.schemas.rejudge import RejudgeRequest, RejudgeRunOut
+from app.services.calibration import CalibrationError, calibrate_problem, start_calibration, uncalibrated_problem_ids
+from app.services.judge_client import judge_nodes_status
+from app.services.rejudge import cancel_run, create_run
+
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 @router.post("/all")
@@ -13,4 +21,51 @@ def reindex_all_problems():
 def reindex_one_problem(real_pid: int):
     r = requests.post("http://127.0.0.1:7042/problems/reindex_one", json={"real_pid": real_pid}, timeout=10)
     r.raise_for_status()
-    return r.json()
\ No newline at end of file
+    return r.json()
+
+@router.get("/judge-nodes")
+def get_judge_nodes():
+    """채점 서버 노드별 상태와 부하"""
+    return judge_nodes_status()
+
+@router.post("/rejudge", response_model=RejudgeRunOut)
+def start_rejudge(request: RejudgeRequest, db: Session = Depends(get_db)):
+    """조건에 맞는 제출을 백그라운드에서 다시 채점 (점수/랭킹도 맞춰서 갱신)"""
+    if request.real_pid is None and request.user_id is None:
+        raise HTTPException(status_code=400, detail="real_pid 또는 user_id 중 하나는 지정해야 합니다.")
+    return create_run(db, request.real_pid, request.user_id, request.result_filter, request.fail_fast)
+
+@router.get("/rejudge/{run_id}", response_model=RejudgeRunOut)
+def get_rejudge(run_id: int, db: Session = Depends(get_db)):
+    run = db.query(RejudgeRun).filter(RejudgeRun.run_id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="재채점 작업이 없습니다.")
+    return run
+
+@router.post("/rejudge/{run_id}/cancel", response_model=RejudgeRunOut)
+def cancel_rejudge(run_id: int, db: Session = Depends(get_db)):
+    run = db.query(RejudgeRun).filter(RejudgeRun.run_id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="재채점 작업이 없습니다.")
+    cancel_run(db, run)
+    return run
+
+@router.post("/problems/{real_pid}/calibrate")
+def calibrate_time_limit(real_pid: int, force: bool = False, db: Session = Depends(get_db)):
+    """기준 풀이를 여러 번 실행해서 문제 시간 제한을 다시 정한다 (force=true 면 직접 정한 제한도 덮어씀)"""
+    problem = db.query(Problem).filter(Problem.real_pid == real_pid).first()
+    if not problem:
+        raise HTTPException(status_code=404, detail="문제가 없습니다.")
+    try:
+        return calibrate_problem(db, problem, force)
+    except CalibrationError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+@router.post("/calibrate")
+def calibrate_missing_time_limits(db: Session = Depends(get_db)):
+    """시간 제한이 없는 문제를 백그라운드에서 차례로 보정"""
+    real_pids = uncalibrated_problem_ids(db)
+    start_calibration(real_pids)
+    return {"queued": len(real_pids)}
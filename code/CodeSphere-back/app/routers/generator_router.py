@@ -17,6 +17,7 @@ from app.repositories.generator_repository import (
     _sanitize_vec,
     _to_finite_float,
 )
+from app.services.calibration import start_calibration
 
 GEN_SVC_URL = "http://127.0.0.1:7043/generate_problem"
 
@@ -75,7 +76,7 @@ def generate_problem(req: GenerateProblemRequest, db: Session = Depends(get_db),
         output=problem_output_desc,
         problem_constraint=problem_constraints,
         example_io=example_io,
-        test_io=test_io,
+        test_io=test_io,  # test_io_hash 는 judge_client 가 같이 채운다
         tag=tag,
         level=level,
         made=True,
@@ -191,11 +192,14 @@ def generate_problem(req: GenerateProblemRequest, db: Session = Depends(get_db),
         output=problem_output_desc,
         problem_constraint=problem_constraints,
         example_io=example_io,
-        test_io=test_io,
+        test_io=test_io,  # test_io_hash 는 judge_client 가 같이 채운다
         tag=tag,
         level=level,
         made=True,
-        user_id=user.user_id # 문제 생성자 ID 기록
+        user_id=user.user_id, # 문제 생성자 ID 기록
+        # 시간 제한 보정용 기준 풀이
+        reference_code=solution_code,
+        reference_language="python" if solution_code else None,
     )
     db.add(problem)
     db.commit()
@@ -224,6 +228,9 @@ def generate_problem(req: GenerateProblemRequest, db: Session = Depends(get_db),
         db.commit()
     # ----------------------------------------------------
 
+    # 9) 정답 코드로 시간 제한 보정 (백그라운드)
+    if solution_code:
+        start_calibration([problem.real_pid])
 
     # 10) 최종 응답 반환
     return GenerateProblemResponseNew(
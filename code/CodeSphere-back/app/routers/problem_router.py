@@ -56,7 +56,8 @@ def get_problem_list_new(
     """
 
     # 집계 정의
-    total_submissions = func.count(ProblemSolution.solution_id)
+    # 채점이 끝난 제출만 센다 (대기 중/채점 서버 오류는 result 가 NULL 이라 count 에서 빠진다)
+    total_submissions = func.count(ProblemSolution.result)
     pass_submissions = func.sum(case((ProblemSolution.result == 'PASS', 1), else_=0))
     submitters_expr = func.count(func.distinct(ProblemSolution.submit_user))
 
@@ -140,7 +141,8 @@ def get_problem_list_new(
             db.query(ProblemSolution.real_pid, ProblemSolution.result)
             .filter(
                 ProblemSolution.submit_user == str(user_id),
-                ProblemSolution.real_pid.in_(problem_ids)
+                ProblemSolution.real_pid.in_(problem_ids),
+                ProblemSolution.result.isnot(None)
             )
             .all()
         )
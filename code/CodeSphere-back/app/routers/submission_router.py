@@ -1,24 +1,51 @@
+import asyncio
+import json
+import time
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
-import requests
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.model.models import Hint, Problem, ProblemSolution, TemporarySolution, UserProblemScore
-from app.schemas.submit import SubmitRequest, SubmitResponse, TestCaseResult, TestSubmitResponse
+from app.database import SessionLocal
+from app.model.models import Hint, Problem, ProblemSolution, SubmissionCaseResult, TemporarySolution
+from app.schemas.submit import (
+    SubmissionCaseResultOut, SubmissionDetailResponse, SubmissionStatusResponse, SubmitQueuedResponse, SubmitRequest,
+    TestCaseResult, TestSubmitResponse
+)
 from app.dependencies.auth import get_current_user
 from app.database import get_db
-from app.services.judge_client import request_judge_server
+from app.services.judge_client import (
+    determine_final_result, ensure_testset_hash, request_judge_server, stream_judge_server
+)
+from app.services.judge_queue import enqueue_submission, get_progress
+from app.services import speculative
 from app.schemas.temp_solution import TempLoadResponse, TempSaveResponse, TempSaveRequest
-from app.repositories.submission_repository import score, update_user_embedding
 
 router = APIRouter(prefix="/submissions", tags=["submissions"])
 
-def determine_final_result(results: list) -> str:
-    # 우선순위 높은 순서로 검사
-    priority = ["CE", "RTE", "TLE", "MLE", "FAIL", "PASS"]
-    for p in priority:
-        if any(r["result"] == p for r in results):
-            return p
-    return "FAIL"
+# 스트리밍 중계 시 진행 상황 확인 간격
+STREAM_POLL_INTERVAL_SEC = 0.1
+# 다른 프로세스가 채점 중인 제출은 DB 상태를 이 간격으로 확인
+STREAM_DB_POLL_INTERVAL_SEC = 0.5
+# 이 프로세스의 진행 상황을 중계하는 중에도 이 간격으로 DB 상태를 확인 (진행 상황이 끝나지 않고 멈춘 경우)
+STREAM_DB_RECHECK_SEC = 2.0
+
+def _ndjson(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+def _to_test_case_result(r: dict) -> TestCaseResult:
+    return TestCaseResult(
+        input=r["input"],
+        expectedOutput=r["expected"],
+        actualOutput=r["user_output"],
+        passed=(r["result"] == "PASS"),
+        runtime_ms=r.get("runtime_ms"),
+        memory_kb=r.get("memory_kb"),
+        wall_ms=r.get("wall_ms"),
+        cached=r.get("cached", False),
+        first_diff=r.get("first_diff"),
+        profile=r.get("profile")
+    )
 
 @router.post("/save", response_model=TempSaveResponse)
 def save_temp_solution(
@@ -45,6 +72,11 @@ def save_temp_solution(
         db.add(new_temp)
 
     db.commit()
+
+    if request.speculative:
+        problem = db.query(Problem).filter(Problem.real_pid == request.real_pid).first()
+        if problem:
+            speculative.schedule(user.user_id, problem, request.code, request.language)
     return {"message": "임시 저장 완료"}
 
 @router.get("/load/{real_pid}", response_model=TempLoadResponse)
@@ -74,83 +106,204 @@ def load_temp_solution(
         "hint_count": hint_count
     }
 
-@router.post("/submit", response_model=SubmitResponse)
+@router.post("/submit", response_model=SubmitQueuedResponse)
 def submit_code(
     request: SubmitRequest,
     db: Session = Depends(get_db),
     user = Depends(get_current_user)
 ):
     problem = db.query(Problem).filter(Problem.real_pid == request.real_pid).first()
-    if not problem or not problem.test_io:
+    if not problem or not ensure_testset_hash(db, problem):
         raise HTTPException(status_code=404, detail="문제가 존재하지 않거나 테스트케이스가 없습니다.")
 
-    judge_result = request_judge_server(request.code, problem.test_io)
-    final_result = determine_final_result(judge_result["results"])
-
-    # DB 저장 (아직 커밋하지 않음)
+    # 채점은 디스패치 워커가 처리하고, 여기서는 대기열 등록 후 바로 반환
     new_solution = ProblemSolution(
         real_pid=request.real_pid,
         language=request.language,
         code=request.code,
-        result=final_result,
-        submit_user=user.user_id,
-        runtime_ms=judge_result.get("runtime_ms"),
-        memory_kb=judge_result.get("memory_kb")
+        submit_user=user.user_id
     )
-    db.add(new_solution)
+    job = enqueue_submission(db, new_solution)
 
-    if final_result == "PASS":
-        # 임시 풀이 삭제
-        db.query(TemporarySolution).filter_by(
-            real_pid=request.real_pid,
-            user_id=user.user_id
-        ).delete(synchronize_session=False)
-
-        # 유저 임베딩 갱신
-        update_user_embedding(user.user_id, db)
-
-        # 1. 이미 해결한 문제인지 확인
-        existing_score = db.query(UserProblemScore).filter(
-            UserProblemScore.user_id == user.user_id,
-            UserProblemScore.real_pid == request.real_pid
-        ).first()
-
-        # 2. 처음 해결한 문제일 경우에만 점수 부여
-        if not existing_score:
-            # 2-1. [변경] DB에서 사용한 힌트 개수 조회
-            hint_count = db.query(Hint).filter(
-                Hint.user_id == user.user_id,
-                Hint.real_pid == request.real_pid
-            ).count()
-
-            # 2-2. [변경] 조회된 힌트 개수로 점수 계산
-            calculated_score = score(problem.level, hint_count)
-
-            # 2-3. user_problem_scores 테이블에 기록
-            new_score_record = UserProblemScore(
-                user_id=user.user_id,
-                real_pid=request.real_pid,
-                score=calculated_score
+    return SubmitQueuedResponse(
+        submission_id=new_solution.solution_id,
+        status=job.status
+    )
+
+
+@router.get("/status/{submission_id}", response_model=SubmissionStatusResponse)
+def get_submission_status(
+    submission_id: int,
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    solution = db.query(ProblemSolution).filter(
+        ProblemSolution.solution_id == submission_id,
+        ProblemSolution.submit_user == user.user_id
+    ).first()
+    if not solution:
+        raise HTTPException(status_code=404, detail="제출 기록이 없습니다.")
+
+    return _build_status(solution)
+
+
+@router.get("/detail/{submission_id}", response_model=SubmissionDetailResponse)
+def get_submission_detail(
+    submission_id: int,
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    """제출 코드와 저장된 테스트케이스별 결과 (다시 채점하지 않고 조회)"""
+    solution = db.query(ProblemSolution).filter(
+        ProblemSolution.solution_id == submission_id,
+        ProblemSolution.submit_user == user.user_id
+    ).first()
+    if not solution:
+        raise HTTPException(status_code=404, detail="제출 기록이 없습니다.")
+
+    # 테스트케이스별 결과는 상세 조회할 때만 읽는다
+    cases = (
+        db.query(SubmissionCaseResult)
+        .filter(SubmissionCaseResult.solution_id == submission_id)
+        .order_by(SubmissionCaseResult.case_index)
+        .all()
+    )
+    return SubmissionDetailResponse(
+        **_build_status(solution).model_dump(),
+        real_pid=solution.real_pid,
+        language=solution.language,
+        code=solution.code,
+        cases=[
+            SubmissionCaseResultOut(
+                index=case.case_index,
+                result=case.result,
+                runtime_ms=case.runtime_ms,
+                memory_kb=case.memory_kb,
+                output_hash=case.output_hash,
+                output_preview=case.output_preview,
+                first_diff=case.first_diff
             )
-            db.add(new_score_record)
+            for case in cases
+        ]
+    )
 
-            # 2-4. users 테이블의 총점 업데이트
-            user.score = (user.score or 0) + calculated_score
 
-    db.commit()
+def _build_status(solution: ProblemSolution) -> SubmissionStatusResponse:
+    job = solution.judge_job
+    # 대기열 도입 전 제출은 작업 없이 바로 완료된 것으로 본다
+    status = job.status if job else "DONE"
 
-    return SubmitResponse(
-        result=final_result,
-        passed=judge_result.get("passed", sum(r["result"] == "PASS" for r in judge_result["results"])),
-        total=len(problem.test_io),
-        runtime_ms=judge_result.get("runtime_ms"),
-        memory_kb=judge_result.get("memory_kb")
+    return SubmissionStatusResponse(
+        submission_id=solution.solution_id,
+        status=status,
+        result=solution.result if status == "DONE" else None,
+        passed=job.passed if job else None,
+        total=job.total if job else None,
+        runtime_ms=solution.runtime_ms,
+        memory_kb=solution.memory_kb
     )
 
 
+def _load_status(submission_id: int) -> SubmissionStatusResponse:
+    db = SessionLocal()
+    try:
+        solution = db.query(ProblemSolution).filter(ProblemSolution.solution_id == submission_id).first()
+        return _build_status(solution)
+    finally:
+        db.close()
+
+
+async def _relay_submission_progress(submission_id: int):
+    """채점 워커가 올리는 테스트케이스별 결과를 NDJSON 으로 중계하고, 마지막에 요약 한 줄"""
+    sent = 0
+    attempt = None
+    db_checked = time.monotonic()
+    while True:
+        progress = get_progress(submission_id, sent, attempt)
+        if progress is None:
+            # 이 프로세스가 채점하지 않는 제출 (또는 이미 정리됨): DB 상태만 확인해서 요약 전송
+            status = await run_in_threadpool(_load_status, submission_id)
+            if status.status in ("DONE", "ERROR"):
+                yield _ndjson({"type": "summary", **status.model_dump()})
+                return
+            await asyncio.sleep(STREAM_DB_POLL_INTERVAL_SEC)
+            continue
+
+        records, done, current = progress
+        if attempt is not None and current != attempt:
+            # 채점 서버 오류로 다시 채점: 앞서 보낸 케이스 결과는 버리라고 알리고 새 시도를 처음부터 보낸다
+            yield _ndjson({"type": "retry", "attempt": current})
+            sent = 0
+        attempt = current
+        for record in records:
+            yield _ndjson(record)
+        sent += len(records)
+        if done:
+            return
+
+        if time.monotonic() - db_checked >= STREAM_DB_RECHECK_SEC:
+            db_checked = time.monotonic()
+            status = await run_in_threadpool(_load_status, submission_id)
+            if status.status in ("DONE", "ERROR"):
+                # 커밋 직후에 올라온 레코드가 있으면 마저 보내고, 요약이 없으면 DB 상태로 끝낸다
+                progress = get_progress(submission_id, sent, attempt)
+                records, done = (progress[0], progress[1]) if progress and progress[2] == attempt else ([], False)
+                for record in records:
+                    yield _ndjson(record)
+                if not done:
+                    yield _ndjson({"type": "summary", **status.model_dump()})
+                return
+        await asyncio.sleep(STREAM_POLL_INTERVAL_SEC)
+
+
+@router.get("/stream/{submission_id}")
+def stream_submission(
+    submission_id: int,
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    """제출 채점 진행 상황을 테스트케이스 단위로 스트리밍 (application/x-ndjson)"""
+    solution = db.query(ProblemSolution).filter(
+        ProblemSolution.solution_id == submission_id,
+        ProblemSolution.submit_user == user.user_id
+    ).first()
+    if not solution:
+        raise HTTPException(status_code=404, detail="제출 기록이 없습니다.")
+
+    return StreamingResponse(_relay_submission_progress(submission_id), media_type="application/x-ndjson")
+
+
+def _relay_test_results(records):
+    """채점 서버 스트림 (또는 speculative.replay) 레코드를 /test 형식으로"""
+    results = []
+    total = None
+    try:
+        for record in records:
+            if record["type"] == "case":
+                results.append(record)
+                yield _ndjson({"type": "case", "index": record["index"], **_to_test_case_result(record).model_dump()})
+            elif record["type"] == "summary":
+                total = record.get("total")
+    except RuntimeError:
+        yield _ndjson({"type": "error", "detail": "채점 서버 오류"})
+        return
+
+    yield _ndjson({
+        "type": "summary",
+        "result": determine_final_result(results),
+        "passed": sum(r["result"] == "PASS" for r in results),
+        # 실행한 케이스 수가 아니라 예제 전체 수 (RTE 등으로 중간에 멈출 수 있다)
+        "total": total if total is not None else len(results),
+        "runtime_ms": sum(r.get("runtime_ms") or 0 for r in results),
+        "memory_kb": max((r.get("memory_kb") or 0 for r in results), default=0),
+    })
+
+
 @router.post("/test", response_model=TestSubmitResponse)
 def test_submission_with_example_io(
     request: SubmitRequest,
+    stream: bool = False,
+    profile: bool = False,
     db: Session = Depends(get_db),
     user=Depends(get_current_user)
 ):
@@ -159,28 +312,39 @@ def test_submission_with_example_io(
     if not problem or not problem.example_io:
         raise HTTPException(status_code=404, detail="문제가 존재하지 않거나 예제 테스트케이스가 없습니다.")
 
-    # 채점 서버 요청
-    payload = {
-        "code": request.code,
-        "testcases": problem.example_io
+    # 예제 실행은 사용자가 기다리고 있으므로 채점 서버에서 가장 먼저 실행된다.
+    # 입력/정답/출력을 화면에 보여줘야 하므로 echo (제출 채점은 출력 앞부분과 해시만 받는다)
+    options = {
+        **speculative.example_options(problem, request.language),
+        "priority": "interactive",
+        "user": user.user_id,
     }
-    response = requests.post("http://localhost:7040/judge", json=payload)
-    if response.status_code != 200:
-        raise HTTPException(status_code=500, detail="채점 서버 오류")
+    # ?profile=true: 케이스마다 프로파일 실행을 한 번 더 해서 함수별 호출 수/시간을 붙인다 (파이썬만)
+    if profile:
+        options["profile"] = True
+
+    # 자동 저장 때 (speculative=true) 미리 채점해 둔 같은 코드의 결과가 있으면 채점 서버에 보내지 않는다
+    judge_result = None
+    if not profile:
+        judge_result = speculative.lookup(speculative.result_key(problem, request.code, request.language))
 
-    judge_result = response.json()
+    # ?stream=true: 테스트케이스가 끝날 때마다 NDJSON 한 줄씩 전달
+    if stream:
+        if judge_result is not None:
+            records = speculative.replay(judge_result)
+        else:
+            records = stream_judge_server(request.code, problem.example_io, options)
+        return StreamingResponse(_relay_test_results(records), media_type="application/x-ndjson")
+
+    # 채점 서버 요청
+    if judge_result is None:
+        try:
+            judge_result = request_judge_server(request.code, problem.example_io, options)
+        except RuntimeError:
+            raise HTTPException(status_code=500, detail="채점 서버 오류")
 
     # 개별 테스트케이스 변환
-    test_case_results = []
-    for r in judge_result["results"]:
-        test_case_results.append(TestCaseResult(
-            input=r["input"],
-            expectedOutput=r["expected"],
-            actualOutput=r["user_output"],
-            passed=(r["result"] == "PASS"),
-            runtime_ms=r.get("runtime_ms"),
-            memory_kb=r.get("memory_kb")
-        ))
+    test_case_results = [_to_test_case_result(r) for r in judge_result["results"]]
 
     # 최종 결과 계산
     final_result = determine_final_result(judge_result["results"])
@@ -190,7 +354,7 @@ def test_submission_with_example_io(
     return TestSubmitResponse(
         result=final_result,
         passed=sum(tc.passed for tc in test_case_results),
-        total=len(test_case_results),
+        total=judge_result.get("total", len(test_case_results)),
         runtime_ms=total_runtime,
         memory_kb=max_memory,
         testCases=test_case_results
@@ -63,7 +63,7 @@ def get_user_submissions(db: Session = Depends(get_db), user=Depends(get_current
 def get_user_submissions(
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
-    result_filter: Optional[str] = Query(None, description="PASS, FAIL, TLE, RTE, MLE, CE 중 하나 선택")
+    result_filter: Optional[str] = Query(None, description="PASS, FAIL, TLE, RTE, MLE, OLE, CE 중 하나 선택")
 ):
     user_id = user.user_id
 
@@ -76,7 +76,7 @@ def get_user_submissions(
     if result_filter:
         if result_filter == "FAIL":
             # FAIL → 모든 실패 유형 포함
-            fail_statuses = ["FAIL", "TLE", "RTE", "MLE", "CE"]
+            fail_statuses = ["FAIL", "TLE", "RTE", "MLE", "OLE", "CE"]
             query = query.filter(ProblemSolution.result.in_(fail_statuses))
         else:
             # 특정 값만 필터링
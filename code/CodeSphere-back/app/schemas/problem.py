@@ -15,6 +15,8 @@ class ProblemOut(BaseModel):
     input: Optional[str] = None
     output: Optional[str] = None
     problem_constraint: Optional[str] = None
+    time_limit_ms: Optional[int] = None
+    output_limit_kb: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict
+
+# 재채점 요청. 조건을 여러 개 주면 모두 만족하는 제출만 대상
+class RejudgeRequest(BaseModel):
+    real_pid: Optional[int] = None
+    user_id: Optional[int] = None
+    result_filter: Optional[List[str]] = None  # 예: ["PASS"]
+    fail_fast: bool = False  # 빠른 재채점 (첫 실패에서 멈춤)
+
+class RejudgeRunOut(BaseModel):
+    run_id: int
+    real_pid: Optional[int] = None
+    user_id: Optional[int] = None
+    result_filter: Optional[List[str]] = None
+    fail_fast: bool = False
+    status: Literal["PENDING", "RUNNING", "DONE", "ERROR", "CANCELLED"]
+    total: Optional[int] = None
+    processed: int
+    changed: int
+    failed: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
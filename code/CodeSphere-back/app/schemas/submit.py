@@ -9,20 +9,76 @@ class SubmitRequest(BaseModel):
 
 # 기존 제출 응답 (summary 전용)
 class SubmitResponse(BaseModel):
-    result: Literal["PASS", "FAIL", "TLE", "RTE", "MLE", "CE"]
+    result: Literal["PASS", "FAIL", "TLE", "RTE", "MLE", "OLE", "CE"]
     passed: int
     total: int
     runtime_ms: Optional[int]
     memory_kb: Optional[int]
 
+# 비동기 제출 응답 (채점 대기열에 등록됨)
+class SubmitQueuedResponse(BaseModel):
+    submission_id: int
+    status: Literal["PENDING", "RUNNING", "DONE", "ERROR"]
+
+# 제출 채점 상태 조회 응답
+class SubmissionStatusResponse(BaseModel):
+    submission_id: int
+    status: Literal["PENDING", "RUNNING", "DONE", "ERROR"]
+    result: Optional[Literal["PASS", "FAIL", "TLE", "RTE", "MLE", "OLE", "CE"]] = None
+    passed: Optional[int] = None
+    total: Optional[int] = None
+    runtime_ms: Optional[int] = None
+    memory_kb: Optional[int] = None
+
+# 오답 출력에서 정답과 처음 달라지는 위치 (사용자 출력 기준, 1 부터. 열은 바이트 단위)
+class FirstDiff(BaseModel):
+    line: int
+    column: int
+
+# 저장된 테스트케이스별 결과 (/submissions/detail)
+class SubmissionCaseResultOut(BaseModel):
+    index: int
+    result: Literal["PASS", "FAIL", "TLE", "RTE", "MLE", "OLE", "CE"]
+    runtime_ms: Optional[int] = None
+    memory_kb: Optional[int] = None
+    output_hash: Optional[str] = None  # 사용자 출력 전체의 sha256
+    output_preview: Optional[str] = None  # 사용자 출력 앞부분
+    first_diff: Optional[FirstDiff] = None
+
+# 제출 상세 조회 응답 (코드 + 저장된 테스트케이스별 결과)
+class SubmissionDetailResponse(SubmissionStatusResponse):
+    real_pid: int
+    language: Optional[str] = None
+    code: Optional[str] = None
+    cases: List[SubmissionCaseResultOut] = []
+
+# 프로파일 실행에서 함수 하나의 통계 (/submissions/test?profile=true)
+class ProfileFunction(BaseModel):
+    function: str
+    line: Optional[int]  # 내장 함수는 None
+    builtin: bool
+    calls: int
+    primitive_calls: int
+    total_ms: float  # 함수 자체에서 쓴 시간
+    cumulative_ms: float  # 호출한 함수 포함
+
+class CaseProfile(BaseModel):
+    functions: List[ProfileFunction] = []
+    truncated: bool = False  # 시간 제한에 걸려 중간까지의 통계
+    error: Optional[str] = None
+
 # 개별 테스트케이스 결과
 class TestCaseResult(BaseModel):
     input: str
     expectedOutput: str
     actualOutput: str
     passed: bool
-    runtime_ms: Optional[int]
+    runtime_ms: Optional[int]  # CPU 시간 (판정 기준)
     memory_kb: Optional[int]
+    wall_ms: Optional[int] = None  # 벽시계 시간 (참고용)
+    cached: bool = False  # 같은 코드의 이전 채점 결과를 재사용했는지
+    first_diff: Optional[FirstDiff] = None  # 오답일 때만
+    profile: Optional[CaseProfile] = None  # profile=true 일 때만. 실행 시간/판정과는 별도 실행
 
 # 테스트 실행 전체 응답
 class TestSubmitResponse(SubmitResponse):
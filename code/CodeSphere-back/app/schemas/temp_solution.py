@@ -5,6 +5,8 @@ class TempSaveRequest(BaseModel):
     real_pid: int
     code: str
     language: str
+    # true 면 잠시 뒤 저장된 코드로 예제를 미리 채점해 두고, 같은 코드로 /test 하면 바로 돌려준다
+    speculative: bool = False
 
 class TempSaveResponse(BaseModel):
     message: str
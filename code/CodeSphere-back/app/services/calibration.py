@@ -0,0 +1,132 @@
+import math
+import os
+import threading
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.model.models import KST, Problem, ProblemSolution
+from app.services.judge_client import determine_final_result, ensure_testset_hash, judge_options, request_judge_server
+
+# 기준 풀이를 몇 번 실행할지. 테스트케이스마다 이 횟수의 CPU 시간 중 CALIBRATION_PERCENTILE 백분위를 쓴다
+CALIBRATION_RUNS = int(os.getenv("CALIBRATION_RUNS", 5))
+CALIBRATION_PERCENTILE = float(os.getenv("CALIBRATION_PERCENTILE", 50))
+# 시간 제한 = 가장 느린 테스트케이스의 기준 시간 * 배수 (100ms 단위로 올림)
+CALIBRATION_MULTIPLIER = float(os.getenv("CALIBRATION_TIME_MULTIPLIER", 3))
+MIN_TIME_LIMIT_MS = int(os.getenv("CALIBRATION_MIN_TIME_LIMIT_MS", 500))
+# 채점 서버의 시간 제한 상한 (JUDGE_MAX_TIME_LIMIT_MS) 과 맞춘다. 보정 실행도 이 제한으로 돌린다
+MAX_TIME_LIMIT_MS = int(os.getenv("CALIBRATION_MAX_TIME_LIMIT_MS", 10000))
+
+_background_lock = threading.Lock()
+
+
+class CalibrationError(Exception):
+    """기준 풀이가 없거나 모든 테스트케이스를 통과하지 못함"""
+    pass
+
+
+def _percentile(values: list, p: float) -> int:
+    # nearest-rank 백분위 (judge_service/bench.py 와 같은 방식)
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def reference_solution(db: Session, problem: Problem):
+    """(코드, 언어, solution_id). 문제에 저장된 기준 풀이가 없으면 가장 먼저 통과한 제출. 둘 다 없으면 None"""
+    if problem.reference_code:
+        return problem.reference_code, problem.reference_language or "python", None
+    solution = (
+        db.query(ProblemSolution)
+        .filter(ProblemSolution.real_pid == problem.real_pid, ProblemSolution.result == "PASS")
+        .order_by(ProblemSolution.solution_id)
+        .first()
+    )
+    if solution is None:
+        return None
+    return solution.code, solution.language, solution.solution_id
+
+
+def calibrate_problem(db: Session, problem: Problem, force: bool = False) -> dict:
+    """
+    기준 풀이를 test_io 로 CALIBRATION_RUNS 번 채점해서 문제의 time_limit_ms 를 정한다. 커밋까지 수행.
+    직접 정한 시간 제한(보정 기록 없이 time_limit_ms 만 있는 문제)은 force=True 일 때만 덮어쓴다.
+    """
+    if problem.time_limit_ms and not problem.time_limit_calibration and not force:
+        raise CalibrationError("time limit was set manually (use force to overwrite)")
+    if not problem.test_io_hash and not problem.test_io:
+        raise CalibrationError("problem has no test cases")
+    reference = reference_solution(db, problem)
+    if reference is None:
+        raise CalibrationError("no reference solution")
+    code, language, solution_id = reference
+
+    testset_ref = {"problem_id": problem.real_pid, "hash": ensure_testset_hash(db, problem)}
+    # 지금 시간 제한에 걸리지 않도록 상한으로 실행하고, 같은 코드라도 매번 실제로 실행한다 (cache=false)
+    options = {
+        **judge_options(problem, language),
+        "time_limit_ms": MAX_TIME_LIMIT_MS,
+        "cache": False,
+        "priority": "batch",
+    }
+
+    case_times = []  # 테스트케이스별 실행마다의 CPU 시간
+    for _ in range(CALIBRATION_RUNS):
+        judge_result = request_judge_server(code, lambda: problem.test_io or [], options, testset_ref)
+        results = judge_result["results"]
+        final_result = determine_final_result(results)
+        if final_result != "PASS" or len(results) != judge_result.get("total", len(results)):
+            raise CalibrationError(f"reference solution did not pass: {final_result}")
+        if not case_times:
+            case_times = [[] for _ in results]
+        for r in results:
+            case_times[r["index"]].append(r.get("cpu_ms", r["runtime_ms"]))
+
+    per_case = [_percentile(times, CALIBRATION_PERCENTILE) for times in case_times]
+    reference_ms = max(per_case, default=0)
+    time_limit_ms = math.ceil(reference_ms * CALIBRATION_MULTIPLIER / 100) * 100
+    time_limit_ms = min(max(time_limit_ms, MIN_TIME_LIMIT_MS), MAX_TIME_LIMIT_MS)
+
+    problem.time_limit_ms = time_limit_ms
+    problem.time_limit_calibration = {
+        "solution_id": solution_id,
+        "language": language,
+        "runs": CALIBRATION_RUNS,
+        "percentile": CALIBRATION_PERCENTILE,
+        "multiplier": CALIBRATION_MULTIPLIER,
+        "reference_ms": reference_ms,
+        "slowest_case": per_case.index(reference_ms) if per_case else None,
+        "calibrated_at": datetime.now(KST).isoformat(),
+    }
+    db.commit()
+    return {"real_pid": problem.real_pid, "time_limit_ms": time_limit_ms, **problem.time_limit_calibration}
+
+
+def _calibrate_in_background(real_pids: list, force: bool):
+    # 보정은 채점 서버를 여러 번 쓰므로 한 번에 하나씩
+    with _background_lock:
+        for real_pid in real_pids:
+            db = SessionLocal()
+            try:
+                problem = db.query(Problem).filter(Problem.real_pid == real_pid).first()
+                if problem is not None:
+                    result = calibrate_problem(db, problem, force)
+                    print(f"Problem {real_pid} time limit calibrated: {result['time_limit_ms']}ms")
+            except (CalibrationError, RuntimeError) as e:
+                db.rollback()
+                print(f"Problem {real_pid} time limit calibration skipped: {e}")
+            finally:
+                db.close()
+
+
+def start_calibration(real_pids: list, force: bool = False):
+    """백그라운드 스레드에서 문제들의 시간 제한을 보정한다 (요청 응답을 기다리게 하지 않는다)"""
+    threading.Thread(
+        target=_calibrate_in_background, args=(list(real_pids), force), name="time-limit-calibration", daemon=True
+    ).start()
+
+
+def uncalibrated_problem_ids(db: Session) -> list:
+    """시간 제한이 아직 없는 문제"""
+    return [real_pid for (real_pid,) in db.query(Problem.real_pid).filter(Problem.time_limit_ms.is_(None))]
@@ -1,15 +1,261 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
 import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy.orm import Session
+
+from app.model.models import testset_hash
+
+# 채점 서버 목록 (쉼표로 구분). 부하가 가장 적은 노드로 보내고, 실패하면 다른 노드로 다시 보낸다
+JUDGE_NODES = [
+    url.strip().rstrip("/")
+    for url in os.getenv("JUDGE_NODES", "http://localhost:7040").split(",")
+    if url.strip()
+]
+HEALTH_INTERVAL_SEC = float(os.getenv("JUDGE_HEALTH_INTERVAL_SEC", 2))
+# 노드별 keep-alive 연결 수 (디스패치 워커 + 동시 /test 요청 수 정도)
+JUDGE_POOL_SIZE = int(os.getenv("JUDGE_POOL_SIZE", 16))
+CONNECT_TIMEOUT_SEC = 3
+# 채점은 오래 걸릴 수 있으므로 응답 대기는 넉넉하게
+READ_TIMEOUT_SEC = 120
+# 모든 노드가 바쁠 때(429) Retry-After 만큼 기다렸다가 다시 시도하는 횟수와 한 번에 기다리는 최대 시간
+JUDGE_BUSY_RETRIES = int(os.getenv("JUDGE_BUSY_RETRIES", 3))
+MAX_BACKOFF_SEC = 10
+
+def determine_final_result(results: list) -> str:
+    # 우선순위 높은 순서로 검사
+    priority = ["CE", "RTE", "TLE", "MLE", "OLE", "FAIL", "PASS"]
+    for p in priority:
+        if any(r["result"] == p for r in results):
+            return p
+    return "FAIL"
 
-def request_judge_server(code: str, testcases: list):
-    JUDGE_SERVER_URL = "http://localhost:7040/judge"
-    payload = {
-        "code": code,
-        "testcases": testcases
+def ensure_testset_hash(db: Session, problem):
+    """문제의 test_io 해시. 아직 계산되지 않은 문제면 한 번 계산해서 저장한다. 테스트케이스가 없으면 None."""
+    if problem.test_io_hash:
+        return problem.test_io_hash
+    if not problem.test_io:
+        return None
+    problem.test_io_hash = testset_hash(problem.test_io)
+    db.commit()
+    return problem.test_io_hash
+
+def judge_options(problem, language: str = None) -> dict:
+    """
+    채점 설정 (문제별 시간/출력 제한, 출력 비교 방식 + 제출 언어).
+    설정이 없는 항목은 채점 서버 기본값 (언어는 python).
+    호출하는 쪽에서 "priority" (interactive / submit / batch) 와 "user" 를 더하면
+    채점 서버가 그 순서와 사용자별 공정 분배로 실행한다 (judge_service/fairshare.py).
+    """
+    options = {
+        "time_limit_ms": problem.time_limit_ms,
+        "output_limit_kb": problem.output_limit_kb,
+        "checker": problem.checker,
+        "language": language,
     }
+    return {key: value for key, value in options.items() if value}
+
+def _build_payload(code: str, testcases: list, options: dict = None, testset_ref: dict = None) -> dict:
+    payload = {"code": code, **(options or {})}
+    if testset_ref:
+        # 채점 서버 캐시에 있으면 참조만으로 충분하다
+        payload["testset"] = testset_ref
+    if testcases is not None:
+        payload["testcases"] = testcases
+    return payload
+
+class _NodeFailure(Exception):
+    """노드 자체의 문제 (연결 실패, 5xx). 다른 노드로 재시도한다."""
+    pass
+
+class _NodeBusy(Exception):
+    """노드 대기열이 가득 참 (429). Retry-After 동안은 이 노드로 보내지 않는다."""
+    def __init__(self, retry_after: float):
+        super().__init__(f"busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class JudgeNode:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=JUDGE_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.healthy = True  # 첫 health 확인 전에는 정상으로 본다
+        self.slots = 1
+        self.remote_inflight = 0  # 마지막 /health 기준 노드에서 실행/대기 중인 테스트케이스 수
+        self.remote_queued = 0  # 마지막 /health 기준 노드 입장 대기열에 있는 요청 수
+        self.inflight = 0  # 이 게이트웨이가 보내 놓고 응답을 기다리는 요청 수
+        self.busy_until = 0.0  # 429 를 받은 노드는 이 시각(monotonic)까지 제외
+        self._lock = threading.Lock()
+
+    def load(self) -> float:
+        # health 주기 사이에 몰린 요청도 반영되도록 직접 보낸 요청 수를 더한 대략적인 부하
+        return (self.remote_inflight + self.remote_queued + self.inflight) / max(1, self.slots)
+
+    def busy(self) -> bool:
+        return time.monotonic() < self.busy_until
+
+    def acquire(self):
+        with self._lock:
+            self.inflight += 1
+
+    def release(self):
+        with self._lock:
+            self.inflight -= 1
+
+    def probe(self):
+        try:
+            r = self.session.get(f"{self.base_url}/health", timeout=(CONNECT_TIMEOUT_SEC, CONNECT_TIMEOUT_SEC))
+            r.raise_for_status()
+            data = r.json()
+            self.slots = data.get("slots") or 1
+            self.remote_inflight = data.get("inflight", 0)
+            self.remote_queued = data.get("queued_requests", 0)
+            self.healthy = True
+        except (requests.RequestException, ValueError):
+            self.healthy = False
+
+    def status(self) -> dict:
+        return {
+            "url": self.base_url,
+            "healthy": self.healthy,
+            "slots": self.slots,
+            "remote_inflight": self.remote_inflight,
+            "remote_queued": self.remote_queued,
+            "inflight": self.inflight,
+            "busy": self.busy(),
+        }
 
+_nodes = [JudgeNode(url) for url in JUDGE_NODES]
+_health_started = False
+_health_lock = threading.Lock()
+
+def _health_loop():
+    while True:
+        for node in _nodes:
+            node.probe()
+        time.sleep(HEALTH_INTERVAL_SEC)
+
+def _ensure_health_checker():
+    global _health_started
+    with _health_lock:
+        if _health_started:
+            return
+        _health_started = True
+    threading.Thread(target=_health_loop, name="judge-health", daemon=True).start()
+
+def judge_nodes_status() -> list:
+    return [node.status() for node in _nodes]
+
+def _candidates() -> list:
+    _ensure_health_checker()
+    # 정상이고 바쁘지 않은 노드를 부하가 적은 순서로.
+    # 모두 비정상이면 health 정보가 낡았을 수 있으니 바쁘지 않은 노드는 전부 시도
+    available = [node for node in _nodes if not node.busy()]
+    healthy = [node for node in available if node.healthy]
+    return sorted(healthy or available, key=lambda node: node.load())
+
+def _send(node: JudgeNode, payload: dict, load, testset_ref: dict, stream: bool):
+    url = f"{node.base_url}/judge"
+    timeout = (CONNECT_TIMEOUT_SEC, READ_TIMEOUT_SEC)
+    try:
+        response = node.session.post(url, json=payload, stream=stream, timeout=timeout)
+        if response.status_code == 409 and testset_ref:
+            # 이 노드 캐시에 테스트셋이 없음: testcases 를 붙여서 한 번 더
+            response.close()
+            response = node.session.post(url, json={**payload, "testcases": load()}, stream=stream, timeout=timeout)
+    except requests.RequestException as e:
+        raise _NodeFailure(e)
+
+    if response.status_code == 429:
+        response.close()
+        try:
+            retry_after = float(response.headers.get("Retry-After", 1))
+        except ValueError:
+            retry_after = 1.0
+        raise _NodeBusy(retry_after)
+    if response.status_code >= 500:
+        response.close()
+        raise _NodeFailure(f"HTTP {response.status_code}")
+    response.raise_for_status()
+    return response
+
+@contextmanager
+def _judge_response(code: str, testcases, options: dict = None, testset_ref: dict = None, stream: bool = False):
+    """
+    부하가 가장 적은 노드에 채점을 요청하고 응답을 넘겨준다. 노드가 실패하면 다음 노드로.
+    testset_ref={"problem_id", "hash"} 가 있으면 먼저 참조만 보내고,
+    채점 서버 캐시에 없을 때(409)만 testcases 를 붙여 다시 보낸다.
+    testcases 는 리스트 또는 리스트를 돌려주는 함수 (필요할 때만 DB 에서 읽도록).
+    """
+    load = testcases if callable(testcases) else (lambda: testcases)
+
+    payload = _build_payload(code, None if testset_ref else load(), options, testset_ref)
+    if stream:
+        payload["stream"] = True
+
+    last_error = None
+    for attempt in range(JUDGE_BUSY_RETRIES + 1):
+        for node in _candidates():
+            node.acquire()
+            try:
+                response = _send(node, payload, load, testset_ref, stream)
+            except _NodeBusy as e:
+                node.release()
+                node.busy_until = time.monotonic() + e.retry_after
+                last_error = e
+                continue
+            except _NodeFailure as e:
+                node.release()
+                node.healthy = False  # 다음 health 확인에서 살아 있으면 복구
+                last_error = e
+                print(f"Judge node {node.base_url} failed: {e}")
+                continue
+            except Exception:
+                node.release()
+                raise
+
+            try:
+                yield response
+            finally:
+                response.close()
+                node.release()
+            return
+
+        # 모든 노드가 바쁘면 가장 먼저 풀리는 노드를 기다렸다가 다시 (장애 노드만 남았으면 포기)
+        busy_nodes = [node for node in _nodes if node.busy()]
+        if not busy_nodes or attempt == JUDGE_BUSY_RETRIES:
+            break
+        wait = min(node.busy_until for node in busy_nodes) - time.monotonic()
+        time.sleep(min(max(wait, 0), MAX_BACKOFF_SEC))
+
+    raise RuntimeError(f"Judge server error: all judge nodes failed ({last_error})")
+
+def request_judge_server(code: str, testcases, options: dict = None, testset_ref: dict = None):
     try:
-        response = requests.post(JUDGE_SERVER_URL, json=payload)
-        response.raise_for_status()
-        return response.json()
+        with _judge_response(code, testcases, options, testset_ref) as response:
+            return response.json()
+    except RuntimeError:
+        raise
     except Exception as e:
+        raise RuntimeError(f"Judge server error: {e}")
+
+def stream_judge_server(code: str, testcases, options: dict = None, testset_ref: dict = None):
+    """
+    채점 결과를 테스트케이스가 끝날 때마다 받는다.
+    {"type": "case", "index": i, ...} 레코드들 뒤에 {"type": "summary", ...} 하나가 온다.
+    노드 재시도는 결과를 받기 시작하기 전까지만 한다.
+    """
+    try:
+        with _judge_response(code, testcases, options, testset_ref, stream=True) as response:
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+    except requests.RequestException as e:
         raise RuntimeError(f"Judge server error: {e}")
\ No newline at end of file
@@ -0,0 +1,276 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.model.models import KST, Hint, JudgeJob, ProblemSolution, TemporarySolution, User, UserProblemScore
+from app.repositories.submission_repository import save_case_results, score, update_user_embedding
+from app.services.judge_client import determine_final_result, ensure_testset_hash, judge_options, stream_judge_server
+
+# 채점 디스패치 워커 수 (채점 서버로 동시에 보낼 수 있는 제출 수)
+JUDGE_DISPATCH_WORKERS = int(os.getenv("JUDGE_DISPATCH_WORKERS", 4))
+# 다른 프로세스에서 쌓인 작업도 주기적으로 확인
+POLL_INTERVAL_SEC = 1.0
+# 채점 서버 오류 시 재시도 횟수
+MAX_ATTEMPTS = 3
+# RUNNING 상태로 이 시간 넘게 남아 있으면 워커가 죽은 것으로 보고 다시 대기열로
+STALE_AFTER = timedelta(minutes=10)
+
+# 이 프로세스에서 채점 중인 제출의 테스트케이스별 진행 상황 (스트리밍 중계용)
+PROGRESS_TTL_SEC = 60
+
+_wakeup = threading.Event()
+_started = False
+_progress = {}  # solution_id -> {"records": [...], "done": bool, "updated": monotonic, "attempt": int}
+_progress_lock = threading.Lock()
+
+
+def _start_progress(solution_id: int, attempt: int):
+    # 재시도하면 실패한 시도의 케이스 결과는 버리고 새로 쌓는다
+    with _progress_lock:
+        _progress[solution_id] = {"records": [], "done": False, "updated": time.monotonic(), "attempt": attempt}
+
+
+def _publish_progress(solution_id: int, record: dict, done: bool = False):
+    now = time.monotonic()
+    with _progress_lock:
+        entry = _progress.setdefault(solution_id, {"records": [], "done": False, "updated": now, "attempt": 0})
+        entry["records"].append(record)
+        entry["done"] = done
+        entry["updated"] = now
+
+        # 끝난 지 오래된 항목과, 워커가 죽어서 더 이상 갱신되지 않는 항목 정리
+        expired = [
+            sid for sid, e in _progress.items()
+            if (e["done"] and now - e["updated"] > PROGRESS_TTL_SEC)
+            or now - e["updated"] > STALE_AFTER.total_seconds()
+        ]
+        for sid in expired:
+            del _progress[sid]
+
+
+def get_progress(solution_id: int, start: int = 0, attempt: int = None):
+    """
+    (start 번째 이후 레코드, 완료 여부, 시도 번호). 이 프로세스가 채점하지 않은 제출이면 None.
+    attempt 가 지금 시도와 다르면 (그 사이 재시도) 처음부터 돌려준다
+    """
+    with _progress_lock:
+        entry = _progress.get(solution_id)
+        if entry is None:
+            return None
+        if attempt is not None and entry["attempt"] != attempt:
+            start = 0
+        return list(entry["records"][start:]), entry["done"], entry["attempt"]
+
+
+def enqueue_submission(db: Session, solution: ProblemSolution) -> JudgeJob:
+    """
+    제출을 저장하고 채점 작업을 대기열에 넣는다. 커밋까지 수행.
+    result 는 판정이 나올 때까지 비워 둔다 (진행 상태는 JudgeJob.status). 정답률/풀이 상태 집계는 NULL 을 세지 않는다
+    """
+    job = JudgeJob(solution=solution, status="PENDING")
+    db.add(solution)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _wakeup.set()
+    return job
+
+
+def finalize_submission(db: Session, solution: ProblemSolution, judge_result: dict) -> str:
+    """채점 결과를 제출에 반영하고 정답이면 점수/임시 풀이/임베딩을 갱신한다. 커밋은 호출한 쪽에서."""
+    problem = solution.problem
+    user = db.query(User).filter(User.user_id == solution.submit_user).first()
+
+    final_result = determine_final_result(judge_result["results"])
+    solution.result = final_result
+    solution.runtime_ms = judge_result.get("runtime_ms")
+    solution.memory_kb = judge_result.get("memory_kb")
+    save_case_results(db, solution.solution_id, judge_result["results"])
+
+    if final_result == "PASS":
+        # 임시 풀이 삭제
+        db.query(TemporarySolution).filter_by(
+            real_pid=solution.real_pid,
+            user_id=solution.submit_user
+        ).delete(synchronize_session=False)
+
+        # 1. 이미 해결한 문제인지 확인
+        existing_score = db.query(UserProblemScore).filter(
+            UserProblemScore.user_id == solution.submit_user,
+            UserProblemScore.real_pid == solution.real_pid
+        ).first()
+
+        # 2. 처음 해결한 문제일 경우에만 점수 부여
+        if not existing_score:
+            hint_count = db.query(Hint).filter(
+                Hint.user_id == solution.submit_user,
+                Hint.real_pid == solution.real_pid
+            ).count()
+
+            calculated_score = score(problem.level, hint_count)
+
+            db.add(UserProblemScore(
+                user_id=solution.submit_user,
+                real_pid=solution.real_pid,
+                score=calculated_score
+            ))
+            user.score = (user.score or 0) + calculated_score
+
+    return final_result
+
+
+def _claim_job(db: Session) -> Optional[JudgeJob]:
+    # 여러 워커/프로세스가 같은 작업을 가져가지 않도록 SKIP LOCKED
+    job = (
+        db.query(JudgeJob)
+        .filter(JudgeJob.status == "PENDING")
+        .order_by(JudgeJob.job_id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        return None
+    job.status = "RUNNING"
+    job.attempts += 1
+    job.started_at = datetime.now(KST)
+    db.commit()
+    return job
+
+
+def _process_job(db: Session, job: JudgeJob):
+    solution = job.solution
+    problem = solution.problem
+
+    # 채점 서버에는 테스트셋 해시만 보내고, 캐시에 없을 때만 test_io 를 읽어서 보낸다
+    digest = ensure_testset_hash(db, problem)
+    testset_ref = {"problem_id": problem.real_pid, "hash": digest} if digest else None
+
+    # 제출 채점은 모든 케이스를 원래 순서대로 판정한다.
+    # 문제에 fail_fast 를 켠 경우만 자주 틀리는 케이스부터 실행하고 첫 실패에서 멈춘다
+    options = {
+        **judge_options(problem, solution.language),
+        "fail_fast": bool(problem.fail_fast),
+        "priority": "submit",
+        "user": solution.submit_user,
+    }
+
+    # 테스트케이스 결과를 받는 대로 진행 상황에 올려서 /submissions/stream 으로 중계
+    _start_progress(solution.solution_id, job.attempts)
+    results = []
+    judge_result = None
+    for record in stream_judge_server(solution.code, lambda: problem.test_io, options, testset_ref):
+        if record["type"] == "case":
+            results.append(record)
+            _publish_progress(solution.solution_id, {
+                "type": "case",
+                "index": record["index"],
+                "result": record["result"],
+                "passed": record["result"] == "PASS",
+                "runtime_ms": record.get("runtime_ms"),
+                "memory_kb": record.get("memory_kb"),
+            })
+        elif record["type"] == "summary":
+            judge_result = {**record, "results": results}
+    if judge_result is None:
+        raise RuntimeError("Judge server error: stream ended without summary")
+
+    final_result = finalize_submission(db, solution, judge_result)
+
+    job.status = "DONE"
+    job.passed = sum(r["result"] == "PASS" for r in results)
+    job.total = judge_result["total"]
+    job.finished_at = datetime.now(KST)
+    db.commit()
+
+    _publish_progress(solution.solution_id, {
+        "type": "summary",
+        "status": job.status,
+        "result": final_result,
+        "passed": job.passed,
+        "total": job.total,
+        "runtime_ms": solution.runtime_ms,
+        "memory_kb": solution.memory_kb,
+    }, done=True)
+
+    # 유저 임베딩 갱신 (임베딩 서비스가 커밋된 PASS 를 볼 수 있도록 커밋 후에)
+    if final_result == "PASS":
+        update_user_embedding(solution.submit_user, db)
+
+
+def _fail_job(job_id: int, error: Exception) -> Optional[str]:
+    """실패한 작업을 다시 대기열로 (재시도 횟수를 다 쓰면 ERROR). 바뀐 상태를 돌려준다"""
+    db = SessionLocal()
+    try:
+        job = db.query(JudgeJob).filter(JudgeJob.job_id == job_id).first()
+        if job is None or job.status == "DONE":
+            # 판정을 커밋한 뒤의 오류 (임베딩 갱신 등) 는 다시 채점하지 않는다
+            return job.status if job else None
+        job.error = str(error)
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = "ERROR"
+            job.finished_at = datetime.now(KST)
+        else:
+            job.status = "PENDING"
+        db.commit()
+        return job.status
+    finally:
+        db.close()
+
+
+def _worker_loop():
+    while True:
+        db = SessionLocal()
+        job_id = None
+        solution_id = None
+        try:
+            job = _claim_job(db)
+            if job is not None:
+                job_id = job.job_id
+                solution_id = job.solution_id
+                _process_job(db, job)
+        except Exception as e:
+            db.rollback()
+            print(f"Judge job {job_id} failed: {e}")
+            if job_id is not None:
+                status = _fail_job(job_id, e)
+                if status in ("PENDING", "ERROR"):
+                    # 스트리밍 중인 쪽에 알린다. ERROR 면 여기서 끝 (PENDING 이면 다음 시도가 진행 상황을 새로 쌓는다)
+                    _publish_progress(solution_id, {"type": "summary", "status": status}, done=status == "ERROR")
+                time.sleep(POLL_INTERVAL_SEC)
+        finally:
+            db.close()
+
+        if job_id is None:
+            _wakeup.wait(POLL_INTERVAL_SEC)
+            _wakeup.clear()
+
+
+def recover_stale_jobs():
+    """서버가 채점 도중 죽어서 RUNNING 으로 남은 작업을 다시 대기열로 돌린다."""
+    db = SessionLocal()
+    try:
+        recovered = db.query(JudgeJob).filter(
+            JudgeJob.status == "RUNNING",
+            JudgeJob.started_at < datetime.now(KST) - STALE_AFTER
+        ).update({"status": "PENDING"}, synchronize_session=False)
+        db.commit()
+        if recovered:
+            print(f"Stale judge jobs requeued: {recovered}")
+    finally:
+        db.close()
+
+
+def start_judge_workers():
+    global _started
+    if _started:
+        return
+    _started = True
+
+    recover_stale_jobs()
+    for i in range(JUDGE_DISPATCH_WORKERS):
+        threading.Thread(target=_worker_loop, name=f"judge-dispatch-{i}", daemon=True).start()
@@ -0,0 +1,336 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only
+
+from app.database import SessionLocal
+from app.model.models import KST, Hint, JudgeJob, Problem, ProblemSolution, RejudgeRun, User, UserProblemScore
+from app.repositories.submission_repository import save_case_results, score, update_user_embedding
+from app.services.judge_client import determine_final_result, judge_options, request_judge_server, testset_hash
+
+# 한 번에 읽어 오는 제출 수 (solution_id 기준 keyset 페이지)
+REJUDGE_CHUNK_SIZE = int(os.getenv("REJUDGE_CHUNK_SIZE", 50))
+# 제출 하나를 재채점한 뒤 쉬는 시간. 실시간 채점보다 낮은 우선순위로 천천히 돈다
+REJUDGE_PAUSE_SEC = float(os.getenv("REJUDGE_PAUSE_SEC", 0.2))
+POLL_INTERVAL_SEC = 2.0
+# RUNNING 상태로 이 시간 넘게 진행이 없으면 서버가 죽은 것으로 보고 다시 대기열로
+STALE_AFTER = timedelta(minutes=10)
+
+_wakeup = threading.Event()
+_started = False
+
+
+def create_run(db: Session, real_pid: int = None, user_id: int = None, result_filter: list = None,
+               fail_fast: bool = False) -> RejudgeRun:
+    run = RejudgeRun(
+        real_pid=real_pid, user_id=user_id, result_filter=result_filter or None, fail_fast=fail_fast, status="PENDING"
+    )
+    run.total = _target_query(db, run).count()
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    _wakeup.set()
+    return run
+
+
+def cancel_run(db: Session, run: RejudgeRun):
+    if run.status in ("PENDING", "RUNNING"):
+        run.status = "CANCELLED"
+        run.finished_at = datetime.now(KST)
+        db.commit()
+
+
+def _target_query(db: Session, run: RejudgeRun):
+    # 아직 채점 대기 중인 제출은 실시간 채점이 새 테스트케이스로 처리하므로 제외
+    query = db.query(ProblemSolution).filter(
+        ~ProblemSolution.judge_job.has(JudgeJob.status.in_(("PENDING", "RUNNING")))
+    )
+    if run.real_pid is not None:
+        query = query.filter(ProblemSolution.real_pid == run.real_pid)
+    if run.user_id is not None:
+        query = query.filter(ProblemSolution.submit_user == run.user_id)
+    if run.result_filter:
+        query = query.filter(ProblemSolution.result.in_(run.result_filter))
+    return query
+
+
+def _wait_for_live_queue(db: Session, run: RejudgeRun):
+    # 실시간 제출이 대기 중이면 먼저 처리되도록 양보.
+    # 기다리는 동안에도 updated_at 을 갱신한다 (대기가 길어도 recover_stale_runs 가 멈춘 작업으로 보고 다시 넣지 않게)
+    while db.query(JudgeJob.job_id).filter(JudgeJob.status == "PENDING").first() is not None:
+        run.updated_at = datetime.now(KST)
+        db.commit()
+        time.sleep(POLL_INTERVAL_SEC)
+
+
+def _load_problem(db: Session, problems: dict, real_pid: int) -> Problem:
+    problem = problems.get(real_pid)
+    if problem is None:
+        problem = db.query(Problem).filter(Problem.real_pid == real_pid).first()
+        # 테스트케이스를 고친 뒤 재채점하는 경우가 대부분이므로 해시를 새로 계산한다
+        if problem.test_io:
+            new_hash = testset_hash(problem.test_io)
+            if problem.test_io_hash != new_hash:
+                problem.test_io_hash = new_hash
+                db.commit()
+        problems[real_pid] = problem
+    return problem
+
+
+def _rejudge_solution(db: Session, problem: Problem, solution: ProblemSolution, fail_fast: bool = False) -> bool:
+    """제출 하나를 다시 채점해서 반영한다. 결과가 바뀌었으면 True. 커밋은 호출한 쪽에서."""
+    testset_ref = {"problem_id": problem.real_pid, "hash": problem.test_io_hash} if problem.test_io_hash else None
+    # 채점 서버에서도 남는 슬롯으로만 실행 (batch).
+    # 기본은 제출 채점과 같은 전체 실행이고, 빠른 재채점(run.fail_fast)만 첫 실패에서 멈춘다
+    options = {
+        **judge_options(problem, solution.language),
+        "fail_fast": fail_fast,
+        "priority": "batch",
+        "user": solution.submit_user,
+    }
+    judge_result = request_judge_server(solution.code, lambda: problem.test_io or [], options, testset_ref)
+
+    results = judge_result["results"]
+    final_result = determine_final_result(results)
+    changed = final_result != solution.result
+
+    solution.result = final_result
+    solution.runtime_ms = judge_result.get("runtime_ms")
+    solution.memory_kb = judge_result.get("memory_kb")
+    save_case_results(db, solution.solution_id, results)
+
+    job = solution.judge_job
+    if job is not None:
+        # 채점 서버 오류로 끝났던 제출도 이제 판정이 있다
+        job.status = "DONE"
+        job.passed = sum(r["result"] == "PASS" for r in results)
+        job.total = judge_result.get("total", len(results))
+    return changed
+
+
+def reconcile_scores(db: Session, real_pid: int) -> set:
+    """
+    문제 하나에 대해 UserProblemScore 를 현재 PASS 제출과 맞추고 해당 유저 점수를 다시 합산한다.
+    몇 번을 실행해도 결과가 같다. 바뀐 유저 id 를 돌려준다. 커밋은 호출한 쪽에서.
+    """
+    problem = db.query(Problem).filter(Problem.real_pid == real_pid).first()
+    passed_users = db.query(ProblemSolution.submit_user).filter(
+        ProblemSolution.real_pid == real_pid,
+        ProblemSolution.result == "PASS"
+    ).distinct()
+
+    # 더 이상 PASS 제출이 없는 유저의 점수 기록 삭제
+    stale = [user_id for (user_id,) in db.query(UserProblemScore.user_id).filter(
+        UserProblemScore.real_pid == real_pid,
+        ~UserProblemScore.user_id.in_(passed_users)
+    )]
+    if stale:
+        db.query(UserProblemScore).filter(
+            UserProblemScore.real_pid == real_pid,
+            UserProblemScore.user_id.in_(stale)
+        ).delete(synchronize_session=False)
+
+    # 새로 PASS 가 된 유저에게 점수 부여 (제출 시와 같은 계산식)
+    scored_users = db.query(UserProblemScore.user_id).filter(UserProblemScore.real_pid == real_pid)
+    missing = [user_id for (user_id,) in passed_users.filter(~ProblemSolution.submit_user.in_(scored_users))]
+    if missing:
+        hint_counts = dict(
+            db.query(Hint.user_id, func.count(Hint.hint_id))
+            .filter(Hint.real_pid == real_pid, Hint.user_id.in_(missing))
+            .group_by(Hint.user_id)
+        )
+        db.bulk_insert_mappings(UserProblemScore, [
+            {
+                "user_id": user_id,
+                "real_pid": real_pid,
+                "score": score(problem.level, hint_counts.get(user_id, 0)),
+                "updated_at": datetime.now(KST),
+            }
+            for user_id in missing
+        ])
+
+    affected = set(stale) | set(missing)
+    if affected:
+        total_score = (
+            db.query(func.coalesce(func.sum(UserProblemScore.score), 0))
+            .filter(UserProblemScore.user_id == User.user_id)
+            .scalar_subquery()
+        )
+        db.query(User).filter(User.user_id.in_(affected)).update(
+            {User.score: total_score}, synchronize_session=False
+        )
+    return affected
+
+
+def _reconcile_run(db: Session, run: RejudgeRun, processed_only: bool = False) -> set:
+    """
+    재채점한 제출이 있는 문제의 점수를 맞춘다. processed_only=True 면 cursor 까지 처리한 제출의 문제만
+    (취소/오류로 중간에 멈춘 경우. 이전 실행에서 처리한 부분도 포함된다).
+    result_filter 는 보지 않는다: 재채점으로 결과가 바뀐 제출은 더 이상 필터에 맞지 않는다
+    """
+    if run.real_pid is not None:
+        real_pids = [run.real_pid]
+    else:
+        query = db.query(ProblemSolution.real_pid)
+        if run.user_id is not None:
+            query = query.filter(ProblemSolution.submit_user == run.user_id)
+        if processed_only:
+            query = query.filter(ProblemSolution.solution_id <= run.cursor)
+        real_pids = [pid for (pid,) in query.distinct()]
+
+    affected = set()
+    for real_pid in real_pids:
+        # 동시에 실시간 제출이 같은 점수 행을 만들었으면 한 번 더 맞춘다
+        for attempt in range(2):
+            try:
+                affected |= reconcile_scores(db, real_pid)
+                db.commit()
+                break
+            except IntegrityError:
+                db.rollback()
+                if attempt:
+                    raise
+    return affected
+
+
+def _process_run(db: Session, run: RejudgeRun):
+    try:
+        cancelled = _rejudge_targets(db, run)
+    except Exception:
+        # 이미 커밋한 결과 변경이 점수에 반영되도록 처리한 부분까지 맞추고 나서 ERROR 로
+        db.rollback()
+        try:
+            _reconcile_run(db, run, processed_only=True)
+        except Exception as e:
+            db.rollback()
+            print(f"Rejudge {run.run_id}: score reconcile failed: {e}")
+        raise
+
+    # 취소돼도 그때까지 바뀐 결과는 점수에 반영한다 (상태는 cancel_run 이 정한 CANCELLED 그대로)
+    affected = _reconcile_run(db, run, processed_only=cancelled)
+
+    if not cancelled:
+        run.status = "DONE"
+        run.finished_at = datetime.now(KST)
+    db.commit()
+
+    for user_id in affected:
+        update_user_embedding(user_id, db)
+
+
+def _rejudge_targets(db: Session, run: RejudgeRun) -> bool:
+    """대상 제출을 cursor 다음부터 재채점한다. 도중에 취소되면 True"""
+    problems = {}
+    while True:
+        chunk = (
+            _target_query(db, run)
+            .options(load_only(
+                ProblemSolution.solution_id,
+                ProblemSolution.real_pid,
+                ProblemSolution.code,
+                ProblemSolution.language,
+                ProblemSolution.result,
+            ))
+            .filter(ProblemSolution.solution_id > run.cursor)
+            .order_by(ProblemSolution.solution_id)
+            .limit(REJUDGE_CHUNK_SIZE)
+            .all()
+        )
+        if not chunk:
+            break
+
+        for solution in chunk:
+            db.refresh(run, ["status"])
+            if run.status != "RUNNING":
+                return True
+
+            _wait_for_live_queue(db, run)
+            problem = _load_problem(db, problems, solution.real_pid)
+            try:
+                if _rejudge_solution(db, problem, solution, run.fail_fast):
+                    run.changed += 1
+            except RuntimeError as e:
+                db.rollback()
+                print(f"Rejudge {run.run_id}: solution {solution.solution_id} failed: {e}")
+                run.failed += 1
+
+            # 제출 결과와 cursor 를 같은 트랜잭션으로 커밋해서 중단돼도 이어서 진행
+            run.cursor = solution.solution_id
+            run.processed += 1
+            run.updated_at = datetime.now(KST)
+            db.commit()
+            time.sleep(REJUDGE_PAUSE_SEC)
+    return False
+
+
+def _claim_run(db: Session) -> Optional[RejudgeRun]:
+    run = (
+        db.query(RejudgeRun)
+        .filter(RejudgeRun.status == "PENDING")
+        .order_by(RejudgeRun.run_id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if run is None:
+        return None
+    run.status = "RUNNING"
+    run.started_at = run.started_at or datetime.now(KST)
+    run.updated_at = datetime.now(KST)
+    db.commit()
+    return run
+
+
+def _worker_loop():
+    while True:
+        db = SessionLocal()
+        run_id = None
+        try:
+            run = _claim_run(db)
+            if run is not None:
+                run_id = run.run_id
+                _process_run(db, run)
+        except Exception as e:
+            db.rollback()
+            print(f"Rejudge run {run_id} failed: {e}")
+            if run_id is not None:
+                db.query(RejudgeRun).filter(RejudgeRun.run_id == run_id).update(
+                    {"status": "ERROR", "error": str(e), "finished_at": datetime.now(KST)},
+                    synchronize_session=False
+                )
+                db.commit()
+        finally:
+            db.close()
+
+        if run_id is None:
+            _wakeup.wait(POLL_INTERVAL_SEC)
+            _wakeup.clear()
+
+
+def recover_stale_runs():
+    """서버가 재채점 도중 죽어서 RUNNING 으로 남은 작업을 다시 대기열로 (cursor 부터 이어서 진행)."""
+    db = SessionLocal()
+    try:
+        recovered = db.query(RejudgeRun).filter(
+            RejudgeRun.status == "RUNNING",
+            RejudgeRun.updated_at < datetime.now(KST) - STALE_AFTER
+        ).update({"status": "PENDING"}, synchronize_session=False)
+        db.commit()
+        if recovered:
+            print(f"Stale rejudge runs requeued: {recovered}")
+    finally:
+        db.close()
+
+
+def start_rejudge_worker():
+    global _started
+    if _started:
+        return
+    _started = True
+
+    recover_stale_runs()
+    threading.Thread(target=_worker_loop, name="rejudge", daemon=True).start()
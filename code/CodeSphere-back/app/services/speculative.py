@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from app.services.judge_client import judge_options, request_judge_server, testset_hash
+
+# 자동 저장(/submissions/save, speculative=true) 후 이 시간 동안 다시 저장되지 않으면 예제를 미리 채점해 둔다
+SPECULATIVE_DEBOUNCE_SEC = float(os.getenv("SPECULATIVE_JUDGE_DEBOUNCE_SEC", 3))
+# 미리 채점한 결과를 코드 해시별로 몇 개까지 기억할지 (오래 안 쓴 것부터 버린다)
+SPECULATIVE_CACHE_SIZE = int(os.getenv("SPECULATIVE_JUDGE_CACHE_SIZE", 1024))
+# 동시에 채점 서버로 보내는 미리 채점 수. 넘치면 건너뛴다 (사용자가 /test 를 누르면 그때 채점)
+SPECULATIVE_MAX_INFLIGHT = int(os.getenv("SPECULATIVE_JUDGE_MAX_INFLIGHT", 2))
+
+_results = OrderedDict()  # result_key -> 채점 서버 응답 (/test 와 같은 옵션)
+_timers = {}  # (user_id, real_pid) -> 대기 중인 threading.Timer
+_lock = threading.Lock()
+_inflight = threading.BoundedSemaphore(SPECULATIVE_MAX_INFLIGHT)
+
+
+def example_options(problem, language: str) -> dict:
+    """/submissions/test 가 채점 서버에 보내는 옵션 (우선순위/사용자 제외)"""
+    return {**judge_options(problem, language), "echo": True}
+
+
+def result_key(problem, code: str, language: str) -> str:
+    # 예제, 시간 제한 등 문제 설정이 바뀌면 다른 키가 된다
+    raw = json.dumps(
+        [problem.real_pid, testset_hash(problem.example_io or []), example_options(problem, language), code],
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def lookup(key: str):
+    """미리 채점한 결과 (케이스마다 cached=True). 없으면 None"""
+    with _lock:
+        judge_result = _results.get(key)
+        if judge_result is None:
+            return None
+        _results.move_to_end(key)
+    return {**judge_result, "results": [{**r, "cached": True} for r in judge_result["results"]]}
+
+
+def _cacheable(judge_result: dict) -> bool:
+    # 채점 서버 verdict_cache 와 같은 기준: 실행 시간에 따라 달라질 수 있는 TLE 와
+    # 채점 서버 내부 오류 ("Error: " 로 시작하는 출력) 가 있으면 /test 때 다시 채점한다
+    return not any(
+        r["result"] == "TLE" or (r.get("user_output") or "").startswith("Error: ")
+        for r in judge_result["results"]
+    )
+
+
+def store(key: str, judge_result: dict):
+    if not _cacheable(judge_result):
+        return
+    with _lock:
+        _results[key] = judge_result
+        _results.move_to_end(key)
+        while len(_results) > SPECULATIVE_CACHE_SIZE:
+            _results.popitem(last=False)
+
+
+def replay(judge_result: dict):
+    """저장된 결과를 채점 서버 스트림 (stream_judge_server) 과 같은 레코드로"""
+    for r in judge_result["results"]:
+        yield {"type": "case", **r}
+    summary = {key: value for key, value in judge_result.items() if key != "results"}
+    yield {"type": "summary", "judged": len(judge_result["results"]), **summary}
+
+
+def _judge(timer_key: tuple, key: str, code: str, example_io: list, options: dict):
+    with _lock:
+        # Timer 스레드 자신. 그 사이 새로 예약된 것이면 지우지 않는다
+        if _timers.get(timer_key) is threading.current_thread():
+            del _timers[timer_key]
+        if key in _results:
+            return
+    if not _inflight.acquire(blocking=False):
+        return
+    try:
+        store(key, request_judge_server(code, example_io, options))
+    except RuntimeError as e:
+        print(f"Speculative judge skipped: {e}")
+    finally:
+        _inflight.release()
+
+
+def schedule(user_id, problem, code: str, language: str):
+    """
+    저장된 코드를 예제로 미리 채점하도록 예약한다 (가장 낮은 batch 우선순위).
+    같은 사용자가 같은 문제를 SPECULATIVE_DEBOUNCE_SEC 안에 다시 저장하면 앞의 예약은 취소된다.
+    """
+    if not code.strip() or not problem.example_io:
+        return
+    key = result_key(problem, code, language)
+    options = {**example_options(problem, language), "priority": "batch", "user": user_id}
+    timer_key = (user_id, problem.real_pid)
+    timer = threading.Timer(SPECULATIVE_DEBOUNCE_SEC, _judge, args=(timer_key, key, code, problem.example_io, options))
+    timer.daemon = True
+    with _lock:
+        previous = _timers.pop(timer_key, None)
+        if previous is not None:
+            previous.cancel()
+        if key in _results:
+            return
+        _timers[timer_key] = timer
+    timer.start()
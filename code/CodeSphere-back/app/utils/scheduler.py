@@ -2,6 +2,8 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.model.models import TemporarySolution
+from app.services.judge_queue import recover_stale_jobs
+from app.services.rejudge import recover_stale_runs
 from datetime import datetime, timedelta
 
 def clean_expired_temp_solutions():
@@ -15,4 +17,6 @@ def clean_expired_temp_solutions():
 def start_scheduler():
     scheduler = BackgroundScheduler()
     scheduler.add_job(clean_expired_temp_solutions, 'interval', days=1)  # 하루마다 실행
+    scheduler.add_job(recover_stale_jobs, 'interval', minutes=5)  # 멈춘 채점 작업 재등록
+    scheduler.add_job(recover_stale_runs, 'interval', minutes=5)  # 멈춘 재채점 작업 재등록
     scheduler.start()
\ No newline at end of file
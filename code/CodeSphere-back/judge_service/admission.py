@@ -0,0 +1,134 @@
+"""
+/judge 요청 입장 제어.
+
+동시에 채점하는 요청 수를 max_active 로 제한하고, 나머지는 최대 max_queue 개까지 기다린다.
+기다리는 요청은 우선순위 클래스 순서로, 같은 클래스 안에서는 사용자별로 돌아가며 들어간다 (fairshare.py).
+batch 요청은 동시에 batch_max_active 개까지만 들어가서 긴 재채점이 슬롯을 전부 차지하지 못한다.
+대기열이 가득 찼거나 너무 오래 기다리면 Busy 를 던지고, 호출한 쪽은 429 + Retry-After 로 응답한다.
+AsyncAdmissionController 는 같은 규칙의 asyncio 버전 (async_app.py).
+"""
+import asyncio
+import math
+import threading
+import time
+
+from fairshare import DEFAULT_PRIORITY, PRIORITIES, FairQueue
+
+
+class Busy(Exception):
+    def __init__(self, retry_after: int, queue_depth: int):
+        super().__init__(f"judge busy (queue depth {queue_depth})")
+        self.retry_after = retry_after
+        self.queue_depth = queue_depth
+
+
+class AdmissionController:
+    def __init__(self, max_active: int, max_queue: int, queue_timeout_s: float, batch_max_active: int = None):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.batch_max_active = batch_max_active or max_active
+        self.active = 0
+        self.active_by_priority = {priority: 0 for priority in PRIORITIES}
+        self._waiters = FairQueue()
+        self._cond = threading.Condition()
+        # 최근 요청 처리 시간의 지수 이동 평균 (Retry-After 추정용)
+        self._avg_request_s = 1.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def queued_by_priority(self) -> dict:
+        return {priority: self._waiters.count(priority) for priority in PRIORITIES}
+
+    def retry_after(self) -> int:
+        # 앞에 있는 요청들이 빠질 때까지 걸릴 대략적인 시간
+        waves = (self.queued + 1) / max(1, self.max_active)
+        return max(1, math.ceil(waves * self._avg_request_s))
+
+    def _allowed(self, priority: str) -> bool:
+        return priority != "batch" or self.active_by_priority["batch"] < self.batch_max_active
+
+    def _can_enter_now(self, priority: str) -> bool:
+        # 앞에 들어갈 수 있는 대기 요청이 없고 슬롯이 비었을 때
+        return (self.active < self.max_active and self._allowed(priority)
+                and self._waiters.peek(self._allowed) is None)
+
+    def _is_my_turn(self, me) -> bool:
+        return self._waiters.peek(self._allowed) is me and self.active < self.max_active
+
+    def _enter(self, priority: str) -> float:
+        self.active += 1
+        self.active_by_priority[priority] += 1
+        return time.monotonic()
+
+    def _leave(self, started: float, priority: str):
+        self.active -= 1
+        self.active_by_priority[priority] -= 1
+        elapsed = time.monotonic() - started
+        self._avg_request_s = self._avg_request_s * 0.8 + elapsed * 0.2
+
+    def acquire(self, priority: str = DEFAULT_PRIORITY, user=None) -> float:
+        with self._cond:
+            if self._can_enter_now(priority):
+                return self._enter(priority)
+            if self.queued >= self.max_queue:
+                raise Busy(self.retry_after(), self.queued)
+
+            # 내 차례(들어갈 수 있는 대기 요청 중 맨 앞)이고 슬롯이 비었을 때만 들어간다
+            me = object()
+            self._waiters.push(priority, user, me)
+            deadline = time.monotonic() + self.queue_timeout_s
+            try:
+                while not self._is_my_turn(me):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiters.discard(priority, user, me)
+                        raise Busy(self.retry_after(), self.queued)
+                    self._cond.wait(remaining)
+                self._waiters.pop(self._allowed)
+                return self._enter(priority)
+            finally:
+                self._cond.notify_all()
+
+    def release(self, started: float, priority: str = DEFAULT_PRIORITY):
+        with self._cond:
+            self._leave(started, priority)
+            self._cond.notify_all()
+
+
+class AsyncAdmissionController(AdmissionController):
+    """이벤트 루프 하나에서만 쓴다 (스레드 안전하지 않음)"""
+
+    def __init__(self, max_active: int, max_queue: int, queue_timeout_s: float, batch_max_active: int = None):
+        super().__init__(max_active, max_queue, queue_timeout_s, batch_max_active)
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, priority: str = DEFAULT_PRIORITY, user=None) -> float:
+        async with self._cond:
+            if self._can_enter_now(priority):
+                return self._enter(priority)
+            if self.queued >= self.max_queue:
+                raise Busy(self.retry_after(), self.queued)
+
+            me = object()
+            self._waiters.push(priority, user, me)
+            entered = False
+            try:
+                await asyncio.wait_for(self._cond.wait_for(lambda: self._is_my_turn(me)), self.queue_timeout_s)
+                self._waiters.pop(self._allowed)
+                entered = True
+                return self._enter(priority)
+            except asyncio.TimeoutError:
+                raise Busy(self.retry_after(), self.queued)
+            finally:
+                # 시간 초과나 클라이언트가 끊겨 취소된 경우 대기열에서 뺀다
+                if not entered:
+                    self._waiters.discard(priority, user, me)
+                self._cond.notify_all()
+
+    async def release(self, started: float, priority: str = DEFAULT_PRIORITY):
+        async with self._cond:
+            self._leave(started, priority)
+            self._cond.notify_all()
@@ -1,254 +1,380 @@
-import ast
-from flask import Flask, request, jsonify
+import json
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 import tempfile
 import subprocess
 import os
 import time
 import shutil
-import resource
+import threading
+from zygote import ZygoteError, ZygotePool, wait_with_deadline
+from admission import AdmissionController, Busy
+from fairshare import DEFAULT_PRIORITY, FairExecutor
+import cgroup
+import judging
+import languages
+import memwatch
+import metrics
+import profiler
+import testset_cache
+import verdict_cache
+from judging import (
+    BATCH_MAX_ACTIVE, COMPILE_TIME, MAX_ACTIVE_REQUESTS, MAX_PARALLEL_TESTS, MAX_QUEUED_REQUESTS, QUEUE_TIMEOUT_SEC,
+    QUEUE_WAIT, REQUEST_LATENCY, SANDBOX_OVERHEAD, VERDICTS, RequestError,
+)
 
 app = Flask(__name__)
 
-BANNED_NODES = {
-    #ast.Import: "import",
-    #ast.ImportFrom: "from ... import",
-    #ast.Call: "function call"
-}
+# 테스트케이스 실행 슬롯. 기다리는 테스트케이스는 우선순위/사용자 순서로 실행 (fairshare.py)
+test_executor = FairExecutor(MAX_PARALLEL_TESTS, thread_name_prefix="sandbox")
 
-BANNED_KEYWORDS = ['eval', 'exec', 'os.', 'subprocess', 'open(', 'compile', 'globals', 'locals', 'sys.exit']
+admission = AdmissionController(MAX_ACTIVE_REQUESTS, MAX_QUEUED_REQUESTS, QUEUE_TIMEOUT_SEC, BATCH_MAX_ACTIVE)
 
-try:
-    import psutil
-except ImportError:
-    psutil = None
+# 실행 중이거나 슬롯을 기다리는 테스트케이스 수 (/health 로 게이트웨이에 알려 주는 부하)
+_inflight_tests = 0
+_inflight_lock = threading.Lock()
 
-MEMORY_LIMIT_MB = 128  # 제한할 메모리 (MB)
+def _track_inflight(delta: int):
+    global _inflight_tests
+    with _inflight_lock:
+        _inflight_tests += delta
 
-def is_malicious(code: str) -> str:
-    for keyword in BANNED_KEYWORDS:
-        if keyword in code:
-            return keyword
-    return None
+# 표준 라이브러리를 미리 import 한 인터프리터 풀. 띄울 수 없으면 prlimit + python3 경로로 동작
+USE_ZYGOTE = os.getenv("JUDGE_USE_ZYGOTE", "1") == "1"
 
-def check_ast_for_banned_usage(code: str):
+zygote_pool = None
+if USE_ZYGOTE:
     try:
-        tree = ast.parse(code)
-    except SyntaxError as e:
-        return f"SyntaxError: {e}"
-
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Import) or isinstance(node, ast.ImportFrom):
-            for alias in node.names:
-                if alias.name.split(".")[0] in BANNED_KEYWORDS:
-                    return f"금지된 모듈 import 사용: {alias.name}"
-        elif isinstance(node, ast.Call):
-            func = node.func
-            if isinstance(func, ast.Name) and func.id in BANNED_KEYWORDS:
-                return f"금지된 함수 사용: {func.id}()"
-            elif isinstance(func, ast.Attribute) and func.attr in BANNED_KEYWORDS:
-                return f"금지된 함수/속성 사용: {func.attr}"
-    return None  # 안전함
-
-def _has_gnu_time():
-    # GNU time은 /usr/bin/time (쉘 빌틴 time 말고 외부 바이너리)
-    return os.path.exists("/usr/bin/time")
-
-def run_single_test(code: str, input_data: str, expected_output: str):
-    temp_dir = tempfile.mkdtemp()
-    code_path = os.path.join(temp_dir, "main.py")
-    memfile = os.path.join(temp_dir, "mem.txt")
-
-    with open(code_path, "w", encoding="utf-8") as f:
-        f.write(code)
-
-    base_cmd = [
-        "prlimit",
-        f"--as={MEMORY_LIMIT_MB * 1024 * 1024}",  # byte 단위
-        "--",
-        "python3",
-        code_path,
-    ]
-
-    if _has_gnu_time():
-        cmd = ["/usr/bin/time", "-f", "%M", "-o", memfile] + base_cmd
-        use_psutil_fallback = False
-    else:
-        cmd = base_cmd
-        use_psutil_fallback = True
-
-    try:
-        start = time.time()
-        peak_rss_kb = 0
-
+        zygote_pool = ZygotePool(MAX_PARALLEL_TESTS)
+    except Exception as e:
+        print(f"zygote pool disabled: {e}")
+
+# cgroup v2 를 쓸 수 있으면 테스트케이스마다 임시 cgroup 으로 메모리 제한/측정 (폴링 없음)
+USE_CGROUP = os.getenv("JUDGE_USE_CGROUP", "1") == "1"
+cgroup_enabled = USE_CGROUP and cgroup.setup()
+# 사용자 프로그램 메모리 측정 도우미를 첫 요청 전에 만들어 둔다 (memwatch.py)
+memwatch.helper_path()
+
+def _run_with_zygote(code_path: str, input_path: str, out_path: str, err_path: str, limits: dict, cg: str = None) -> dict:
+    """
+    미리 띄워 둔 zygote 에서 fork 로 실행. 측정 시간에 인터프리터 기동 비용이 포함되지 않는다.
+    컴파일 언어는 limits 에 "argv" 를 넣어 보내면 zygote 자식이 그 실행 파일로 exec 한다.
+    """
+    if cg:
+        limits = {**limits, "address_space_bytes": None, "cgroup_procs": cgroup.procs_file(cg)}
+
+    with open(input_path, "rb") as fin, open(out_path, "wb") as fout, open(err_path, "wb") as ferr:
+        info = zygote_pool.run(code_path, fin.fileno(), fout.fileno(), ferr.fileno(), limits)
+
+    return {
+        "returncode": info["returncode"],
+        "cpu_ms": info["cpu_ms"],
+        "wall_ms": info["wall_ms"],
+        "memory_kb": info["memory_kb"],
+        "timed_out": info["timed_out"],
+    }
+
+def _run_with_subprocess(command: list, work_dir: str, input_path: str, out_path: str, err_path: str,
+                         limits: dict, cg: str = None) -> dict:
+    """prlimit 아래에서 command 를 새로 띄운다 (컴파일 언어, 또는 zygote 를 쓸 수 없을 때 python3)"""
+    cmd = judging.sandbox_command(command, limits, cg)
+
+    # sh/prlimit 은 exec 로 사용자 프로그램(또는 memwatch 도우미)이 되므로 같은 pid 를 wait4 로 기다리면
+    # 사용자 프로그램의 CPU 시간(ru_utime + ru_stime)을 커널에서 바로 얻는다.
+    # ru_maxrss 에는 fork 한 judge 프로세스의 RSS 가 남으므로 메모리는 run_single_test 가 도우미 보고로 바꾼다
+    # 새 세션(프로세스 그룹)으로 띄워서 시간 초과 시 자식까지 한 번에 죽인다.
+    # 입력 파일을 stdin 으로 바로 연결하고 출력도 파일로 받는다 (judge 메모리에 올리지 않음)
+    start = time.perf_counter()
+    with open(input_path, "rb") as fin, open(out_path, "wb") as fout, open(err_path, "wb") as ferr:
         proc = subprocess.Popen(
             cmd,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
+            cwd=work_dir,
+            stdin=fin,
+            stdout=fout,
+            stderr=ferr,
+            start_new_session=True
         )
+    status, usage, timed_out = wait_with_deadline(proc.pid, limits["wall_limit_ms"] / 1000, limits["cpu_limit_ms"])
+    wall_ms = int((time.perf_counter() - start) * 1000)
+    proc.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+
+    return {
+        "returncode": proc.returncode,
+        "cpu_ms": int((usage.ru_utime + usage.ru_stime) * 1000),
+        "wall_ms": wall_ms,
+        "memory_kb": int(usage.ru_maxrss),
+        "timed_out": timed_out,
+    }
+
+def run_single_test(code: str, case: dict, time_limit_ms: int = judging.DEFAULT_TIME_LIMIT_MS,
+                    output_limit_kb: int = judging.DEFAULT_OUTPUT_LIMIT_KB, checker_spec: dict = None,
+                    binary: str = None):
+    """
+    case: {"input_path", "output_path"} (testset_cache 가 만든 케이스 파일)
+    checker_spec: checker.parse_spec 으로 정리한 비교 방식 (None 이면 exact)
+    binary: 컴파일 언어면 languages.compile_binary 가 만든 실행 파일 (code 대신 실행)
+    """
+    temp_dir = tempfile.mkdtemp()
+    code_path = os.path.join(temp_dir, "main.py")
+    out_path = os.path.join(temp_dir, "stdout.txt")
+    err_path = os.path.join(temp_dir, "stderr.txt")
+    report_path = os.path.join(temp_dir, memwatch.REPORT_NAME)
+    limits = judging.sandbox_limits(time_limit_ms, output_limit_kb, native=binary is not None)
+    checker_spec = checker_spec or {"mode": "exact"}
+    cg = None
 
-        # psutil 기반 메모리 추적
-        p = None
-        if use_psutil_fallback and psutil is not None:
-            try:
-                p = psutil.Process(proc.pid)
-            except Exception:
-                p = None
+    if binary is None:
+        with open(code_path, "w", encoding="utf-8") as f:
+            f.write(code)
 
-        try:
-            while True:
-                try:
-                    stdout, stderr = proc.communicate(
-                        input=input_data.encode(),
-                        timeout=0.03
-                    )
-                    break
-                except subprocess.TimeoutExpired:
-                    if p is not None:
-                        try:
-                            rss = p.memory_info().rss // 1024
-                            if rss > peak_rss_kb:
-                                peak_rss_kb = rss
-                        except psutil.NoSuchProcess:
-                            pass
-                    continue
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            return {
-                "input": input_data,
-                "expected": expected_output,
-                "user_output": "Timeout",
-                "result": "TLE",
-                "runtime_ms": 3000,
-                "memory_kb": 0
-            }
-
-        elapsed_ms = int((time.time() - start) * 1000)
-
-        # 메모리 사용량 계산
-        memory_kb = 0
-        if _has_gnu_time():
+    try:
+        if cgroup_enabled:
+            cg = cgroup.create(limits["memory_limit_bytes"])
+
+        io_paths = (case["input_path"], out_path, err_path)
+        sandbox_started = time.perf_counter()
+        backend = "subprocess"
+        # zygote 밖에서 exec 하는 프로그램 (컴파일된 실행 파일, 또는 zygote 를 쓸 수 없을 때 python3).
+        # cgroup 이 없으면 메모리 제한을 넘는 순간, CPU 시간은 밀리초 제한을 넘는 순간 도우미가 끊는다
+        command = memwatch.wrap([binary] if binary is not None else ["python3", code_path], report_path,
+                                0 if cg else judging.MEMORY_LIMIT_MB * 1024, limits["cpu_limit_ms"])
+        if binary is not None:
+            backend = "native"
             try:
-                with open(memfile, "r") as mf:
-                    content = mf.read().strip()
-                    if content:
-                        memory_kb = int(content)
-            except Exception:
-                memory_kb = 0
-        elif psutil is not None:
-            memory_kb = int(peak_rss_kb)
-        else:
+                if zygote_pool is None:
+                    raise ZygoteError("zygote pool disabled")
+                run = _run_with_zygote(None, *io_paths, {**limits, "argv": command, "cwd": temp_dir}, cg)
+            except ZygoteError:
+                run = _run_with_subprocess(command, temp_dir, *io_paths, limits, cg)
+        elif zygote_pool is not None:
             try:
-                usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
-                usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
-                memory_kb = max(0, usage_after.ru_maxrss - usage_before.ru_maxrss)
-            except Exception:
-                memory_kb = 0
-
-        user_output = stdout.decode().strip()
-        stderr_output = stderr.decode().strip()
-
-        # 판정
-        if "SyntaxError" in stderr_output:
-            result = "CE"
-        elif ("MemoryError" in stderr_output) or ("killed" in stderr_output.lower()) or (proc.returncode == -9):
-            result = "MLE"
-        elif proc.returncode != 0 and memory_kb >= int(MEMORY_LIMIT_MB * 1024 * 0.9):
-            result = "MLE"
-        elif proc.returncode != 0:
-            result = "RTE"
-        elif user_output == expected_output.strip():
-            result = "PASS"
+                run = _run_with_zygote(code_path, *io_paths, limits, cg)
+                backend = "zygote"
+            except ZygoteError:
+                run = _run_with_subprocess(command, temp_dir, *io_paths, limits, cg)
         else:
-            result = "FAIL"
+            run = _run_with_subprocess(command, temp_dir, *io_paths, limits, cg)
+        sandbox_s = time.perf_counter() - sandbox_started
+        SANDBOX_OVERHEAD.observe(max(0.0, sandbox_s - run["wall_ms"] / 1000), backend=backend)
+        if backend != "zygote":
+            # exec 한 프로그램의 ru_maxrss 에는 fork 한 judge/zygote 의 RSS 가 남으므로 도우미가 잰 값을 쓴다 (없으면 None)
+            run["memory_kb"] = memwatch.read_report(report_path)
+
+        if cg:
+            run.update(cgroup.read_stats(cg))
 
-        return {
-            "input": input_data,
-            "expected": expected_output,
-            "user_output": user_output if user_output else stderr_output,
-            "result": result,
-            "runtime_ms": elapsed_ms,
-            "memory_kb": memory_kb
-        }
+        return judging.decide_verdict(run, case, temp_dir, out_path, err_path,
+                                      time_limit_ms, output_limit_kb, checker_spec, native=binary is not None)
 
     except Exception as e:
-        return {
-            "input": input_data,
-            "expected": expected_output,
-            "user_output": f"Error: {e}",
-            "result": "RTE",
-            "runtime_ms": 0,
-            "memory_kb": 0
-        }
+        return judging.internal_error(case, e)
 
     finally:
+        if cg:
+            cgroup.remove(cg)
         shutil.rmtree(temp_dir, ignore_errors=True)
 
 
-@app.route("/judge", methods=["POST"])
-def judge_code():
-    data = request.json
-    code = data.get("code")
-    testcases = data.get("testcases")
-
-    # 금지어 검사
-    keyword = is_malicious(code)
-    if keyword:
-        return jsonify({
-            "result": "FAIL",
-            "results": [{
-                "input": "",
-                "expected": "",
-                "user_output": "denied keyword used",
-                "result": "FAIL",
-                "runtime_ms": 0,
-                "memory_kb": 0
-            }],
-            "runtime_ms": 0,
-            "memory_kb": 0
-        })
-
-    # AST 검사
-    ast_check = check_ast_for_banned_usage(code)
-    if ast_check:
-        return jsonify({
-            "result": "FAIL",
-            "results": [{
-                "input": "",
-                "expected": "",
-                "user_output": ast_check,
-                "result": "FAIL",
-                "runtime_ms": 0,
-                "memory_kb": 0
-            }],
-            "runtime_ms": 0,
-            "memory_kb": 0
-        })
+def _profile_case(code: str, case: dict, time_limit_ms: int, output_limit_kb: int) -> dict:
+    """채점용 실행과 별도로 cProfile 을 붙여 한 번 더 실행 (판정/실행 시간에는 영향 없음)"""
+    temp_dir = tempfile.mkdtemp(prefix="profile-")
+    try:
+        code_path = os.path.join(temp_dir, "main.py")
+        with open(code_path, "w", encoding="utf-8") as f:
+            f.write(code)
+        return profiler.profile(code_path, case["input_path"], time_limit_ms,
+                                judging.sandbox_limits(time_limit_ms, output_limit_kb))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def iter_judge_results(code: str, cases: list, time_limit_ms: int, output_limit_kb: int,
+                       checker_spec: dict, cleanup_dir: str = None, stats_key: tuple = None,
+                       fail_fast: bool = False, language: str = "python", profile: bool = False,
+                       priority: str = DEFAULT_PRIORITY, user: str = None):
+    """
+    테스트케이스를 병렬로 실행하고 결과를 실행 순서대로 하나씩 돌려준다.
+    각 결과의 "index" 는 원래(저장된) 순서 기준 인덱스.
+    cleanup_dir: 이 요청만을 위해 만든 케이스 파일 디렉터리 (채점이 끝나면 지운다)
+    stats_key: (problem_id, testset hash). 있으면 케이스별 통계를 기록한다
+    fail_fast: 통계상 자주 틀리고 빨리 끝나는 케이스부터 실행하고 첫 실패에서 멈춘다
+    language: languages.resolve 로 정리한 언어. 컴파일 언어는 여기서 한 번만 컴파일한다
+    profile: 케이스마다 채점 실행이 끝난 뒤 같은 슬롯에서 프로파일 실행을 한 번 더 해서 "profile" 에 붙인다
+    priority/user: 샌드박스 슬롯을 기다리는 순서 (fairshare.py)
+    """
+    binary = None
+    if languages.is_compiled(language):
+        compile_started = time.perf_counter()
+        try:
+            binary, hit = languages.compile_binary(language, code)
+        except languages.CompileError as e:
+            if cleanup_dir:
+                shutil.rmtree(cleanup_dir, ignore_errors=True)
+            VERDICTS.inc(result="CE")
+            yield judging.compile_error(str(e))
+            return
+        COMPILE_TIME.observe(time.perf_counter() - compile_started, language=language, cached=str(hit).lower())
+
+    def run_queued(submitted_at: float, case: dict):
+        QUEUE_WAIT.observe(time.perf_counter() - submitted_at, stage="sandbox_slot", priority=priority)
+        result = run_single_test(code, case, time_limit_ms, output_limit_kb, checker_spec, binary)
+        if profile:
+            result["profile"] = _profile_case(code, case, time_limit_ms, output_limit_kb)
+        return result
+
+    futures = []
+    for index in judging.execution_order(cases, stats_key, fail_fast):
+        _track_inflight(1)
+        future = test_executor.submit(priority, user, run_queued, time.perf_counter(), cases[index])
+        # 끝나거나 취소되면 부하에서 뺀다
+        future.add_done_callback(lambda _: _track_inflight(-1))
+        futures.append((index, future))
 
+    try:
+        for index, future in futures:
+            r = {"index": index, **future.result()}
+            judging.record_result(r, cases, stats_key)
+            yield r
+            if judging.stops_judging(r, fail_fast):
+                break
+    finally:
+        # 아직 시작하지 않은 테스트케이스는 취소 (실행 중인 것은 결과만 버림).
+        # 스트리밍 중 클라이언트가 끊긴 경우도 여기로 온다
+        for _, pending in futures:
+            pending.cancel()
+        if cleanup_dir:
+            shutil.rmtree(cleanup_dir, ignore_errors=True)
+
+def _busy_response(e: Busy):
+    body, headers = judging.busy_body(e)
+    response = jsonify(body)
+    response.status_code = 429
+    response.headers.update(headers)
+    return response
+
+def _record_verdict(results_iter, key: str):
+    """결과를 그대로 흘려보내면서 모아 두었다가, 끝까지 채점되면 verdict_cache 에 저장"""
     results = []
-    total_runtime_ms = 0
-    max_memory_kb = 0
-    overall_result = "PASS"
+    for r in results_iter:
+        results.append(r)
+        yield r
+    if judging.cacheable(results):
+        verdict_cache.put(key, results)
 
-    for case in testcases:
-        r = run_single_test(code, case["input"], case["output"])
+def _stream_judge(results_iter, total: int, cached: bool = False, echo: bool = True):
+    """테스트케이스가 끝날 때마다 NDJSON 한 줄 (실행 순서, index 는 원래 순서), 마지막에 요약 한 줄"""
+    results = []
+    for r in results_iter:
         results.append(r)
+        yield json.dumps({"type": "case", **judging.response_result(r, echo)}) + "\n"
+    yield json.dumps(judging.stream_summary(results, total, cached)) + "\n"
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _observe_latency(response):
+    if request.endpoint != "judge_code":
+        return response
+    started = g.request_started
+    mode = "stream" if response.is_streamed else "json"
+    status = str(response.status_code)
+
+    def observe():
+        REQUEST_LATENCY.observe(time.perf_counter() - started, mode=mode, status=status)
+
+    if response.is_streamed:
+        response.call_on_close(observe)
+    else:
+        observe()
+    return response
 
-        total_runtime_ms += r["runtime_ms"]
-        max_memory_kb = max(max_memory_kb, r["memory_kb"])
+@app.route("/judge", methods=["POST"])
+def judge_code():
+    try:
+        req = judging.parse_request(request.json)
+        cases, stats_key = judging.load_testset(req)
+    except RequestError as e:
+        return jsonify(e.body), e.status
+    code = req["code"]
+    profile = req["profile"]
+
+    total = len(cases) if cases is not None else len(req["testcases"])
+    cached = False
+    release = None
+
+    rejection = judging.rejection_reason(code, req["language"])
+    if rejection:
+        results_iter = iter(judging.rejected(rejection))
+    else:
+        # 같은 코드를 같은 테스트셋/제한으로 이미 채점했으면 샌드박스를 띄우지 않고 돌려준다
+        verdict_key = judging.verdict_key(req)
+        cached_results = verdict_cache.get(verdict_key) if req["cache"] else None
 
-        if r["result"] == "RTE":
-            overall_result = "FAIL"
-            break
-        if r["result"] != "PASS":
-            overall_result = "FAIL"
+        if cached_results is not None:
+            cached = True
+            results_iter = iter([{**r, "cached": True} for r in cached_results])
+        else:
+            # 샌드박스를 실제로 띄우는 요청만 입장 제어 (캐시 적중/거부된 코드는 바로 응답)
+            wait_started = time.perf_counter()
+            try:
+                admitted_at = admission.acquire(req["priority"], req["user"])
+            except Busy as e:
+                return _busy_response(e)
+            finally:
+                QUEUE_WAIT.observe(time.perf_counter() - wait_started, stage="admission", priority=req["priority"])
+            release = lambda: admission.release(admitted_at, req["priority"])
+
+            cleanup_dir = None
+            if cases is None:
+                # 참조 없이 직접 보낸 테스트케이스(예제 실행 등)는 이 요청 동안만 파일로 둔다
+                cleanup_dir = tempfile.mkdtemp(prefix="cases-")
+                cases = testset_cache.write_cases(cleanup_dir, req["testcases"])
+            results_iter = iter_judge_results(code, cases, req["time_limit_ms"], req["output_limit_kb"],
+                                              req["checker_spec"], cleanup_dir=cleanup_dir, stats_key=stats_key,
+                                              fail_fast=req["fail_fast"], language=req["language"], profile=profile,
+                                              priority=req["priority"], user=req["user"])
+            if req["cache"]:
+                results_iter = _record_verdict(results_iter, verdict_key)
+
+    if req["stream"]:
+        response = Response(stream_with_context(_stream_judge(results_iter, total, cached, req["echo"])), mimetype="application/x-ndjson")
+        if release:
+            # 스트림이 끝나거나 클라이언트가 끊겼을 때 슬롯 반환
+            response.call_on_close(release)
+        return response
 
+    try:
+        summary = judging.summarize_results(list(results_iter), total, req["echo"])
+    finally:
+        if release:
+            release()
+    if cached:
+        summary["cached"] = True
+    return jsonify(summary)
+
+@app.route("/health", methods=["GET"])
+def health():
+    """게이트웨이 로드밸런서용 상태/부하 정보"""
     return jsonify({
-        "result": overall_result,
-        "results": results,
-        "runtime_ms": total_runtime_ms,
-        "memory_kb": max_memory_kb
+        "status": "ok",
+        "slots": MAX_PARALLEL_TESTS,
+        "inflight": _inflight_tests,
+        "active_requests": admission.active,
+        "queued_requests": admission.queued,
+        "queued_by_priority": admission.queued_by_priority(),
+        "max_queued_requests": MAX_QUEUED_REQUESTS,
+        "languages": languages.available(),
     })
 
+metrics.Gauge("judge_sandbox_slots", "Configured sandbox slots", lambda: MAX_PARALLEL_TESTS)
+metrics.Gauge("judge_inflight_testcases", "Testcases running or waiting for a sandbox slot", lambda: _inflight_tests)
+metrics.Gauge("judge_active_requests", "Admitted /judge requests", lambda: admission.active)
+metrics.Gauge("judge_queued_requests", "/judge requests waiting for admission", lambda: admission.queued)
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
-    app.run(host="127.0.0.1", port=7040)
\ No newline at end of file
+    # 채점 서버를 여러 대 둘 때는 JUDGE_HOST=0.0.0.0 으로 띄우고 게이트웨이 JUDGE_NODES 에 등록
+    app.run(host=os.getenv("JUDGE_HOST", "127.0.0.1"), port=int(os.getenv("JUDGE_PORT", 7040)))
\ No newline at end of file
@@ -0,0 +1,454 @@
+"""
+asyncio 채점 서버 (app.py 와 같은 /judge, /health, /metrics 규약).
+
+  uvicorn async_app:app --host 127.0.0.1 --port 7040   (uvicorn 필요, 워커 1개)
+
+app.py 는 샌드박스 하나마다 스레드 하나가 자식 종료를 기다리지만, 여기서는 프로세스 하나의 이벤트 루프가
+모든 샌드박스를 지켜본다.
+  - zygote: 논블로킹 소켓으로 요청을 보내고 응답을 이벤트 루프에서 기다린다
+  - prlimit 실행: pidfd 를 이벤트 루프에 등록해서 자식 종료 알림을 받고 os.wait4 로 rusage 를 얻는다 (폴링 없음)
+  - 체커/컴파일/테스트셋 파일 처리처럼 막히는 작업만 asyncio.to_thread 로 넘긴다
+샌드박스를 기다리는 데 스레드가 들지 않으므로 JUDGE_MAX_PARALLEL_TESTS 를 코어 수보다 크게 잡아도
+(sleep/입력 대기가 많은 제출) judge 자체 비용은 거의 늘지 않는다. 측정 시간은 CPU 시간 기준이다.
+스트리밍 중 클라이언트가 끊기면 남은 테스트케이스를 취소하고 실행 중인 샌드박스를 죽인다.
+"""
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+import cgroup
+import judging
+import languages
+import memwatch
+import metrics
+import profiler
+import testset_cache
+import verdict_cache
+from admission import AsyncAdmissionController, Busy
+from fairshare import DEFAULT_PRIORITY, AsyncFairSlots
+from judging import (
+    BATCH_MAX_ACTIVE, COMPILE_TIME, MAX_ACTIVE_REQUESTS, MAX_PARALLEL_TESTS, MAX_QUEUED_REQUESTS, QUEUE_TIMEOUT_SEC,
+    QUEUE_WAIT, REQUEST_LATENCY, SANDBOX_OVERHEAD, VERDICTS, RequestError,
+)
+from zygote import Zygote, ZygoteError, kill_group, next_wait_s, wait_with_deadline
+
+app = FastAPI()
+
+# 테스트케이스 실행 슬롯. 기다리는 테스트케이스는 우선순위/사용자 순서로 깨운다 (fairshare.py)
+sandbox_slots = AsyncFairSlots(MAX_PARALLEL_TESTS)
+
+admission = AsyncAdmissionController(MAX_ACTIVE_REQUESTS, MAX_QUEUED_REQUESTS, QUEUE_TIMEOUT_SEC, BATCH_MAX_ACTIVE)
+
+# 실행 중이거나 슬롯을 기다리는 테스트케이스 수 (이벤트 루프에서만 바뀌므로 락이 필요 없다)
+_inflight_tests = 0
+
+def _track_inflight(delta: int):
+    global _inflight_tests
+    _inflight_tests += delta
+
+
+class AsyncZygotePool:
+    """ZygotePool 의 asyncio 버전. zygote 를 size 개 띄워 두고 테스트케이스마다 하나씩 빌려 쓴다."""
+
+    def __init__(self, size: int):
+        self._idle = asyncio.Queue()
+        # 취소된 요청의 응답을 받아 내는 중인 작업 (참조를 들고 있어야 GC 되지 않는다)
+        self._draining = set()
+        for _ in range(size):
+            self._idle.put_nowait(self._spawn())
+
+    @staticmethod
+    def _spawn() -> Zygote:
+        zygote = Zygote()
+        zygote.sock.setblocking(False)
+        return zygote
+
+    async def run(self, code_path: str, stdin_fd: int, stdout_fd: int, stderr_fd: int, limits: dict) -> dict:
+        zygote = await self._idle.get()
+        if not zygote.alive():
+            zygote.close()
+            zygote = self._spawn()
+        loop = asyncio.get_running_loop()
+        try:
+            return await zygote.run_async(loop, code_path, stdin_fd, stdout_fd, stderr_fd, limits)
+        except ZygoteError:
+            # 프로토콜이 깨진 zygote 는 버리고 새로 띄운다
+            zygote.close()
+            zygote = self._spawn()
+            raise
+        except asyncio.CancelledError:
+            # 실행 중인 자식은 zygote 가 벽시계 제한으로 끊는다. 그 응답을 읽어 버린 뒤 풀에 돌려준다
+            task = asyncio.ensure_future(self._drain(zygote, loop))
+            self._draining.add(task)
+            task.add_done_callback(self._draining.discard)
+            zygote = None
+            raise
+        finally:
+            if zygote is not None:
+                self._idle.put_nowait(zygote)
+
+    async def _drain(self, zygote: Zygote, loop):
+        if not await zygote.drain_async(loop):
+            zygote.close()
+            zygote = self._spawn()
+        self._idle.put_nowait(zygote)
+
+
+# 표준 라이브러리를 미리 import 한 인터프리터 풀. 띄울 수 없으면 prlimit + python3 경로로 동작
+USE_ZYGOTE = os.getenv("JUDGE_USE_ZYGOTE", "1") == "1"
+
+zygote_pool = None
+if USE_ZYGOTE:
+    try:
+        zygote_pool = AsyncZygotePool(MAX_PARALLEL_TESTS)
+    except Exception as e:
+        print(f"zygote pool disabled: {e}")
+
+# cgroup v2 를 쓸 수 있으면 테스트케이스마다 임시 cgroup 으로 메모리 제한/측정
+USE_CGROUP = os.getenv("JUDGE_USE_CGROUP", "1") == "1"
+cgroup_enabled = USE_CGROUP and cgroup.setup()
+# 사용자 프로그램 메모리 측정 도우미를 첫 요청 전에 만들어 둔다 (memwatch.py)
+memwatch.helper_path()
+
+async def wait_for_exit(pid: int, timeout_s: float, cpu_limit_ms: int = None):
+    """
+    zygote.wait_with_deadline 의 이벤트 루프 버전: pidfd 가 읽을 수 있게 되면(자식 종료) 깨어난다.
+    (status, rusage, timed_out). 시간 초과(벽시계 또는 CPU 시간)나 취소면 프로세스 그룹 전체를 죽이고 거둔다
+    """
+    deadline = time.monotonic() + timeout_s
+    try:
+        pidfd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        # pidfd 를 지원하지 않는 커널
+        return await asyncio.to_thread(wait_with_deadline, pid, timeout_s, cpu_limit_ms)
+
+    loop = asyncio.get_running_loop()
+    exited = asyncio.Event()
+    loop.add_reader(pidfd, exited.set)
+    timed_out = False
+    try:
+        while not exited.is_set():
+            wait_s = next_wait_s(pid, deadline, cpu_limit_ms)
+            if wait_s is None:
+                timed_out = True
+                kill_group(pid)
+                await exited.wait()
+                break
+            try:
+                await asyncio.wait_for(exited.wait(), wait_s)
+            except asyncio.TimeoutError:
+                pass
+    except asyncio.CancelledError:
+        kill_group(pid)
+        os.wait4(pid, 0)  # SIGKILL 을 보냈으므로 곧 끝난다
+        raise
+    finally:
+        loop.remove_reader(pidfd)
+        os.close(pidfd)
+
+    _, status, usage = os.wait4(pid, 0)
+    return status, usage, timed_out
+
+async def _run_with_zygote(code_path: str, input_path: str, out_path: str, err_path: str, limits: dict,
+                           cg: str = None) -> dict:
+    if cg:
+        limits = {**limits, "address_space_bytes": None, "cgroup_procs": cgroup.procs_file(cg)}
+
+    with open(input_path, "rb") as fin, open(out_path, "wb") as fout, open(err_path, "wb") as ferr:
+        info = await zygote_pool.run(code_path, fin.fileno(), fout.fileno(), ferr.fileno(), limits)
+
+    return {
+        "returncode": info["returncode"],
+        "cpu_ms": info["cpu_ms"],
+        "wall_ms": info["wall_ms"],
+        "memory_kb": info["memory_kb"],
+        "timed_out": info["timed_out"],
+    }
+
+async def _run_with_subprocess(command: list, work_dir: str, input_path: str, out_path: str, err_path: str,
+                               limits: dict, cg: str = None) -> dict:
+    """prlimit 아래에서 command 를 새로 띄우고 종료 알림을 기다린다 (app.py 의 _run_with_subprocess 참고)"""
+    cmd = judging.sandbox_command(command, limits, cg)
+
+    start = time.perf_counter()
+    with open(input_path, "rb") as fin, open(out_path, "wb") as fout, open(err_path, "wb") as ferr:
+        proc = subprocess.Popen(
+            cmd,
+            cwd=work_dir,
+            stdin=fin,
+            stdout=fout,
+            stderr=ferr,
+            start_new_session=True
+        )
+    try:
+        status, usage, timed_out = await wait_for_exit(proc.pid, limits["wall_limit_ms"] / 1000, limits["cpu_limit_ms"])
+    except asyncio.CancelledError:
+        # 이미 wait4 로 거뒀으므로 Popen 이 다시 기다리지 않게 한다
+        proc.returncode = -9
+        raise
+    wall_ms = int((time.perf_counter() - start) * 1000)
+    proc.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+
+    return {
+        "returncode": proc.returncode,
+        "cpu_ms": int((usage.ru_utime + usage.ru_stime) * 1000),
+        "wall_ms": wall_ms,
+        "memory_kb": int(usage.ru_maxrss),
+        "timed_out": timed_out,
+    }
+
+async def run_single_test(code: str, case: dict, time_limit_ms: int = judging.DEFAULT_TIME_LIMIT_MS,
+                          output_limit_kb: int = judging.DEFAULT_OUTPUT_LIMIT_KB, checker_spec: dict = None,
+                          binary: str = None):
+    """app.run_single_test 와 같은 결과를 돌려준다"""
+    temp_dir = tempfile.mkdtemp()
+    code_path = os.path.join(temp_dir, "main.py")
+    out_path = os.path.join(temp_dir, "stdout.txt")
+    err_path = os.path.join(temp_dir, "stderr.txt")
+    report_path = os.path.join(temp_dir, memwatch.REPORT_NAME)
+    limits = judging.sandbox_limits(time_limit_ms, output_limit_kb, native=binary is not None)
+    checker_spec = checker_spec or {"mode": "exact"}
+    cg = None
+
+    if binary is None:
+        with open(code_path, "w", encoding="utf-8") as f:
+            f.write(code)
+
+    try:
+        if cgroup_enabled:
+            cg = cgroup.create(limits["memory_limit_bytes"])
+
+        io_paths = (case["input_path"], out_path, err_path)
+        sandbox_started = time.perf_counter()
+        backend = "subprocess"
+        # zygote 밖에서 exec 하는 프로그램 (컴파일된 실행 파일, 또는 zygote 를 쓸 수 없을 때 python3).
+        # cgroup 이 없으면 메모리 제한을 넘는 순간 도우미가 끊는다
+        command = memwatch.wrap([binary] if binary is not None else ["python3", code_path], report_path,
+                                0 if cg else judging.MEMORY_LIMIT_MB * 1024, limits["cpu_limit_ms"])
+        if binary is not None:
+            backend = "native"
+            try:
+                if zygote_pool is None:
+                    raise ZygoteError("zygote pool disabled")
+                run = await _run_with_zygote(None, *io_paths, {**limits, "argv": command, "cwd": temp_dir}, cg)
+            except ZygoteError:
+                run = await _run_with_subprocess(command, temp_dir, *io_paths, limits, cg)
+        elif zygote_pool is not None:
+            try:
+                run = await _run_with_zygote(code_path, *io_paths, limits, cg)
+                backend = "zygote"
+            except ZygoteError:
+                run = await _run_with_subprocess(command, temp_dir, *io_paths, limits, cg)
+        else:
+            run = await _run_with_subprocess(command, temp_dir, *io_paths, limits, cg)
+        sandbox_s = time.perf_counter() - sandbox_started
+        SANDBOX_OVERHEAD.observe(max(0.0, sandbox_s - run["wall_ms"] / 1000), backend=backend)
+        if backend != "zygote":
+            # exec 한 프로그램의 ru_maxrss 에는 fork 한 judge/zygote 의 RSS 가 남으므로 도우미가 잰 값을 쓴다 (없으면 None)
+            run["memory_kb"] = memwatch.read_report(report_path)
+
+        if cg:
+            run.update(cgroup.read_stats(cg))
+
+        # 출력 비교(사용자 정의 체커 포함)는 오래 걸릴 수 있으므로 스레드에서
+        return await asyncio.to_thread(
+            judging.decide_verdict, run, case, temp_dir, out_path, err_path,
+            time_limit_ms, output_limit_kb, checker_spec, binary is not None,
+        )
+
+    except Exception as e:
+        return judging.internal_error(case, e)
+
+    finally:
+        if cg:
+            cgroup.remove(cg)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _profile_case(code: str, case: dict, time_limit_ms: int, output_limit_kb: int) -> dict:
+    temp_dir = tempfile.mkdtemp(prefix="profile-")
+    try:
+        code_path = os.path.join(temp_dir, "main.py")
+        with open(code_path, "w", encoding="utf-8") as f:
+            f.write(code)
+        return profiler.profile(code_path, case["input_path"], time_limit_ms,
+                                judging.sandbox_limits(time_limit_ms, output_limit_kb))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+async def iter_judge_results(code: str, cases: list, time_limit_ms: int, output_limit_kb: int,
+                             checker_spec: dict, cleanup_dir: str = None, stats_key: tuple = None,
+                             fail_fast: bool = False, language: str = "python", profile: bool = False,
+                             priority: str = DEFAULT_PRIORITY, user: str = None):
+    """app.iter_judge_results 와 같다. 테스트케이스마다 태스크를 만들고 sandbox_slots 로 동시 실행 수를 제한한다"""
+    binary = None
+    if languages.is_compiled(language):
+        compile_started = time.perf_counter()
+        try:
+            binary, hit = await asyncio.to_thread(languages.compile_binary, language, code)
+        except languages.CompileError as e:
+            if cleanup_dir:
+                shutil.rmtree(cleanup_dir, ignore_errors=True)
+            VERDICTS.inc(result="CE")
+            yield judging.compile_error(str(e))
+            return
+        COMPILE_TIME.observe(time.perf_counter() - compile_started, language=language, cached=str(hit).lower())
+
+    async def run_queued(submitted_at: float, case: dict):
+        async with sandbox_slots.slot(priority, user):
+            QUEUE_WAIT.observe(time.perf_counter() - submitted_at, stage="sandbox_slot", priority=priority)
+            result = await run_single_test(code, case, time_limit_ms, output_limit_kb, checker_spec, binary)
+            if profile:
+                result["profile"] = await asyncio.to_thread(_profile_case, code, case, time_limit_ms, output_limit_kb)
+            return result
+
+    tasks = []
+    for index in judging.execution_order(cases, stats_key, fail_fast):
+        _track_inflight(1)
+        task = asyncio.ensure_future(run_queued(time.perf_counter(), cases[index]))
+        task.add_done_callback(lambda _: _track_inflight(-1))
+        tasks.append((index, task))
+
+    try:
+        for index, task in tasks:
+            r = {"index": index, **(await task)}
+            judging.record_result(r, cases, stats_key)
+            yield r
+            if judging.stops_judging(r, fail_fast):
+                break
+    finally:
+        # 아직 끝나지 않은 테스트케이스는 취소 (실행 중인 샌드박스는 죽인다).
+        # 스트리밍 중 클라이언트가 끊긴 경우도 여기로 온다
+        for _, pending in tasks:
+            pending.cancel()
+        if cleanup_dir:
+            shutil.rmtree(cleanup_dir, ignore_errors=True)
+
+async def _iter_list(results: list):
+    for r in results:
+        yield r
+
+async def _record_verdict(results_iter, key: str):
+    """결과를 그대로 흘려보내면서 모아 두었다가, 끝까지 채점되면 verdict_cache 에 저장"""
+    results = []
+    try:
+        async for r in results_iter:
+            results.append(r)
+            yield r
+    finally:
+        await results_iter.aclose()
+    if judging.cacheable(results):
+        verdict_cache.put(key, results)
+
+async def _stream_judge(results_iter, total: int, cached: bool, release, started: float, echo: bool):
+    """NDJSON 스트림. 끝나거나 클라이언트가 끊기면 슬롯을 반환하고 지연 시간을 기록한다"""
+    results = []
+    try:
+        async for r in results_iter:
+            results.append(r)
+            yield json.dumps({"type": "case", **judging.response_result(r, echo)}) + "\n"
+        yield json.dumps(judging.stream_summary(results, total, cached)) + "\n"
+    finally:
+        await results_iter.aclose()
+        if release:
+            await release()
+        REQUEST_LATENCY.observe(time.perf_counter() - started, mode="stream", status="200")
+
+def _json_response(body: dict, started: float, status: int = 200, headers: dict = None):
+    REQUEST_LATENCY.observe(time.perf_counter() - started, mode="json", status=str(status))
+    return JSONResponse(body, status_code=status, headers=headers)
+
+@app.post("/judge")
+async def judge_code(request: Request):
+    started = time.perf_counter()
+    try:
+        data = await request.json()
+    except ValueError:
+        return _json_response({"error": "invalid json"}, started, 400)
+    try:
+        req = judging.parse_request(data)
+        cases, stats_key = await asyncio.to_thread(judging.load_testset, req)
+    except RequestError as e:
+        return _json_response(e.body, started, e.status)
+    code = req["code"]
+    profile = req["profile"]
+
+    total = len(cases) if cases is not None else len(req["testcases"])
+    cached = False
+    release = None
+
+    rejection = judging.rejection_reason(code, req["language"])
+    if rejection:
+        results_iter = _iter_list(judging.rejected(rejection))
+    else:
+        verdict_key = judging.verdict_key(req)
+        cached_results = verdict_cache.get(verdict_key) if req["cache"] else None
+
+        if cached_results is not None:
+            cached = True
+            results_iter = _iter_list([{**r, "cached": True} for r in cached_results])
+        else:
+            wait_started = time.perf_counter()
+            try:
+                admitted_at = await admission.acquire(req["priority"], req["user"])
+            except Busy as e:
+                body, headers = judging.busy_body(e)
+                return _json_response(body, started, 429, headers)
+            finally:
+                QUEUE_WAIT.observe(time.perf_counter() - wait_started, stage="admission", priority=req["priority"])
+            release = lambda: admission.release(admitted_at, req["priority"])
+
+            cleanup_dir = None
+            if cases is None:
+                cleanup_dir = tempfile.mkdtemp(prefix="cases-")
+                cases = await asyncio.to_thread(testset_cache.write_cases, cleanup_dir, req["testcases"])
+            results_iter = iter_judge_results(code, cases, req["time_limit_ms"], req["output_limit_kb"],
+                                              req["checker_spec"], cleanup_dir=cleanup_dir, stats_key=stats_key,
+                                              fail_fast=req["fail_fast"], language=req["language"], profile=profile,
+                                              priority=req["priority"], user=req["user"])
+            if req["cache"]:
+                results_iter = _record_verdict(results_iter, verdict_key)
+
+    if req["stream"]:
+        return StreamingResponse(_stream_judge(results_iter, total, cached, release, started, req["echo"]),
+                                 media_type="application/x-ndjson")
+
+    try:
+        summary = judging.summarize_results([r async for r in results_iter], total, req["echo"])
+    finally:
+        await results_iter.aclose()
+        if release:
+            await release()
+    if cached:
+        summary["cached"] = True
+    return _json_response(summary, started)
+
+@app.get("/health")
+async def health():
+    """게이트웨이 로드밸런서용 상태/부하 정보"""
+    return {
+        "status": "ok",
+        "slots": MAX_PARALLEL_TESTS,
+        "inflight": _inflight_tests,
+        "active_requests": admission.active,
+        "queued_requests": admission.queued,
+        "queued_by_priority": admission.queued_by_priority(),
+        "max_queued_requests": MAX_QUEUED_REQUESTS,
+        "languages": languages.available(),
+    }
+
+metrics.Gauge("judge_sandbox_slots", "Configured sandbox slots", lambda: MAX_PARALLEL_TESTS)
+metrics.Gauge("judge_inflight_testcases", "Testcases running or waiting for a sandbox slot", lambda: _inflight_tests)
+metrics.Gauge("judge_active_requests", "Admitted /judge requests", lambda: admission.active)
+metrics.Gauge("judge_queued_requests", "/judge requests waiting for admission", lambda: admission.queued)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
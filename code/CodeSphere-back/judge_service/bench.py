@@ -0,0 +1,311 @@
+"""
+채점 서버 성능 측정 (실행 중인 채점 서버에 HTTP 로 요청).
+
+  python3 bench.py [--url http://127.0.0.1:7040] [--concurrency 1,4,16] [--requests 48] [--out result.json]
+
+측정 항목
+  overhead   : 테스트케이스 하나당 고정 비용 (아무것도 안 하는 코드를 케이스 1개/N개로 돌린 차이)
+               + /metrics 의 judge_sandbox_overhead_seconds 변화량
+  workloads  : 제출 종류별 /judge 지연 시간 p50/p99 (순차 요청)
+  throughput : 동시 클라이언트 수별 초당 채점 수와 p50/p99
+
+결과는 JSON 파일로 저장하고(커밋 해시 포함), --compare 로 이전 결과와 나란히 볼 수 있다.
+같은 코드는 채점 결과 캐시에 걸리므로 요청마다 코드 끝에 다른 주석을 붙인다.
+"""
+import argparse
+import json
+import math
+import statistics
+import subprocess
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import requests
+
+from testset_cache import testset_hash
+
+# 다른 문제와 겹치지 않도록 큰 번호를 쓴다
+BENCH_PROBLEM_ID_BASE = 900000
+
+
+def _lines(n: int) -> str:
+    return "\n".join(str(i) for i in range(n))
+
+
+CORPUS = [
+    {
+        "name": "trivial",
+        "code": "print(input())",
+        "testcases": [{"input": f"{i}\n", "output": str(i)} for i in range(5)],
+        "expect": "PASS",
+    },
+    {
+        "name": "cpu_heavy",
+        "code": "n = int(input())\ns = 0\nfor i in range(n):\n    s += i * i % 7\nprint(s)",
+        "testcases": [{"input": "1000000\n", "output": str(sum(i * i % 7 for i in range(1000000)))}] * 3,
+        "expect": "PASS",
+    },
+    {
+        "name": "memory_heavy",
+        "code": "n = int(input())\na = list(range(n))\nb = [x * 2 for x in a]\nprint(len(b))",
+        "testcases": [{"input": "800000\n", "output": "800000"}] * 3,
+        "expect": "PASS",
+    },
+    {
+        "name": "tle",
+        "code": "while True:\n    pass",
+        "testcases": [{"input": "", "output": ""}] * 2,
+        "time_limit_ms": 500,
+        "expect": "TLE",
+    },
+    {
+        "name": "large_output",
+        "code": "n = int(input())\nprint('\\n'.join(str(i) for i in range(n)))",
+        "testcases": [{"input": "200000\n", "output": _lines(200000)}] * 2,
+        "expect": "PASS",
+    },
+    {
+        "name": "large_input",
+        "code": "import sys\nprint(sum(map(int, sys.stdin.read().split())))",
+        "testcases": [{"input": _lines(200000), "output": str(sum(range(200000)))}] * 2,
+        "expect": "PASS",
+    },
+]
+
+for _i, _w in enumerate(CORPUS):
+    _w["testset"] = {"problem_id": BENCH_PROBLEM_ID_BASE + _i, "hash": testset_hash(_w["testcases"])}
+
+
+def percentile(values: list, p: float) -> float:
+    """nearest-rank 백분위"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _summary(latencies_ms: list) -> dict:
+    return {
+        "count": len(latencies_ms),
+        "mean_ms": round(statistics.fmean(latencies_ms), 2) if latencies_ms else None,
+        "p50_ms": round(percentile(latencies_ms, 50), 2) if latencies_ms else None,
+        "p99_ms": round(percentile(latencies_ms, 99), 2) if latencies_ms else None,
+    }
+
+
+def _final_result(results: list) -> str:
+    for verdict in ("CE", "RTE", "TLE", "MLE", "OLE", "FAIL"):
+        if any(r["result"] == verdict for r in results):
+            return verdict
+    return "PASS"
+
+
+class Client:
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.session = requests.Session()
+
+    def judge(self, workload: dict, testcases: list = None) -> tuple:
+        """(지연 ms, 최종 판정, 429 재시도 횟수). 캐시 적중을 피하려고 코드마다 고유 주석을 붙인다"""
+        payload = {
+            "code": f"{workload['code']}\n# bench {uuid.uuid4().hex}",
+            "time_limit_ms": workload.get("time_limit_ms"),
+        }
+        # testcases 를 직접 넘기면 인라인으로, 아니면 게이트웨이처럼 테스트셋 참조로 보낸다
+        if testcases is not None:
+            payload["testcases"] = testcases
+        else:
+            payload["testset"] = workload["testset"]
+
+        busy = 0
+        started = time.perf_counter()
+        while True:
+            res = self.session.post(f"{self.url}/judge", json=payload, timeout=300)
+            if res.status_code == 409:
+                payload["testcases"] = workload["testcases"]
+                continue
+            if res.status_code == 429:
+                busy += 1
+                time.sleep(float(res.headers.get("Retry-After", 1)))
+                continue
+            res.raise_for_status()
+            break
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        return elapsed_ms, _final_result(res.json()["results"]), busy
+
+    def health(self) -> dict:
+        return self.session.get(f"{self.url}/health", timeout=5).json()
+
+    def metric_sum_count(self, name: str) -> tuple:
+        """/metrics 에서 histogram 의 _sum/_count 합계 (라벨 무시). 없으면 None"""
+        try:
+            res = self.session.get(f"{self.url}/metrics", timeout=5)
+            res.raise_for_status()
+        except requests.RequestException:
+            return None
+        total, count = 0.0, 0
+        for line in res.text.splitlines():
+            if line.startswith(f"{name}_sum"):
+                total += float(line.rsplit(" ", 1)[1])
+            elif line.startswith(f"{name}_count"):
+                count += int(float(line.rsplit(" ", 1)[1]))
+        return total, count
+
+
+def bench_overhead(client: Client, repeat: int) -> dict:
+    cases = 20
+    code = {"code": "pass"}
+    one = [{"input": "", "output": ""}]
+    many = one * cases
+
+    before = client.metric_sum_count("judge_sandbox_overhead_seconds")
+    t_one = [client.judge(code, one)[0] for _ in range(repeat)]
+    t_many = [client.judge(code, many)[0] for _ in range(repeat)]
+    after = client.metric_sum_count("judge_sandbox_overhead_seconds")
+
+    result = {
+        "single_case_p50_ms": round(statistics.median(t_one), 2),
+        f"{cases}_cases_p50_ms": round(statistics.median(t_many), 2),
+        # 병렬 슬롯이 여러 개면 실제 비용보다 작게 나온다 (/health 의 slots 참고)
+        "per_case_ms": round((statistics.median(t_many) - statistics.median(t_one)) / (cases - 1), 2),
+    }
+    if before and after and after[1] > before[1]:
+        result["sandbox_overhead_ms"] = round((after[0] - before[0]) / (after[1] - before[1]) * 1000, 2)
+    return result
+
+
+def bench_workloads(client: Client, repeat: int) -> dict:
+    results = {}
+    for workload in CORPUS:
+        client.judge(workload)  # 테스트셋 캐시 준비 (409 재전송 비용은 측정에서 뺀다)
+        latencies, verdicts = [], set()
+        for _ in range(repeat):
+            elapsed_ms, verdict, _ = client.judge(workload)
+            latencies.append(elapsed_ms)
+            verdicts.add(verdict)
+        results[workload["name"]] = {
+            **_summary(latencies),
+            "verdicts": sorted(verdicts),
+            "verdict_ok": verdicts == {workload["expect"]},
+        }
+        print(f"  {workload['name']:<14} p50 {results[workload['name']]['p50_ms']:>9} ms   "
+              f"p99 {results[workload['name']]['p99_ms']:>9} ms   {sorted(verdicts)}")
+    return results
+
+
+def bench_throughput(url: str, concurrency: int, total_requests: int) -> dict:
+    """CORPUS 를 섞어서 total_requests 개를 concurrency 개 클라이언트가 나눠 보낸다"""
+    latencies, errors = [], []
+    busy = [0]
+    lock = threading.Lock()
+    next_index = [0]
+
+    def worker():
+        client = Client(url)
+        while True:
+            with lock:
+                index = next_index[0]
+                next_index[0] += 1
+            if index >= total_requests:
+                return
+            try:
+                elapsed_ms, _, retries = client.judge(CORPUS[index % len(CORPUS)])
+                with lock:
+                    latencies.append(elapsed_ms)
+                    busy[0] += retries
+            except requests.RequestException as e:
+                with lock:
+                    errors.append(str(e))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed_s = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed_s, 3),
+        "submissions_per_sec": round(len(latencies) / elapsed_s, 3),
+        **_summary(latencies),
+        "busy_retries": busy[0],
+        "errors": len(errors),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path: str, new: dict):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    print(f"\n비교: {old.get('commit')} -> {new.get('commit')}")
+    for name, stats in new["workloads"].items():
+        before = old.get("workloads", {}).get(name)
+        if before:
+            print(f"  {name:<14} p50 {before['p50_ms']:>9} -> {stats['p50_ms']:>9} ms   "
+                  f"p99 {before['p99_ms']:>9} -> {stats['p99_ms']:>9} ms")
+    old_tp = {r["concurrency"]: r for r in old.get("throughput", [])}
+    for row in new["throughput"]:
+        before = old_tp.get(row["concurrency"])
+        if before:
+            print(f"  x{row['concurrency']:<13} {before['submissions_per_sec']:>9} -> "
+                  f"{row['submissions_per_sec']:>9} /s")
+    if "per_case_ms" in old.get("overhead", {}):
+        print(f"  per_case       {old['overhead']['per_case_ms']:>9} -> {new['overhead']['per_case_ms']:>9} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="채점 서버 성능 측정")
+    parser.add_argument("--url", default="http://127.0.0.1:7040")
+    parser.add_argument("--concurrency", default="1,4,16", help="동시 클라이언트 수 (쉼표 구분)")
+    parser.add_argument("--requests", type=int, default=48, help="동시성 단계마다 보낼 요청 수")
+    parser.add_argument("--repeat", type=int, default=10, help="순차 측정 반복 횟수")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본값: bench-<commit>.json)")
+    parser.add_argument("--compare", help="이전 결과 JSON 과 비교해서 출력")
+    args = parser.parse_args()
+
+    client = Client(args.url)
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "url": args.url,
+        "judge": client.health(),
+    }
+
+    print("overhead")
+    report["overhead"] = bench_overhead(client, args.repeat)
+    print(f"  {report['overhead']}")
+
+    print("workloads")
+    report["workloads"] = bench_workloads(client, args.repeat)
+
+    print("throughput")
+    report["throughput"] = []
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        row = bench_throughput(args.url, concurrency, args.requests)
+        report["throughput"].append(row)
+        print(f"  x{concurrency:<3} {row['submissions_per_sec']:>8} /s   p50 {row['p50_ms']} ms   "
+              f"p99 {row['p99_ms']} ms   429 {row['busy_retries']}   errors {row['errors']}")
+
+    out = args.out or f"bench-{commit or 'local'}.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n결과 저장: {out}")
+
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
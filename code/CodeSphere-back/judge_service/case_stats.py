@@ -0,0 +1,87 @@
+"""
+테스트셋별 테스트케이스 통계 (실행 횟수, 실패 횟수, 누적 실행 시간).
+
+fail-fast 채점에서 "자주 틀리고 빨리 끝나는" 케이스부터 실행하는 순서를 정하는 데 쓴다.
+testset_cache 와 같은 JUDGE_CACHE_DIR 아래에 주기적으로 저장해서 재시작해도 유지된다.
+  JUDGE_CACHE_DIR/stats/<problem_id>/<sha256>.json
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+from testset_cache import CACHE_DIR
+
+STATS_DIR = os.path.join(CACHE_DIR, "stats")
+# 디스크에 쓰는 최소 간격 (테스트셋별)
+SAVE_INTERVAL_SEC = 5.0
+
+_stats = {}  # (problem_id, digest) -> {"runs": [...], "fails": [...], "total_ms": [...], "saved": monotonic}
+_lock = threading.Lock()
+
+
+def _path(problem_id: int, digest: str) -> str:
+    return os.path.join(STATS_DIR, str(int(problem_id)), f"{digest}.json")
+
+
+def _entry(problem_id: int, digest: str, count: int) -> dict:
+    key = (problem_id, digest)
+    entry = _stats.get(key)
+    if entry is None:
+        entry = {"runs": [0] * count, "fails": [0] * count, "total_ms": [0] * count, "saved": 0.0}
+        try:
+            with open(_path(problem_id, digest), "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if len(saved["runs"]) == count:
+                entry.update(runs=saved["runs"], fails=saved["fails"], total_ms=saved["total_ms"])
+        except (OSError, ValueError, KeyError):
+            pass
+        _stats[key] = entry
+    return entry
+
+
+def _save(problem_id: int, digest: str, entry: dict):
+    path = _path(problem_id, digest)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({k: entry[k] for k in ("runs", "fails", "total_ms")}, f)
+    os.replace(tmp_path, path)
+
+
+def record(problem_id: int, digest: str, count: int, index: int, passed: bool, runtime_ms: int):
+    with _lock:
+        entry = _entry(problem_id, digest, count)
+        entry["runs"][index] += 1
+        entry["total_ms"][index] += runtime_ms
+        if not passed:
+            entry["fails"][index] += 1
+
+        now = time.monotonic()
+        if now - entry["saved"] < SAVE_INTERVAL_SEC:
+            return
+        entry["saved"] = now
+        snapshot = {k: list(entry[k]) for k in ("runs", "fails", "total_ms")}
+    try:
+        _save(problem_id, digest, snapshot)
+    except OSError:
+        pass
+
+
+def fail_fast_order(problem_id: int, digest: str, count: int) -> list:
+    """
+    실행 순서 (원래 인덱스 리스트).
+    실패율 / 평균 실행 시간이 큰 케이스부터. 기록이 적은 케이스는 평균값 쪽으로 보정 (+1/+2)하고,
+    점수가 같으면 원래 순서를 유지한다.
+    """
+    with _lock:
+        entry = _entry(problem_id, digest, count)
+        runs, fails, total_ms = list(entry["runs"]), list(entry["fails"]), list(entry["total_ms"])
+
+    def priority(i: int) -> float:
+        fail_rate = (fails[i] + 1) / (runs[i] + 2)
+        avg_ms = total_ms[i] / runs[i] if runs[i] else 0
+        return fail_rate / (avg_ms + 10)
+
+    return sorted(range(count), key=lambda i: -priority(i))
@@ -0,0 +1,122 @@
+"""
+cgroup v2 기반 샌드박스 리소스 측정/제한.
+
+테스트케이스마다 JUDGE_CGROUP_ROOT 아래에 임시 cgroup 을 만들고 자식 프로세스를 넣는다.
+- 메모리 제한: memory.max (prlimit --as 대신)
+- 메모리 측정: 종료 후 memory.peak (폴링 없이 정확한 최대값)
+- CPU 측정: 종료 후 cpu.stat 의 usage_usec
+
+JUDGE_CGROUP_ROOT 는 judge 프로세스가 쓸 수 있는 cgroup v2 디렉터리여야 한다
+(예: systemd 유닛에 Delegate=yes). memory.peak 가 없는 커널(5.19 미만)이나
+쓰기 권한이 없으면 setup() 이 False 를 돌려주고 기존 측정 방식을 그대로 쓴다.
+"""
+import os
+import signal
+import time
+import uuid
+
+CGROUP_MOUNT = "/sys/fs/cgroup"
+CGROUP_ROOT = os.getenv("JUDGE_CGROUP_ROOT", os.path.join(CGROUP_MOUNT, "codesphere-judge"))
+
+
+def _write(path: str, value: str):
+    with open(path, "w") as f:
+        f.write(value)
+
+
+def _read(path: str) -> str:
+    with open(path, "r") as f:
+        return f.read()
+
+
+def setup() -> bool:
+    """judge 용 cgroup 루트를 준비한다. 사용할 수 없으면 False."""
+    if not os.path.exists(os.path.join(CGROUP_MOUNT, "cgroup.controllers")):
+        return False  # cgroup v2 (unified) 가 아님
+    try:
+        os.makedirs(CGROUP_ROOT, exist_ok=True)
+        controllers = _read(os.path.join(CGROUP_ROOT, "cgroup.controllers")).split()
+        if "memory" not in controllers or "cpu" not in controllers:
+            return False
+        _write(os.path.join(CGROUP_ROOT, "cgroup.subtree_control"), "+memory +cpu")
+
+        # memory.peak 지원 여부를 실제 cgroup 하나로 확인
+        probe = create(None)
+        try:
+            return os.path.exists(os.path.join(probe, "memory.peak"))
+        finally:
+            remove(probe)
+    except OSError:
+        return False
+
+
+def create(memory_limit_bytes) -> str:
+    path = os.path.join(CGROUP_ROOT, f"t-{uuid.uuid4().hex}")
+    os.mkdir(path)
+    if memory_limit_bytes:
+        _write(os.path.join(path, "memory.max"), str(memory_limit_bytes))
+        try:
+            _write(os.path.join(path, "memory.swap.max"), "0")
+        except OSError:
+            pass  # swap 컨트롤러가 없는 환경
+    return path
+
+
+def procs_file(path: str) -> str:
+    return os.path.join(path, "cgroup.procs")
+
+
+def read_stats(path: str) -> dict:
+    peak_bytes = int(_read(os.path.join(path, "memory.peak")).strip())
+
+    cpu_usec = 0
+    for line in _read(os.path.join(path, "cpu.stat")).splitlines():
+        key, _, value = line.partition(" ")
+        if key == "usage_usec":
+            cpu_usec = int(value)
+            break
+
+    oom_kills = 0
+    try:
+        for line in _read(os.path.join(path, "memory.events")).splitlines():
+            key, _, value = line.partition(" ")
+            if key == "oom_kill":
+                oom_kills = int(value)
+                break
+    except OSError:
+        pass
+
+    return {
+        "memory_kb": peak_bytes // 1024,
+        "cpu_ms": cpu_usec // 1000,
+        "oom_killed": oom_kills > 0,
+    }
+
+
+def kill_all(path: str):
+    try:
+        _write(os.path.join(path, "cgroup.kill"), "1")  # 5.14+
+        return
+    except OSError:
+        pass
+    try:
+        for pid in _read(procs_file(path)).split():
+            try:
+                os.kill(int(pid), signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+    except OSError:
+        pass
+
+
+def remove(path: str):
+    """남은 프로세스를 정리하고 cgroup 을 지운다. 프로세스가 빠져나가는 동안 잠깐 재시도."""
+    for _ in range(50):
+        try:
+            os.rmdir(path)
+            return
+        except FileNotFoundError:
+            return
+        except OSError:
+            kill_all(path)
+            time.sleep(0.01)
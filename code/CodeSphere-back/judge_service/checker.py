@@ -0,0 +1,275 @@
+"""
+사용자 출력과 정답 비교.
+
+두 파일을 CHUNK_SIZE 씩 읽으면서 비교하므로 출력이 커도 메모리 사용량이 일정하다.
+문제마다 비교 방식(checker)을 고를 수 있다.
+  "exact"  : 앞뒤 공백만 무시하고 그대로 비교 (기본값)
+  "token"  : 공백 문자로 나눈 토큰 단위 비교 (줄바꿈/공백 개수 무시)
+  {"mode": "float", "abs_tol": 1e-6, "rel_tol": 1e-6} : 토큰 비교 + 실수는 오차 허용
+  {"mode": "custom", "code": "..."} : 출제자가 작성한 Python 채점 프로그램
+     python3 checker.py <input> <output> <expected> 로 실행, 종료 코드 0=PASS, 1/2=FAIL (예외로 죽으면 채점 오류)
+오답이면 first_difference 로 사용자 출력에서 처음 달라지는 위치(줄/열)를 알려준다 (커스텀 checker 제외).
+"""
+import math
+import os
+import re
+import subprocess
+from itertools import zip_longest
+
+CHUNK_SIZE = 64 * 1024
+_TOKEN = re.compile(rb"\S+")
+
+DEFAULT_FLOAT_TOL = 1e-6
+# 커스텀 checker 실행 제한 (출제자 코드지만 채점 서버를 붙잡지 않도록)
+CHECKER_TIME_LIMIT_S = int(os.getenv("JUDGE_CHECKER_TIME_LIMIT_S", 10))
+CHECKER_MEMORY_LIMIT_MB = int(os.getenv("JUDGE_CHECKER_MEMORY_LIMIT_MB", 256))
+
+
+class CheckerError(Exception):
+    """커스텀 checker 자체가 실패한 경우 (사용자 코드의 오답이 아님)"""
+    pass
+
+
+class _Reader:
+    """파일을 청크 단위로 읽으면서 현재 위치를 기억한다."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = b""
+        self.pos = 0
+        self.offset = 0  # buf[0] 의 파일 오프셋
+
+    def tell(self) -> int:
+        return self.offset + self.pos
+
+    def fill(self) -> bool:
+        # 남은 데이터가 없으면 다음 청크를 읽는다. EOF 면 False
+        if self.pos < len(self.buf):
+            return True
+        self.offset += len(self.buf)
+        self.buf = self.f.read(CHUNK_SIZE)
+        self.pos = 0
+        return bool(self.buf)
+
+    def skip_whitespace(self):
+        while self.fill():
+            rest = self.buf[self.pos:].lstrip()
+            self.pos = len(self.buf) - len(rest)
+            if rest:
+                return
+
+    def rest_is_whitespace(self) -> bool:
+        while self.fill():
+            if self.buf[self.pos:].strip():
+                return False
+            self.pos = len(self.buf)
+        return True
+
+
+def _exact_mismatch(output_path: str, expected_path: str):
+    """
+    앞뒤 공백을 무시하고 완전히 같은지 (output.strip() == expected.strip() 와 같은 판정).
+    앞 공백을 건너뛴 뒤 처음 달라지는 지점부터 양쪽 나머지가 모두 공백이면 같은 출력이다.
+    다르면 그 지점의 출력 파일 오프셋, 같으면 None
+    """
+    with open(output_path, "rb") as fo, open(expected_path, "rb") as fe:
+        out, exp = _Reader(fo), _Reader(fe)
+        out.skip_whitespace()
+        exp.skip_whitespace()
+
+        while out.fill() and exp.fill():
+            a = out.buf[out.pos:out.pos + len(exp.buf) - exp.pos]
+            b = exp.buf[exp.pos:exp.pos + len(a)]
+            if a != b:
+                i = 0
+                while a[i] == b[i]:
+                    i += 1
+                out.pos += i
+                exp.pos += i
+                break
+            out.pos += len(a)
+            exp.pos += len(a)
+
+        at = out.tell()
+        if out.rest_is_whitespace() and exp.rest_is_whitespace():
+            return None
+        return at
+
+
+def exact_match(output_path: str, expected_path: str) -> bool:
+    return _exact_mismatch(output_path, expected_path) is None
+
+
+def _tokens(f):
+    """공백 문자로 구분된 토큰을 하나씩. 청크 경계에서 잘린 토큰은 다음 청크와 이어 붙인다."""
+    pending = b""
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            if pending:
+                yield pending
+            return
+        parts = (pending + chunk).split()
+        pending = b"" if chunk[-1:].isspace() else parts.pop()
+        yield from parts
+
+
+def _token_offsets(f):
+    """_tokens 와 같지만 (파일 오프셋, 토큰) 으로. 오답 위치를 찾을 때만 쓴다"""
+    pending, pending_at, base = b"", 0, 0
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            if pending:
+                yield pending_at, pending
+            return
+        start = base - len(pending)  # pending + chunk 의 파일 오프셋
+        base += len(chunk)
+        matches = list(_TOKEN.finditer(pending + chunk))
+        pending = b""
+        if matches and not chunk[-1:].isspace():
+            last = matches.pop()
+            pending, pending_at = last.group(), start + last.start()
+        for m in matches:
+            yield start + m.start(), m.group()
+
+
+def _floats_close(a: bytes, b: bytes, abs_tol: float, rel_tol: float) -> bool:
+    try:
+        x, y = float(a), float(b)
+    except ValueError:
+        return False
+    if not (math.isfinite(x) and math.isfinite(y)):
+        return False
+    return abs(x - y) <= max(abs_tol, rel_tol * abs(y))
+
+
+def _same_token(a: bytes, b: bytes, abs_tol: float, rel_tol: float) -> bool:
+    if a == b:
+        return True
+    if a is None or b is None:
+        return False
+    use_float = abs_tol is not None or rel_tol is not None
+    return use_float and _floats_close(a, b, abs_tol or 0.0, rel_tol or 0.0)
+
+
+def token_match(output_path: str, expected_path: str, abs_tol: float = None, rel_tol: float = None) -> bool:
+    """토큰 단위 비교. abs_tol/rel_tol 이 있으면 서로 다른 토큰은 실수로 보고 오차 안이면 같다."""
+    with open(output_path, "rb") as fo, open(expected_path, "rb") as fe:
+        for a, b in zip_longest(_tokens(fo), _tokens(fe)):
+            if not _same_token(a, b, abs_tol, rel_tol):
+                return False
+    return True
+
+
+def _token_mismatch(output_path: str, expected_path: str, abs_tol: float = None, rel_tol: float = None):
+    """처음 다른 토큰의 출력 파일 오프셋 (출력이 모자라면 파일 끝). 같으면 None"""
+    with open(output_path, "rb") as fo, open(expected_path, "rb") as fe:
+        for out, b in zip_longest(_token_offsets(fo), _tokens(fe)):
+            at, a = out or (os.fstat(fo.fileno()).st_size, None)
+            if not _same_token(a, b, abs_tol, rel_tol):
+                return at
+    return None
+
+
+def _line_column(path: str, offset: int) -> dict:
+    """파일 오프셋 -> {"line", "column"} (1 부터, 열은 바이트 단위)"""
+    line, line_start, pos = 1, 0, 0
+    with open(path, "rb") as f:
+        while pos < offset:
+            chunk = f.read(min(CHUNK_SIZE, offset - pos))
+            if not chunk:
+                break
+            newlines = chunk.count(b"\n")
+            if newlines:
+                line += newlines
+                line_start = pos + chunk.rfind(b"\n") + 1
+            pos += len(chunk)
+    return {"line": line, "column": offset - line_start + 1}
+
+
+def custom_match(checker_code: str, work_dir: str, input_path: str, output_path: str, expected_path: str) -> bool:
+    checker_path = os.path.join(work_dir, "checker.py")
+    with open(checker_path, "w", encoding="utf-8") as f:
+        f.write(checker_code)
+
+    cmd = [
+        "prlimit",
+        f"--as={CHECKER_MEMORY_LIMIT_MB * 1024 * 1024}",
+        f"--cpu={CHECKER_TIME_LIMIT_S}",
+        "--",
+        "python3", checker_path, input_path, output_path, expected_path,
+    ]
+    try:
+        proc = subprocess.run(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=CHECKER_TIME_LIMIT_S * 2,
+        )
+    except subprocess.TimeoutExpired:
+        raise CheckerError("checker timed out")
+
+    stderr = proc.stderr.decode(errors="replace")
+    # 처리되지 않은 예외도 종료 코드 1 이므로 traceback 으로 구분한다
+    if "Traceback (most recent call last)" in stderr:
+        raise CheckerError(f"checker crashed: {stderr[-200:]}")
+    if proc.returncode == 0:
+        return True
+    if proc.returncode in (1, 2):
+        return False
+    raise CheckerError(f"checker exited with {proc.returncode}: {stderr[-200:]}")
+
+
+def parse_spec(spec) -> dict:
+    """요청의 checker 값을 {"mode": ...} 형태로 정리. 잘못된 값이면 ValueError."""
+    if spec is None:
+        return {"mode": "exact"}
+    if isinstance(spec, str):
+        spec = {"mode": spec}
+    if not isinstance(spec, dict):
+        raise ValueError("checker must be a string or an object")
+
+    mode = spec.get("mode", "exact")
+    if mode in ("exact", "token"):
+        return {"mode": mode}
+    if mode == "float":
+        abs_tol = float(spec.get("abs_tol", DEFAULT_FLOAT_TOL))
+        rel_tol = float(spec.get("rel_tol", DEFAULT_FLOAT_TOL))
+        if abs_tol < 0 or rel_tol < 0:
+            raise ValueError("tolerance must not be negative")
+        return {"mode": "float", "abs_tol": abs_tol, "rel_tol": rel_tol}
+    if mode == "custom":
+        code = spec.get("code")
+        if not isinstance(code, str) or not code.strip():
+            raise ValueError("custom checker requires code")
+        return {"mode": "custom", "code": code}
+    raise ValueError(f"unknown checker mode: {mode}")
+
+
+def compare(spec: dict, work_dir: str, input_path: str, output_path: str, expected_path: str) -> bool:
+    """parse_spec 으로 정리한 checker 로 출력이 정답인지 판정"""
+    mode = spec["mode"]
+    if mode == "exact":
+        return exact_match(output_path, expected_path)
+    if mode == "token":
+        return token_match(output_path, expected_path)
+    if mode == "float":
+        return token_match(output_path, expected_path, spec["abs_tol"], spec["rel_tol"])
+    return custom_match(spec["code"], work_dir, input_path, output_path, expected_path)
+
+
+def first_difference(spec: dict, output_path: str, expected_path: str):
+    """
+    오답 출력에서 정답과 처음 달라지는 위치 {"line", "column"} (사용자 출력 기준).
+    커스텀 checker 는 어디가 틀렸는지 알 수 없으므로 None
+    """
+    mode = spec["mode"]
+    if mode == "exact":
+        at = _exact_mismatch(output_path, expected_path)
+    elif mode in ("token", "float"):
+        at = _token_mismatch(output_path, expected_path, spec.get("abs_tol"), spec.get("rel_tol"))
+    else:
+        return None
+    return None if at is None else _line_column(output_path, at)
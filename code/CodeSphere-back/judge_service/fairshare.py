@@ -0,0 +1,138 @@
+"""
+채점 작업 스케줄링 (우선순위 클래스 + 사용자별 공정 분배).
+
+  interactive : 예제 실행 (/submissions/test). 사용자가 화면에서 기다리고 있다
+  submit      : 제출 채점
+  batch       : 재채점, 시간 제한 보정처럼 급하지 않은 작업 (남는 슬롯으로)
+
+대기 중인 작업은 높은 클래스부터 꺼내고, 같은 클래스 안에서는 사용자별로 돌아가며 하나씩 꺼낸다.
+한 사용자가 제출을 쏟아내도 다른 사용자는 자기 차례에 바로 실행된다.
+요청 입장(admission.py)과 테스트케이스 샌드박스 슬롯(FairExecutor / AsyncFairSlots)이 같은 순서를 쓴다.
+"""
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+
+PRIORITIES = ("interactive", "submit", "batch")
+DEFAULT_PRIORITY = "submit"
+
+
+class FairQueue:
+    """우선순위 클래스 순서로, 클래스 안에서는 사용자별 라운드 로빈으로 꺼내는 대기열 (락은 쓰는 쪽에서)"""
+
+    def __init__(self):
+        # 클래스 -> (사용자 -> 그 사용자의 대기 항목). OrderedDict 순서가 라운드 로빈 순서
+        self._classes = {priority: OrderedDict() for priority in PRIORITIES}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def count(self, priority: str) -> int:
+        return sum(len(items) for items in self._classes[priority].values())
+
+    def push(self, priority: str, user, item):
+        self._classes[priority].setdefault(user, deque()).append(item)
+        self._size += 1
+
+    def peek(self, allowed=None):
+        """다음에 꺼낼 항목. allowed(priority) 가 False 인 클래스는 건너뛴다"""
+        for priority, users in self._classes.items():
+            if users and (allowed is None or allowed(priority)):
+                return next(iter(users.values()))[0]
+        return None
+
+    def pop(self, allowed=None):
+        for priority, users in self._classes.items():
+            if users and (allowed is None or allowed(priority)):
+                user, items = next(iter(users.items()))
+                item = items.popleft()
+                # 꺼낸 사용자는 맨 뒤로 (남은 항목이 없으면 빠진다)
+                del users[user]
+                if items:
+                    users[user] = items
+                self._size -= 1
+                return item
+        return None
+
+    def discard(self, priority: str, user, item):
+        """기다리다 포기한 항목을 뺀다 (라운드 로빈 순서는 그대로)"""
+        items = self._classes[priority].get(user)
+        if items and item in items:
+            items.remove(item)
+            self._size -= 1
+            if not items:
+                del self._classes[priority][user]
+
+
+class FairExecutor:
+    """ThreadPoolExecutor 와 비슷하지만 대기 중인 작업을 FairQueue 순서로 실행한다"""
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "fair"):
+        self._queue = FairQueue()
+        self._cond = threading.Condition()
+        for i in range(max_workers):
+            threading.Thread(target=self._worker, name=f"{thread_name_prefix}_{i}", daemon=True).start()
+
+    def submit(self, priority: str, user, fn, *args) -> Future:
+        future = Future()
+        with self._cond:
+            self._queue.push(priority, user, (future, fn, args))
+            self._cond.notify()
+        return future
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                future, fn, args = self._queue.pop()
+            # 기다리는 동안 취소된 작업은 건너뛴다
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+class AsyncFairSlots:
+    """asyncio.Semaphore 와 비슷하지만 기다리는 태스크를 FairQueue 순서로 깨운다 (이벤트 루프 하나에서만)"""
+
+    def __init__(self, size: int):
+        self.free = size
+        self._queue = FairQueue()
+
+    async def acquire(self, priority: str, user):
+        if self.free > 0 and not self._queue:
+            self.free -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._queue.push(priority, user, waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 슬롯을 넘겨받은 직후에 취소됨: 다음 차례에 넘긴다
+                self.release()
+            else:
+                self._queue.discard(priority, user, waiter)
+            raise
+
+    def release(self):
+        while self._queue:
+            waiter = self._queue.pop()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.free += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: str, user):
+        await self.acquire(priority, user)
+        try:
+            yield
+        finally:
+            self.release()
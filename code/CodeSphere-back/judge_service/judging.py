@@ -0,0 +1,436 @@
+"""
+채점 서버 공통 로직 (웹 프레임워크/실행 방식과 무관한 부분).
+
+app.py (Flask + 스레드 풀) 와 async_app.py (asyncio) 가 같은 /judge 요청/응답 규약을 쓰도록
+요청 해석, 제한 값, 판정, 결과 요약, 지표를 여기서 함께 쓴다.
+"""
+import ast
+import hashlib
+import math
+import os
+import signal
+
+import case_stats
+import cgroup
+import checker
+import languages
+import memwatch
+import metrics
+import testset_cache
+import verdict_cache
+from fairshare import DEFAULT_PRIORITY, PRIORITIES
+from testset_cache import TestsetMismatch, TestsetMissing
+
+BANNED_NODES = {
+    #ast.Import: "import",
+    #ast.ImportFrom: "from ... import",
+    #ast.Call: "function call"
+}
+
+BANNED_KEYWORDS = ['eval', 'exec', 'os.', 'subprocess', 'open(', 'compile', 'globals', 'locals', 'sys.exit']
+
+MEMORY_LIMIT_MB = 128  # 제한할 메모리 (MB)
+# cgroup 이 없을 때 C/C++ 의 주소 공간(RLIMIT_AS) 상한 (MB). 제한과 같게 두면 할당이 거절된 프로그램이
+# NULL 역참조(SIGSEGV)나 std::bad_alloc(SIGABRT)으로 끝나서 RTE 가 되므로, 넉넉히 주고 memwatch 가 잰 최대 RSS 로 판정한다
+NATIVE_ADDRESS_SPACE_MB = int(os.getenv("JUDGE_NATIVE_ADDRESS_SPACE_MB", 1024))
+
+# 응답에 돌려주는 입력/정답/출력은 앞부분만 (대용량 테스트케이스를 응답에 통째로 싣지 않는다)
+ECHO_LIMIT_BYTES = int(os.getenv("JUDGE_ECHO_LIMIT_BYTES", 64 * 1024))
+# echo 를 요청하지 않은 응답(제출 채점 등)은 입력/정답 없이 출력 앞부분만 이만큼 (나머지는 해시로)
+COMPACT_PREVIEW_CHARS = int(os.getenv("JUDGE_COMPACT_PREVIEW_CHARS", 256))
+
+# 문제별 시간 제한이 없을 때의 기본값과 상한 (CPU 시간 기준, ms)
+DEFAULT_TIME_LIMIT_MS = int(os.getenv("JUDGE_DEFAULT_TIME_LIMIT_MS", 2000))
+MAX_TIME_LIMIT_MS = int(os.getenv("JUDGE_MAX_TIME_LIMIT_MS", 10000))
+# 문제별 출력 제한 (KB). 넘으면 OLE
+DEFAULT_OUTPUT_LIMIT_KB = int(os.getenv("JUDGE_DEFAULT_OUTPUT_LIMIT_KB", 64 * 1024))
+MAX_OUTPUT_LIMIT_KB = int(os.getenv("JUDGE_MAX_OUTPUT_LIMIT_KB", 256 * 1024))
+# 벽시계 제한 = CPU 제한 * 배수 + 여유. sleep/입력 대기로 CPU 를 안 쓰며 버티는 코드도 끊는다
+WALL_TIME_FACTOR = 2
+WALL_TIME_SLACK_MS = 500
+
+# 동시에 실행할 수 있는 샌드박스(테스트케이스) 수. 모든 /judge 요청이 공유하므로
+# 부하가 몰려도 호스트가 과점유되지 않고 측정 시간이 비교 가능한 수준으로 유지된다.
+MAX_PARALLEL_TESTS = int(os.getenv("JUDGE_MAX_PARALLEL_TESTS", max(1, (os.cpu_count() or 2) // 2)))
+
+# 동시에 채점하는 /judge 요청 수와 기다릴 수 있는 요청 수. 대기열이 가득 차면 429 + Retry-After
+MAX_ACTIVE_REQUESTS = int(os.getenv("JUDGE_MAX_ACTIVE_REQUESTS", MAX_PARALLEL_TESTS))
+MAX_QUEUED_REQUESTS = int(os.getenv("JUDGE_MAX_QUEUED_REQUESTS", 32))
+QUEUE_TIMEOUT_SEC = float(os.getenv("JUDGE_QUEUE_TIMEOUT_SEC", 30))
+# 동시에 채점하는 batch(재채점/보정) 요청 수. 나머지 슬롯은 예제 실행과 제출 채점 몫
+BATCH_MAX_ACTIVE = int(os.getenv("JUDGE_BATCH_MAX_ACTIVE", max(1, MAX_ACTIVE_REQUESTS // 2)))
+
+# /metrics (Prometheus). 채점 서버 대수/슬롯 수를 정할 때 참고
+TESTCASE_RUNTIME = metrics.Histogram(
+    "judge_testcase_runtime_seconds", "User code CPU time (user + sys) per testcase",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+TESTCASE_MEMORY = metrics.Histogram(
+    "judge_testcase_memory_bytes", "Peak memory per testcase",
+    tuple(mb * 1024 * 1024 for mb in (8, 16, 32, 64, 128, 256, 512)),
+)
+SANDBOX_OVERHEAD = metrics.Histogram(
+    "judge_sandbox_overhead_seconds", "Sandbox spawn/teardown time not spent in user code",
+    (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    labelnames=("backend",),
+)
+QUEUE_WAIT = metrics.Histogram(
+    "judge_queue_wait_seconds", "Time waiting for admission (per request) or a sandbox slot (per testcase)",
+    (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30),
+    labelnames=("stage", "priority"),
+)
+REQUEST_LATENCY = metrics.Histogram(
+    "judge_request_duration_seconds", "End-to-end /judge latency (until the stream closes when streaming)",
+    (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    labelnames=("mode", "status"),
+)
+COMPILE_TIME = metrics.Histogram(
+    "judge_compile_seconds", "Compile time per submission (cached = binary cache hit)",
+    (0.001, 0.01, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    labelnames=("language", "cached"),
+)
+VERDICTS = metrics.Counter(
+    "judge_testcase_verdicts_total", "Executed testcases by verdict (ERROR = internal judge error)",
+    labelnames=("result",),
+)
+
+
+class RequestError(Exception):
+    """/judge 요청을 처리할 수 없음 (status 와 JSON body 로 그대로 응답)"""
+
+    def __init__(self, status: int, body: dict):
+        super().__init__(body.get("error"))
+        self.status = status
+        self.body = body
+
+
+def is_malicious(code: str) -> str:
+    for keyword in BANNED_KEYWORDS:
+        if keyword in code:
+            return keyword
+    return None
+
+def check_ast_for_banned_usage(code: str):
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return f"SyntaxError: {e}"
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import) or isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if alias.name.split(".")[0] in BANNED_KEYWORDS:
+                    return f"금지된 모듈 import 사용: {alias.name}"
+        elif isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Name) and func.id in BANNED_KEYWORDS:
+                return f"금지된 함수 사용: {func.id}()"
+            elif isinstance(func, ast.Attribute) and func.attr in BANNED_KEYWORDS:
+                return f"금지된 함수/속성 사용: {func.attr}"
+    return None  # 안전함
+
+def rejection_reason(code: str, language: str) -> str:
+    # 금지어 검사 / AST 검사 (AST 검사는 파이썬만)
+    if language == "python":
+        keyword = is_malicious(code)
+        return "denied keyword used" if keyword else check_ast_for_banned_usage(code)
+    return "denied keyword used" if languages.banned_keyword(code) else None
+
+def parse_request(data: dict) -> dict:
+    """/judge 요청 본문을 정리한다. 잘못된 값이면 RequestError(400)"""
+    try:
+        checker_spec = checker.parse_spec(data.get("checker"))
+    except (TypeError, ValueError) as e:
+        raise RequestError(400, {"error": f"invalid checker: {e}"})
+    # 제출 언어 ("python", "c", "cpp" 와 "C++" 같은 표기). 없으면 python
+    try:
+        language = languages.resolve(data.get("language"))
+    except languages.UnsupportedLanguage as e:
+        raise RequestError(400, {"error": str(e)})
+    profile = bool(data.get("profile")) and language == "python"
+    priority = data.get("priority") or DEFAULT_PRIORITY
+    if priority not in PRIORITIES:
+        raise RequestError(400, {"error": f"invalid priority: {priority}"})
+
+    return {
+        "code": data.get("code"),
+        "testcases": data.get("testcases") or [],
+        "testset": data.get("testset"),
+        # 문제별 시간 제한 (없으면 기본값, 상한으로 잘라냄)
+        "time_limit_ms": min(int(data.get("time_limit_ms") or DEFAULT_TIME_LIMIT_MS), MAX_TIME_LIMIT_MS),
+        # 문제별 출력 제한 (KB)
+        "output_limit_kb": min(int(data.get("output_limit_kb") or DEFAULT_OUTPUT_LIMIT_KB), MAX_OUTPUT_LIMIT_KB),
+        "checker_spec": checker_spec,
+        # stream=true 면 테스트케이스마다 결과를 바로 흘려보낸다 (application/x-ndjson)
+        "stream": bool(data.get("stream")),
+        # fail_fast=true 면 자주 틀리는 케이스부터 실행하고 첫 실패에서 멈춘다 (문제별 opt-in, 빠른 재채점).
+        # 최종 판정은 처음 발견한 실패 결과가 된다
+        "fail_fast": bool(data.get("fail_fast")),
+        "language": language,
+        # profile=true 면 케이스마다 cProfile 결과(함수별 호출 수/누적 시간)를 붙인다 (파이썬만, 예제 실행용)
+        "profile": profile,
+        # cache=false 면 채점 결과 캐시를 읽지도 쓰지도 않는다 (시간 제한 보정처럼 매번 실제로 실행해야 할 때).
+        # 프로파일 결과는 실행마다 달라지므로 캐시하지 않는다
+        "cache": data.get("cache", True) is not False and not profile,
+        # echo=true 면 케이스마다 입력/정답/출력(ECHO_LIMIT_BYTES 까지)을 그대로 돌려준다 (예제 실행용).
+        # 기본은 판정/지표와 출력 앞부분, 출력/정답 해시, 오답 위치만 (compact_result)
+        "echo": bool(data.get("echo")),
+        # 스케줄링 (fairshare.py): interactive > submit > batch, 같은 클래스 안에서는 user 별로 돌아가며
+        "priority": priority,
+        "user": str(data["user"]) if data.get("user") is not None else None,
+    }
+
+def load_testset(req: dict):
+    """
+    testset={"problem_id", "hash"} 참조로 오면 로컬 캐시에서 테스트케이스를 꺼낸다 -> (cases, stats_key).
+    캐시에 없으면 409 로 알려서 게이트웨이가 testcases 를 붙여 한 번만 다시 보내게 한다.
+    참조가 없으면 (None, None): 호출한 쪽에서 testcases 를 임시 파일로 쓴다
+    """
+    testset_ref = req["testset"]
+    if not testset_ref:
+        return None, None
+    try:
+        problem_id = int(testset_ref["problem_id"])
+        digest = testset_ref["hash"]
+        if req["testcases"]:
+            testset_cache.store(problem_id, digest, req["testcases"])
+        return testset_cache.load(problem_id, digest), (problem_id, digest)
+    except TestsetMissing:
+        raise RequestError(409, {"error": "testset_missing"})
+    except (TestsetMismatch, KeyError, TypeError, ValueError) as e:
+        raise RequestError(400, {"error": f"invalid testset: {e}"})
+
+def verdict_key(req: dict) -> str:
+    digest = req["testset"]["hash"] if req["testset"] else testset_cache.testset_hash(req["testcases"])
+    return verdict_cache.make_key(req["code"], digest, {
+        "time_limit_ms": req["time_limit_ms"],
+        "memory_limit_mb": MEMORY_LIMIT_MB,
+        "output_limit_kb": req["output_limit_kb"],
+        "checker": req["checker_spec"],
+        "fail_fast": req["fail_fast"],
+        "language": req["language"],
+    }, languages.runtime_version(req["language"]))
+
+def sandbox_limits(time_limit_ms: int, output_limit_kb: int, native: bool = False) -> dict:
+    address_space_mb = MEMORY_LIMIT_MB
+    if native and memwatch.helper_path():
+        address_space_mb = max(MEMORY_LIMIT_MB, NATIVE_ADDRESS_SPACE_MB)
+    return {
+        # cgroup memory.max
+        "memory_limit_bytes": MEMORY_LIMIT_MB * 1024 * 1024,
+        # cgroup 이 없을 때 RLIMIT_AS
+        "address_space_bytes": address_space_mb * 1024 * 1024,
+        # CPU 시간 제한은 wait_with_deadline (zygote.py) 과 memwatch 도우미가 밀리초 단위로 지킨다.
+        # RLIMIT_CPU 는 초 단위라서 (500 ms 제한이면 1 초까지 돈다) 둘이 놓쳤을 때의 백스톱
+        "cpu_limit_ms": time_limit_ms,
+        "cpu_limit_s": math.ceil(time_limit_ms / 1000),
+        "wall_limit_ms": time_limit_ms * WALL_TIME_FACTOR + WALL_TIME_SLACK_MS,
+        # 제한과 정확히 같은 크기의 출력은 허용하고, 1 바이트라도 넘으면 OLE 로 판정
+        "output_limit_bytes": output_limit_kb * 1024 + 1,
+    }
+
+def sandbox_command(command: list, limits: dict, cg: str = None) -> list:
+    """zygote 없이 띄울 때의 실행 명령 (prlimit 으로 제한을 건 command)"""
+    cpu_limit_s = limits["cpu_limit_s"]
+    prlimit = [
+        "prlimit",
+        f"--cpu={cpu_limit_s}:{cpu_limit_s + 1}",
+        f"--fsize={limits['output_limit_bytes']}",
+        "--",
+        *command,
+    ]
+    if cg:
+        # exec 전에 셸이 자기 자신을 cgroup 에 넣는다. 메모리는 memory.max/memory.peak 가 담당
+        return ["sh", "-c", 'echo $$ > "$0" && exec "$@"', cgroup.procs_file(cg), *prlimit]
+    return prlimit[:1] + [f"--as={limits['address_space_bytes']}"] + prlimit[1:]
+
+def preview(path: str, tail: bool = False) -> str:
+    """파일 앞부분(tail=True 면 뒷부분) ECHO_LIMIT_BYTES 만 읽어서 문자열로"""
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if tail and size > ECHO_LIMIT_BYTES:
+                f.seek(size - ECHO_LIMIT_BYTES)
+            data = f.read(ECHO_LIMIT_BYTES)
+    except OSError:
+        return ""
+    text = data.decode("utf-8", errors="replace").strip()
+    if size > ECHO_LIMIT_BYTES:
+        text = "..." + text if tail else text + "..."
+    return text
+
+def file_sha256(path: str) -> str:
+    """출력 파일 전체의 sha256 (응답에는 앞부분만 싣지만, 같은 출력인지는 해시로 비교할 수 있게)"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def decide_verdict(run: dict, case: dict, work_dir: str, out_path: str, err_path: str,
+                   time_limit_ms: int, output_limit_kb: int, checker_spec: dict, native: bool) -> dict:
+    """
+    샌드박스 실행 결과 run {"returncode", "cpu_ms", "wall_ms", "memory_kb", "timed_out", ["oom_killed"]} 로
+    테스트케이스 결과를 만든다. native: 컴파일된 실행 파일 (파이썬 SyntaxError 검사 안 함)
+    memory_kb 가 None 이면 (잴 수 없었음) 메모리로는 판정하지 않는다
+    """
+    input_data = preview(case["input_path"])
+    expected_output = preview(case["output_path"])
+    returncode = run["returncode"]
+    # 실행 시간 = CPU 시간 (user + sys). 제한도 CPU 시간으로 판정해서 judge 가 바빠도 판정이 흔들리지 않는다.
+    # 벽시계 시간은 참고용으로 같이 돌려주고, 잠들어 있는 코드는 wall_limit_ms 로 끊는다 (timed_out)
+    cpu_ms = run["cpu_ms"]
+    wall_ms = run["wall_ms"]
+    memory_kb = run["memory_kb"]
+    memory_limit_kb = MEMORY_LIMIT_MB * 1024
+    user_output = preview(out_path)
+    # 에러 종류는 traceback 끝에 있으므로 stderr 는 뒷부분을 본다
+    stderr_output = preview(err_path, tail=True)
+
+    # 판정
+    if run["timed_out"] or returncode == -signal.SIGXCPU or cpu_ms > time_limit_ms:
+        result = "TLE"
+        user_output = "Timeout"
+    elif os.path.getsize(out_path) > output_limit_kb * 1024:
+        result = "OLE"
+    elif not native and "SyntaxError" in stderr_output:
+        result = "CE"
+    elif run.get("oom_killed"):
+        result = "MLE"
+    elif ("MemoryError" in stderr_output) or ("killed" in stderr_output.lower()) or (returncode == -9):
+        result = "MLE"
+    elif native and "std::bad_alloc" in stderr_output:
+        result = "MLE"
+    elif memory_kb is not None and memory_kb > memory_limit_kb:
+        # 컴파일 언어는 주소 공간을 넉넉히 주므로 제한을 넘게 쓰고도 끝날 수 있다
+        result = "MLE"
+    elif returncode != 0 and memory_kb is not None and memory_kb >= int(memory_limit_kb * 0.9):
+        # 제한 근처에서 비정상 종료 (C/C++ 는 할당 실패 후 SIGSEGV/SIGABRT)
+        result = "MLE"
+    elif returncode != 0:
+        result = "RTE"
+    elif checker.compare(checker_spec, work_dir, case["input_path"], out_path, case["output_path"]):
+        result = "PASS"
+    else:
+        result = "FAIL"
+
+    verdict = {
+        "input": input_data,
+        "expected": expected_output,
+        "user_output": user_output if user_output else stderr_output,
+        "result": result,
+        "runtime_ms": cpu_ms,
+        "cpu_ms": cpu_ms,
+        "wall_ms": wall_ms,
+        "memory_kb": memory_kb,
+        "output_hash": file_sha256(out_path),
+        "expected_hash": file_sha256(case["output_path"]),
+    }
+    if result == "FAIL":
+        verdict["first_diff"] = checker.first_difference(checker_spec, out_path, case["output_path"])
+    return verdict
+
+def internal_error(case: dict, e: Exception) -> dict:
+    # 채점 서버 내부 오류 ("Error: " 로 시작). 통계/캐시에는 남기지 않는다
+    return {
+        "input": preview(case["input_path"]),
+        "expected": preview(case["output_path"]),
+        "user_output": f"Error: {e}",
+        "result": "RTE",
+        "runtime_ms": 0,
+        "cpu_ms": 0,
+        "wall_ms": 0,
+        "memory_kb": 0
+    }
+
+def is_internal_error(r: dict) -> bool:
+    return r["user_output"].startswith("Error: ")
+
+def rejected(message: str) -> list:
+    # 금지어/AST 검사에 걸린 코드는 실행하지 않고 단일 실패 결과로 응답
+    return [{
+        "index": 0,
+        "input": "",
+        "expected": "",
+        "user_output": message,
+        "result": "FAIL",
+        "runtime_ms": 0,
+        "memory_kb": 0
+    }]
+
+def compile_error(message: str) -> dict:
+    # 컴파일 실패는 테스트케이스를 실행하지 않고 CE 결과 하나로 응답
+    return {
+        "index": 0,
+        "input": "",
+        "expected": "",
+        "user_output": message,
+        "result": "CE",
+        "runtime_ms": 0,
+        "memory_kb": 0
+    }
+
+def execution_order(cases: list, stats_key: tuple, fail_fast: bool):
+    if fail_fast and stats_key:
+        return case_stats.fail_fast_order(*stats_key, len(cases))
+    return range(len(cases))
+
+def record_result(r: dict, cases: list, stats_key: tuple):
+    """실행한 테스트케이스 결과를 지표/케이스 통계에 반영"""
+    error = is_internal_error(r)
+    VERDICTS.inc(result="ERROR" if error else r["result"])
+    TESTCASE_RUNTIME.observe(r["runtime_ms"] / 1000)
+    if r["memory_kb"] is not None:
+        TESTCASE_MEMORY.observe(r["memory_kb"] * 1024)
+    # run_single_test 의 except 경로(채점 서버 내부 오류)는 통계에서 뺀다
+    if stats_key and not error:
+        case_stats.record(*stats_key, len(cases), r["index"], r["result"] == "PASS", r["runtime_ms"])
+
+def stops_judging(r: dict, fail_fast: bool) -> bool:
+    # RTE 이후는 실행하지 않는다. TLE 는 판정만 하고 나머지 케이스도 실행해서 passed/total 을 그대로 보고한다.
+    # fail_fast 면 (TLE 를 포함해) 첫 실패에서 멈춘다
+    return r["result"] == "RTE" or (fail_fast and r["result"] != "PASS")
+
+def cacheable(results: list) -> bool:
+    # 채점 서버 내부 오류가 있으면 다시 채점해야 하므로 verdict_cache 에 저장하지 않는다
+    return not any(is_internal_error(r) for r in results)
+
+def compact_result(r: dict) -> dict:
+    """입력/정답/출력 원문 대신 출력 앞부분(COMPACT_PREVIEW_CHARS)만. 해시, 오답 위치, 지표는 그대로"""
+    compact = {key: value for key, value in r.items() if key not in ("input", "expected", "user_output")}
+    output = r["user_output"]
+    compact["output_preview"] = output[:COMPACT_PREVIEW_CHARS] + "..." if len(output) > COMPACT_PREVIEW_CHARS else output
+    return compact
+
+def response_result(r: dict, echo: bool) -> dict:
+    return r if echo else compact_result(r)
+
+def summarize_results(results: list, total: int, echo: bool = True) -> dict:
+    overall_result = "PASS" if all(r["result"] == "PASS" for r in results) else "FAIL"
+    return {
+        "total": total,
+        "result": overall_result,
+        # fail-fast 로 순서를 바꿔 실행했어도 응답은 원래 순서로
+        "results": [response_result(r, echo) for r in sorted(results, key=lambda r: r["index"])],
+        "runtime_ms": sum(r["runtime_ms"] for r in results),
+        "wall_ms": sum(r.get("wall_ms", 0) for r in results),
+        # 메모리를 잴 수 없었던 케이스(None)는 빼고. 하나도 없으면 None
+        "memory_kb": max((r["memory_kb"] for r in results if r["memory_kb"] is not None), default=None)
+    }
+
+def stream_summary(results: list, total: int, cached: bool = False) -> dict:
+    """NDJSON 스트림 마지막 줄"""
+    summary = summarize_results(results, total)
+    del summary["results"]
+    if cached:
+        summary["cached"] = True
+    return {"type": "summary", "judged": len(results), **summary}
+
+def busy_body(e) -> tuple:
+    """admission.Busy -> (429 body, headers)"""
+    body = {"error": "busy", "queue_depth": e.queue_depth, "retry_after": e.retry_after}
+    headers = {"Retry-After": str(e.retry_after), "X-Judge-Queue-Depth": str(e.queue_depth)}
+    return body, headers
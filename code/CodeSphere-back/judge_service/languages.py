@@ -0,0 +1,198 @@
+"""
+제출 언어별 실행 방법.
+
+  "python" : 지금까지처럼 python3 (zygote) 로 실행
+  "c"/"cpp": 제출마다 한 번만 컴파일하고 모든 테스트케이스에서 같은 실행 파일을 쓴다
+
+컴파일 결과는 (언어, 컴파일러 버전, 옵션, 코드) 해시로 저장해서 같은 코드를 다시 채점할 때
+(예: /submissions/test 후 같은 코드로 submit) 컴파일을 건너뛴다.
+  JUDGE_CACHE_DIR/binaries/<sha256>
+전체 크기가 JUDGE_BINARY_CACHE_MB 를 넘으면 오래 안 쓴 것부터 지운다.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from testset_cache import CACHE_DIR
+
+BINARY_DIR = os.path.join(CACHE_DIR, "binaries")
+BINARY_CACHE_BYTES = int(os.getenv("JUDGE_BINARY_CACHE_MB", 256)) * 1024 * 1024
+COMPILE_TIME_LIMIT_S = int(os.getenv("JUDGE_COMPILE_TIME_LIMIT_S", 10))
+# cc1plus 는 가상 메모리를 많이 잡으므로 실행 제한보다 넉넉하게
+COMPILE_MEMORY_LIMIT_MB = int(os.getenv("JUDGE_COMPILE_MEMORY_LIMIT_MB", 1024))
+COMPILE_MESSAGE_LIMIT = 4000
+# 최근에 쓴 실행 파일은 크기 제한을 넘어도 지우지 않는다 (채점 중인 요청이 아직 실행할 수 있음)
+EVICT_GRACE_SEC = 600
+
+LANGUAGES = {
+    "python": {"source": "main.py"},
+    "c": {"source": "main.c", "compiler": "gcc", "flags": ["-O2", "-std=gnu11", "-pipe", "-lm"]},
+    "cpp": {"source": "main.cpp", "compiler": "g++", "flags": ["-O2", "-std=gnu++17", "-pipe"]},
+}
+# 게이트웨이/프론트에서 오는 표기 ("Python", "C++" 등)
+ALIASES = {"python3": "python", "py": "python", "c++": "cpp", "cxx": "cpp", "cpp17": "cpp", "g++": "cpp"}
+
+# 파이썬은 AST 검사를 하고, 컴파일 언어는 문자열로만 막는다 (격리는 prlimit/cgroup 이 담당)
+NATIVE_BANNED_KEYWORDS = [
+    "system(", "popen", "fork(", "vfork", "execl", "execv", "execve", "execvp", "clone(",
+    "syscall", "ptrace", "kill(", "socket(", "<unistd.h>", "<sys/", "asm(", "asm volatile", "__asm",
+]
+
+_locks = {}  # key -> [Lock, 이 락을 잡았거나 기다리는 스레드 수]
+_locks_guard = threading.Lock()
+
+
+class UnsupportedLanguage(ValueError):
+    pass
+
+
+class CompileError(Exception):
+    """사용자 코드 컴파일 실패 (메시지는 컴파일러 출력)"""
+    pass
+
+
+def resolve(name: str) -> str:
+    """요청의 language 값을 LANGUAGES 키로. 없으면 python"""
+    key = (name or "python").strip().lower()
+    key = ALIASES.get(key, key)
+    if key not in LANGUAGES:
+        raise UnsupportedLanguage(f"unsupported language: {name}")
+    compiler = LANGUAGES[key].get("compiler")
+    if compiler and shutil.which(compiler) is None:
+        raise UnsupportedLanguage(f"{compiler} is not installed on this judge")
+    return key
+
+
+def is_compiled(language: str) -> bool:
+    return "compiler" in LANGUAGES[language]
+
+
+def available() -> list:
+    """이 채점 서버에서 쓸 수 있는 언어 (/health)"""
+    result = []
+    for key in LANGUAGES:
+        try:
+            result.append(resolve(key))
+        except UnsupportedLanguage:
+            pass
+    return result
+
+
+def banned_keyword(code: str) -> str:
+    for keyword in NATIVE_BANNED_KEYWORDS:
+        if keyword in code:
+            return keyword
+    return None
+
+
+@lru_cache(maxsize=None)
+def _compiler_version(compiler: str) -> str:
+    out = subprocess.run([compiler, "--version"], capture_output=True, text=True).stdout
+    return out.splitlines()[0] if out else compiler
+
+
+def runtime_version(language: str) -> str:
+    """사용자 코드를 실행하는 환경 (파이썬 버전, 또는 컴파일러 버전 + 옵션). 채점 결과 캐시 키에 들어간다"""
+    spec = LANGUAGES[language]
+    if not is_compiled(language):
+        return sys.version
+    return f"{_compiler_version(spec['compiler'])} {' '.join(spec['flags'])}"
+
+
+def binary_key(language: str, code: str) -> str:
+    spec = LANGUAGES[language]
+    raw = "\0".join([language, _compiler_version(spec["compiler"]), " ".join(spec["flags"]), code])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _key_lock(key: str):
+    # 같은 코드가 동시에 들어와도 한 번만 컴파일.
+    # 락은 잡았거나 기다리는 스레드가 하나도 없을 때만 지운다 (그 전에 지우면 다음 호출이 새 락으로 같이 컴파일한다)
+    with _locks_guard:
+        entry = _locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _locks[key]
+
+
+def _evict():
+    try:
+        entries = [e for e in os.scandir(BINARY_DIR) if e.is_file() and not e.name.startswith(".")]
+    except OSError:
+        return
+    stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in entries]
+    total = sum(size for _, size, _ in stats)
+    now = time.time()
+    for mtime, size, path in sorted(stats):
+        if total <= BINARY_CACHE_BYTES or now - mtime < EVICT_GRACE_SEC:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def _compile(language: str, code: str, binary_path: str):
+    spec = LANGUAGES[language]
+    work_dir = tempfile.mkdtemp(prefix=".build-", dir=BINARY_DIR)
+    try:
+        source_path = os.path.join(work_dir, spec["source"])
+        with open(source_path, "w", encoding="utf-8") as f:
+            f.write(code)
+        out_path = os.path.join(work_dir, "main")
+
+        cmd = [
+            "prlimit",
+            f"--as={COMPILE_MEMORY_LIMIT_MB * 1024 * 1024}",
+            f"--cpu={COMPILE_TIME_LIMIT_S}",
+            "--",
+            spec["compiler"], source_path, "-o", out_path, *spec["flags"],
+        ]
+        try:
+            proc = subprocess.run(
+                cmd, cwd=work_dir, stdin=subprocess.DEVNULL, capture_output=True,
+                timeout=COMPILE_TIME_LIMIT_S * 2,
+            )
+        except subprocess.TimeoutExpired:
+            raise CompileError("Compilation timed out")
+
+        if proc.returncode != 0:
+            # 임시 경로 대신 파일 이름만 보여준다
+            message = proc.stderr.decode(errors="replace").replace(source_path, spec["source"])
+            raise CompileError(message.strip()[:COMPILE_MESSAGE_LIMIT] or f"compiler exited with {proc.returncode}")
+        os.replace(out_path, binary_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def compile_binary(language: str, code: str) -> tuple:
+    """(실행 파일 경로, 캐시 적중 여부). 컴파일 실패면 CompileError"""
+    key = binary_key(language, code)
+    binary_path = os.path.join(BINARY_DIR, key)
+    with _key_lock(key):
+        if os.path.exists(binary_path):
+            try:
+                os.utime(binary_path)  # 최근 사용 표시 (오래된 것부터 지운다)
+            except OSError:
+                pass
+            return binary_path, True
+
+        os.makedirs(BINARY_DIR, exist_ok=True)
+        _compile(language, code, binary_path)
+    _evict()
+    return binary_path, False
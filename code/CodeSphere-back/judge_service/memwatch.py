@@ -0,0 +1,180 @@
+"""
+사용자 프로그램의 최대 메모리(RSS) 측정 도우미 (/usr/bin/time 과 같은 방식).
+
+ru_maxrss 에는 exec 전 주소 공간도 들어가므로, judge 나 zygote 에서 fork 한 프로세스가 exec 하면
+사용자 프로그램이 거의 메모리를 안 써도 judge(수십 MB)/zygote 의 RSS 가 그대로 보고된다.
+그래서 작은 C 도우미를 exec 하고, 도우미가 새로 fork 한 자식에서 사용자 프로그램을 exec 한 뒤
+wait4 로 그 자식의 ru_maxrss 만 파일에 적는다. 자식의 종료 상태(시그널 포함)는 도우미가 그대로 따라 한다.
+
+cgroup 이 없으면 C/C++ 는 주소 공간을 넉넉히 받으므로 (judging.NATIVE_ADDRESS_SPACE_MB) 도우미가
+POLL_MS 마다 자식의 RSS 를 확인해서 메모리 제한을 넘으면 SIGKILL 로 끊는다 (0 이면 확인하지 않음).
+CPU 시간도 같은 간격으로 확인해서 밀리초 제한을 넘으면 끊는다. 실행 파일은 도우미의 자식이라
+judge 쪽 wait_with_deadline 이 /proc 으로 볼 수 없기 때문이다 (RLIMIT_CPU 는 초 단위 백스톱).
+
+  memwatch <report 파일> <메모리 제한 KB> <CPU 제한 ms> <프로그램> [인자...]
+
+도우미는 처음 쓸 때 gcc 로 한 번 컴파일해서 JUDGE_CACHE_DIR 에 둔다.
+gcc 가 없어 만들 수 없으면 명령을 감싸지 않고, read_report 는 None (메모리를 보고하지 않음) 을 돌려준다.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from testset_cache import CACHE_DIR
+
+REPORT_NAME = "memwatch.txt"
+# 자식 RSS/CPU 시간 확인 간격 (종료는 SIGCHLD 로 바로 알 수 있다)
+POLL_MS = 5
+
+_SOURCE = r"""
+#include <errno.h>
+#include <signal.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/resource.h>
+#include <sys/wait.h>
+#include <time.h>
+#include <unistd.h>
+
+static long rss_kb(pid_t pid) {
+    char path[64];
+    long size, resident = 0;
+    snprintf(path, sizeof path, "/proc/%d/statm", (int)pid);
+    FILE *f = fopen(path, "r");
+    if (!f) return 0;
+    if (fscanf(f, "%ld %ld", &size, &resident) != 2) resident = 0;
+    fclose(f);
+    return resident * (sysconf(_SC_PAGESIZE) / 1024);
+}
+
+static long cpu_ms(pid_t pid) {
+    char path[64], buf[1024];
+    unsigned long utime, stime;
+    snprintf(path, sizeof path, "/proc/%d/stat", (int)pid);
+    FILE *f = fopen(path, "r");
+    if (!f) return 0;
+    size_t n = fread(buf, 1, sizeof buf - 1, f);
+    fclose(f);
+    buf[n] = '\0';
+    /* comm 에 공백/괄호가 있을 수 있으므로 마지막 ')' 뒤부터 센다 (14, 15 번째 필드) */
+    char *p = strrchr(buf, ')');
+    if (!p || sscanf(p + 1, " %*c %*d %*d %*d %*d %*d %*u %*u %*u %*u %*u %lu %lu", &utime, &stime) != 2)
+        return 0;
+    return (long)((utime + stime) * 1000 / sysconf(_SC_CLK_TCK));
+}
+
+int main(int argc, char **argv) {
+    if (argc < 5) return 127;
+    long limit_kb = atol(argv[2]);
+    long cpu_limit_ms = atol(argv[3]);
+    sigset_t chld;
+    sigemptyset(&chld);
+    sigaddset(&chld, SIGCHLD);
+    sigprocmask(SIG_BLOCK, &chld, NULL);
+
+    pid_t pid = fork();
+    if (pid < 0) return 127;
+    if (pid == 0) {
+        sigprocmask(SIG_UNBLOCK, &chld, NULL);
+        execvp(argv[4], argv + 4);
+        _exit(127);
+    }
+
+    int status;
+    struct rusage usage;
+    struct timespec interval = {0, POLL_NSEC};
+    for (;;) {
+        pid_t done = wait4(pid, &status, WNOHANG, &usage);
+        if (done == pid) break;
+        if (done < 0 && errno != EINTR) return 127;
+        if (limit_kb > 0 && rss_kb(pid) > limit_kb) kill(pid, SIGKILL);
+        if (cpu_limit_ms > 0 && cpu_ms(pid) > cpu_limit_ms) kill(pid, SIGKILL);
+        sigtimedwait(&chld, NULL, &interval);
+    }
+
+    FILE *report = fopen(argv[1], "w");
+    if (report) {
+        fprintf(report, "%ld\n", usage.ru_maxrss);
+        fclose(report);
+    }
+    if (WIFSIGNALED(status)) {
+        int sig = WTERMSIG(status);
+        struct rlimit no_core = {0, 0};
+        sigset_t set;
+        setrlimit(RLIMIT_CORE, &no_core);
+        signal(sig, SIG_DFL);
+        sigemptyset(&set);
+        sigaddset(&set, sig);
+        sigprocmask(SIG_UNBLOCK, &set, NULL);
+        raise(sig);
+    }
+    return WEXITSTATUS(status);
+}
+"""
+
+_lock = threading.Lock()
+_built = False
+_path = None
+
+
+def _build():
+    compiler = shutil.which("gcc") or shutil.which("cc")
+    if compiler is None:
+        return None
+    source = _SOURCE.replace("POLL_NSEC", str(POLL_MS * 1000 * 1000))
+    digest = hashlib.sha256(source.encode()).hexdigest()[:16]
+    path = os.path.join(CACHE_DIR, f"memwatch-{digest}")
+    if os.access(path, os.X_OK):
+        return path
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=".memwatch-", dir=CACHE_DIR)
+    try:
+        source_path = os.path.join(work_dir, "memwatch.c")
+        with open(source_path, "w") as f:
+            f.write(source)
+        out_path = os.path.join(work_dir, "memwatch")
+        proc = subprocess.run([compiler, "-O2", "-o", out_path, source_path],
+                              stdin=subprocess.DEVNULL, capture_output=True, timeout=30)
+        if proc.returncode != 0:
+            print(f"memwatch disabled: {proc.stderr.decode(errors='replace').strip()}")
+            return None
+        os.replace(out_path, path)
+        return path
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def helper_path():
+    """도우미 실행 파일 경로. 만들 수 없으면 None"""
+    global _built, _path
+    with _lock:
+        if not _built:
+            try:
+                _path = _build()
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"memwatch disabled: {e}")
+                _path = None
+            _built = True
+        return _path
+
+
+def wrap(command: list, report_path: str, memory_limit_kb: int = 0, cpu_limit_ms: int = 0) -> list:
+    """command 를 도우미로 감싼다. 도우미가 없으면 그대로 (CPU 제한은 wait_with_deadline 이 지킨다)"""
+    helper = helper_path()
+    if helper is None:
+        return command
+    return [helper, report_path, str(memory_limit_kb), str(cpu_limit_ms), *command]
+
+
+def read_report(report_path: str):
+    """도우미가 적은 최대 RSS (KB). 도우미가 없었거나 끝까지 가지 못했으면 (시간 초과로 죽임 등) None"""
+    try:
+        with open(report_path, "r") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,120 @@
+"""
+예제 실행용 프로파일 (profile=true).
+
+채점용 실행이 끝난 뒤 같은 입력으로 한 번 더, cProfile 을 붙여 별도 프로세스에서 실행한다.
+판정/실행 시간은 항상 프로파일 없이 실행한 결과이고, 여기서 얻은 값은 참고용이다.
+
+  python3 profiler.py <code_path> <report_path> <time_limit_s>
+
+시간 제한에 걸리면 그때까지의 통계를 남긴다 (TLE 코드에서 어디서 시간을 쓰는지 보여주기 위해).
+사용자 코드(main.py)의 함수와 사용자 코드가 직접 부른 내장 함수만 cumulative time 순으로 돌려준다.
+"""
+import json
+import os
+import subprocess
+import sys
+
+PROFILE_TOP_N = int(os.getenv("JUDGE_PROFILE_TOP_N", 15))
+# 프로파일 실행은 느려지므로 문제 시간 제한의 몇 배까지 돌릴지
+PROFILE_TIME_FACTOR = float(os.getenv("JUDGE_PROFILE_TIME_FACTOR", 2))
+
+
+def profile(code_path: str, input_path: str, time_limit_ms: int, limits: dict) -> dict:
+    """{"functions": [...], "truncated": bool} 또는 실패하면 {"error": ...}"""
+    work_dir = os.path.dirname(code_path)
+    report_path = os.path.join(work_dir, "profile.json")
+    time_limit_s = time_limit_ms / 1000 * PROFILE_TIME_FACTOR
+    cpu_limit_s = int(time_limit_s) + 1
+    cmd = [
+        "prlimit",
+        f"--as={limits['address_space_bytes']}",
+        f"--cpu={cpu_limit_s}:{cpu_limit_s + 1}",
+        f"--fsize={limits['output_limit_bytes']}",
+        "--",
+        sys.executable, os.path.abspath(__file__), code_path, report_path, str(time_limit_s),
+    ]
+    try:
+        with open(input_path, "rb") as fin:
+            subprocess.run(
+                cmd, stdin=fin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                cwd=work_dir, timeout=time_limit_s + 5, start_new_session=True,
+            )
+        with open(report_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+        return {"error": f"profile failed: {type(e).__name__}"}
+
+
+# -------------------------------------------------
+# 프로파일 대상 프로세스 쪽
+# -------------------------------------------------
+class _TimeUp(BaseException):
+    pass
+
+
+def _report(prof, code_path: str, truncated: bool) -> dict:
+    import pstats
+
+    stats = pstats.Stats(prof).stats
+    user_funcs = {key for key in stats if key[0] == code_path}
+    entries = []
+    for (filename, lineno, name), (cc, nc, tt, ct, callers) in stats.items():
+        if filename == code_path:
+            label, builtin = name, False
+        elif filename == "~" and any(caller in user_funcs for caller in callers):
+            # 사용자 코드가 직접 부른 내장 함수 (sorted, list.append 등)
+            # "<built-in method builtins.sorted>" -> "builtins.sorted"
+            label, builtin = name.strip("<>{}").replace("built-in method ", "").replace("method ", ""), True
+        else:
+            continue
+        entries.append({
+            "function": label,
+            "line": lineno if not builtin else None,
+            "builtin": builtin,
+            "calls": nc,
+            "primitive_calls": cc,
+            "total_ms": round(tt * 1000, 3),
+            "cumulative_ms": round(ct * 1000, 3),
+        })
+    entries.sort(key=lambda e: -e["cumulative_ms"])
+    return {"functions": entries[:PROFILE_TOP_N], "truncated": truncated}
+
+
+def _main(code_path: str, report_path: str, time_limit_s: float):
+    import cProfile
+    import signal
+    import traceback
+
+    def time_up(signum, frame):
+        raise _TimeUp()
+
+    with open(code_path, "r", encoding="utf-8") as f:
+        code_obj = compile(f.read(), code_path, "exec")
+
+    sys.argv = [code_path]
+    sys.path[0] = os.path.dirname(code_path)
+    main = {"__name__": "__main__", "__file__": code_path, "__builtins__": __builtins__}
+    prof = cProfile.Profile()
+    truncated = False
+
+    signal.signal(signal.SIGALRM, time_up)
+    signal.setitimer(signal.ITIMER_REAL, time_limit_s)
+    prof.enable()
+    try:
+        exec(code_obj, main)
+    except _TimeUp:
+        truncated = True
+    except SystemExit:
+        pass
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        prof.disable()
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(_report(prof, code_path, truncated), f)
+
+
+if __name__ == "__main__":
+    _main(sys.argv[1], sys.argv[2], float(sys.argv[3]))
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# judge_service 모듈은 서로 평평하게 import 한다 (import judging 등)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import testset_cache  # noqa: E402
+
+
+@pytest.fixture(params=["zygote", "subprocess"])
+def backend(request, monkeypatch):
+    """cgroup 없이 zygote 또는 prlimit 서브프로세스로 실행"""
+    monkeypatch.setattr(app, "cgroup_enabled", False)
+    if request.param == "subprocess":
+        monkeypatch.setattr(app, "zygote_pool", None)
+    elif app.zygote_pool is None:
+        pytest.skip("zygote pool is disabled")
+    return request.param
+
+
+@pytest.fixture
+def case(tmp_path):
+    return testset_cache.write_cases(str(tmp_path), [{"input": "1 2\n", "output": "3"}])[0]
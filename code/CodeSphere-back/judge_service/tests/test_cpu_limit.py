@@ -0,0 +1,35 @@
+"""
+1 초보다 짧은 CPU 시간 제한. RLIMIT_CPU 는 초 단위라서 500 ms 제한이어도 1 초 가까이 돌 수 있으므로
+wait_with_deadline / memwatch 도우미가 밀리초 제한을 넘는 대로 끊는지 확인한다.
+"""
+import shutil
+
+import pytest
+
+import app
+import languages
+
+TIME_LIMIT_MS = 300
+# /proc 의 CPU 시간은 clock tick (보통 10 ms) 단위라서 확인 간격과 합쳐 이 정도는 넘을 수 있다
+OVERSHOOT_MS = 100
+
+BUSY_PY = "while True: pass"
+
+BUSY_CPP = r"""
+int main() { volatile long x = 0; for (;;) x++; }
+"""
+
+
+def _assert_cut_at_limit(r: dict):
+    assert r["result"] == "TLE"
+    assert TIME_LIMIT_MS <= r["cpu_ms"] < TIME_LIMIT_MS + OVERSHOOT_MS
+
+
+def test_python_busy_loop(backend, case):
+    _assert_cut_at_limit(app.run_single_test(BUSY_PY, case, time_limit_ms=TIME_LIMIT_MS))
+
+
+@pytest.mark.skipif(shutil.which("g++") is None, reason="g++ is not installed")
+def test_native_busy_loop(backend, case):
+    binary, _ = languages.compile_binary("cpp", BUSY_CPP)
+    _assert_cut_at_limit(app.run_single_test(BUSY_CPP, case, time_limit_ms=TIME_LIMIT_MS, binary=binary))
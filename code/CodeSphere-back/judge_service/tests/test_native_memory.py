@@ -0,0 +1,95 @@
+"""
+C/C++ 제출의 메모리 초과 판정 (cgroup 없이 prlimit/zygote 경로).
+
+할당이 거절되면 프로그램은 NULL 역참조(SIGSEGV)나 std::bad_alloc(SIGABRT)으로 끝나는데,
+이것이 RTE 가 아니라 MLE 로 판정되는지, 보고하는 메모리가 judge/zygote 가 아니라 사용자 프로그램의 것인지 확인한다.
+"""
+import shutil
+
+import pytest
+
+import app
+import judging
+import languages
+import memwatch
+
+pytestmark = pytest.mark.skipif(shutil.which("g++") is None, reason="g++ is not installed")
+
+MALLOC_MEMSET = r"""
+#include <cstdlib>
+#include <cstring>
+#include <cstdio>
+int main() {
+    int a, b;
+    scanf("%d %d", &a, &b);
+    size_t n = (size_t)a * 500 * 1024 * 1024;
+    char *p = (char *)malloc(n);
+    memset(p, b, n);
+    long sum = 0;
+    for (size_t i = 0; i < n; i += 4096) sum += p[i];
+    printf("%ld\n", sum);
+}
+"""
+
+VECTOR_BAD_ALLOC = r"""
+#include <vector>
+#include <cstdio>
+int main() {
+    std::vector<long long> v;
+    for (;;) v.push_back(v.size());
+}
+"""
+
+A_PLUS_B = r"""
+#include <iostream>
+int main() { int a, b; std::cin >> a >> b; std::cout << a + b; }
+"""
+
+NULL_DEREF = r"""
+int main() { volatile int *p = 0; *p = 1; }
+"""
+
+
+def _run(code: str, case: dict) -> dict:
+    binary, _ = languages.compile_binary("cpp", code)
+    return app.run_single_test(code, case, time_limit_ms=2000, binary=binary)
+
+
+def test_large_malloc_is_mle(backend, case):
+    assert _run(MALLOC_MEMSET, case)["result"] == "MLE"
+
+
+def test_bad_alloc_is_mle(backend, case):
+    assert _run(VECTOR_BAD_ALLOC, case)["result"] == "MLE"
+
+
+def test_null_deref_is_still_rte(backend, case):
+    assert _run(NULL_DEREF, case)["result"] == "RTE"
+
+
+@pytest.mark.skipif(memwatch.helper_path() is None, reason="memwatch helper could not be built")
+def test_reports_user_program_memory(backend, case):
+    r = _run(A_PLUS_B, case)
+    assert r["result"] == "PASS"
+    # judge(수십 MB)나 zygote 의 RSS 가 아니라 a+b 프로그램 자체의 RSS
+    assert 0 < r["memory_kb"] < 10 * 1024
+
+
+def _verdict(tmp_path, case, run: dict, stderr: str = "", native: bool = True) -> str:
+    out_path, err_path = tmp_path / "stdout.txt", tmp_path / "stderr.txt"
+    out_path.write_text("")
+    err_path.write_text(stderr)
+    run = {"cpu_ms": 1, "wall_ms": 1, "timed_out": False, **run}
+    return judging.decide_verdict(run, case, str(tmp_path), str(out_path), str(err_path),
+                                  1000, 1024, {"mode": "exact"}, native)["result"]
+
+
+def test_decide_verdict_native_memory_rules(tmp_path, case):
+    limit_kb = judging.MEMORY_LIMIT_MB * 1024
+    bad_alloc = "terminate called after throwing an instance of 'std::bad_alloc'\n  what():  std::bad_alloc"
+    assert _verdict(tmp_path, case, {"returncode": -6, "memory_kb": 3000}, bad_alloc) == "MLE"
+    assert _verdict(tmp_path, case, {"returncode": -11, "memory_kb": limit_kb}) == "MLE"
+    assert _verdict(tmp_path, case, {"returncode": 0, "memory_kb": limit_kb + 1}) == "MLE"
+    assert _verdict(tmp_path, case, {"returncode": -11, "memory_kb": 3000}) == "RTE"
+    # 메모리를 잴 수 없었으면 메모리로는 판정하지 않는다
+    assert _verdict(tmp_path, case, {"returncode": -11, "memory_kb": None}) == "RTE"
@@ -0,0 +1,135 @@
+"""
+문제별 테스트케이스 로컬 캐시 (content-addressed).
+
+게이트웨이는 {"problem_id", "hash"} 참조만 보내고, 캐시에 없을 때만(409 testset_missing)
+전체 testcases 를 한 번 더 보낸다. 저장 시 hash 를 다시 계산해서 내용과 키가 항상 일치한다.
+
+테스트케이스는 케이스마다 입력/정답 파일로 저장하고, 채점은 파일 경로만 넘겨받아
+stdin 으로 바로 연결하고 출력도 파일로 비교한다 (입력 크기만큼 메모리에 올리지 않음).
+
+디렉터리 구조: JUDGE_CACHE_DIR/testsets/<problem_id>/<sha256>/{manifest.json, <i>.in, <i>.out}
+같은 문제의 예전 버전은 EVICT_GRACE_SEC 동안 쓰이지 않았을 때만 지운다 (그 버전으로 채점 중인 요청이 있을 수 있음).
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+
+CACHE_DIR = os.getenv("JUDGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "codesphere-judge"))
+TESTSET_DIR = os.path.join(CACHE_DIR, "testsets")
+MANIFEST = "manifest.json"
+# 마지막으로 읽은 지 이 시간이 안 된 테스트셋은 새 버전이 저장돼도 지우지 않는다
+EVICT_GRACE_SEC = 600
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class TestsetMissing(Exception):
+    pass
+
+
+class TestsetMismatch(Exception):
+    pass
+
+
+def testset_hash(testcases: list) -> str:
+    # 게이트웨이(app/model/models.py)와 같은 방식으로 직렬화해야 한다
+    canonical = json.dumps(testcases, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _problem_dir(problem_id: int) -> str:
+    return os.path.join(TESTSET_DIR, str(int(problem_id)))
+
+
+def _testset_path(problem_id: int, digest: str) -> str:
+    if not _HASH_RE.match(digest or ""):
+        raise ValueError("testset hash must be a sha256 hex digest")
+    return os.path.join(_problem_dir(problem_id), digest)
+
+
+def _case_paths(directory: str, count: int) -> list:
+    return [
+        {
+            "input_path": os.path.join(directory, f"{i}.in"),
+            "output_path": os.path.join(directory, f"{i}.out"),
+        }
+        for i in range(count)
+    ]
+
+
+def write_cases(directory: str, testcases: list) -> list:
+    """[{"input", "output"}] 를 케이스별 파일로 쓰고 [{"input_path", "output_path"}] 를 돌려준다."""
+    cases = _case_paths(directory, len(testcases))
+    for case, paths in zip(testcases, cases):
+        with open(paths["input_path"], "w", encoding="utf-8") as f:
+            f.write(case["input"])
+        with open(paths["output_path"], "w", encoding="utf-8") as f:
+            f.write(case["output"])
+    return cases
+
+
+def load(problem_id: int, digest: str) -> list:
+    """캐시된 테스트셋의 케이스별 파일 경로. 없으면 TestsetMissing."""
+    path = _testset_path(problem_id, digest)
+    try:
+        with open(os.path.join(path, MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise TestsetMissing(f"{problem_id}/{digest}")
+    try:
+        os.utime(path)  # 최근 사용 표시 (예전 버전 정리 기준)
+    except OSError:
+        pass
+    _evict_old_versions(problem_id, digest)
+    return _case_paths(path, manifest["count"])
+
+
+def _evict_old_versions(problem_id: int, keep: str):
+    """keep 이 아닌 버전 중 EVICT_GRACE_SEC 동안 쓰이지 않은 것만 지운다"""
+    problem_dir = _problem_dir(problem_id)
+    now = time.time()
+    try:
+        entries = list(os.scandir(problem_dir))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.name == keep or entry.name.endswith(".tmp"):
+            continue
+        try:
+            if now - entry.stat().st_mtime < EVICT_GRACE_SEC:
+                continue
+        except OSError:
+            continue
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def store(problem_id: int, digest: str, testcases: list):
+    path = _testset_path(problem_id, digest)
+    actual = testset_hash(testcases)
+    if actual != digest:
+        raise TestsetMismatch(f"expected {digest}, got {actual}")
+    if os.path.exists(os.path.join(path, MANIFEST)):
+        return
+
+    problem_dir = _problem_dir(problem_id)
+    os.makedirs(problem_dir, exist_ok=True)
+
+    # 임시 디렉터리에 다 쓴 뒤 rename 해서 동시에 읽는 쪽이 반쯤 쓴 테스트셋을 보지 않게 한다
+    tmp_path = tempfile.mkdtemp(dir=problem_dir, suffix=".tmp")
+    try:
+        write_cases(tmp_path, testcases)
+        with open(os.path.join(tmp_path, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump({"count": len(testcases)}, f)
+        os.rename(tmp_path, path)
+    except OSError:
+        # 다른 요청이 같은 테스트셋을 먼저 저장한 경우
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.exists(os.path.join(path, MANIFEST)):
+            raise
+
+    # 같은 문제의 예전 버전 테스트셋은 한동안 쓰이지 않은 것만 정리
+    _evict_old_versions(problem_id, digest)
@@ -0,0 +1,59 @@
+"""
+같은 코드 + 같은 테스트셋 + 같은 제한에 대한 채점 결과 캐시 (메모리 LRU).
+
+키: (정규화한 코드 해시, 테스트셋 해시, 시간/메모리 제한, 실행 환경 버전 = 파이썬 또는 컴파일러 버전/옵션)
+값: 테스트케이스별 결과 리스트. 전체 크기가 JUDGE_VERDICT_CACHE_MB 를 넘으면 오래 안 쓴 것부터 버린다.
+실행 시간에 따라 판정이 달라질 수 있는 TLE 결과는 저장하지 않는다.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+VERDICT_CACHE_BYTES = int(os.getenv("JUDGE_VERDICT_CACHE_MB", 64)) * 1024 * 1024
+
+_entries = OrderedDict()  # key -> 직렬화한 결과 (json 문자열)
+_total_bytes = 0
+_lock = threading.Lock()
+
+
+def normalize_code(code: str) -> str:
+    # 줄바꿈 종류(\r\n, \r)만 같은 코드로 본다.
+    # 줄 끝 공백은 여러 줄 문자열 안에서 출력을 바꿀 수 있으므로 그대로 둔다
+    return code.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def make_key(code: str, testset_digest: str, limits: dict, runtime_version: str) -> str:
+    """runtime_version: 사용자 코드를 실행/컴파일하는 환경 (languages.runtime_version). 바뀌면 결과도 달라질 수 있다"""
+    code_digest = hashlib.sha256(normalize_code(code).encode("utf-8")).hexdigest()
+    raw = json.dumps([code_digest, testset_digest, limits, runtime_version], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get(key: str):
+    with _lock:
+        value = _entries.get(key)
+        if value is None:
+            return None
+        _entries.move_to_end(key)
+    return json.loads(value)
+
+
+def put(key: str, results: list):
+    global _total_bytes
+    if any(r["result"] == "TLE" for r in results):
+        return
+    value = json.dumps(results, ensure_ascii=False)
+    if len(value) > VERDICT_CACHE_BYTES:
+        return
+
+    with _lock:
+        old = _entries.pop(key, None)
+        if old is not None:
+            _total_bytes -= len(old)
+        _entries[key] = value
+        _total_bytes += len(value)
+        while _total_bytes > VERDICT_CACHE_BYTES:
+            _, evicted = _entries.popitem(last=False)
+            _total_bytes -= len(evicted)
@@ -0,0 +1,363 @@
+"""
+미리 초기화된 Python 인터프리터(zygote) 풀.
+
+각 zygote 프로세스는 허용된 표준 라이브러리를 미리 import 해 둔 상태로 대기하다가,
+테스트케이스마다 fork 로 자식 하나를 만들어 리소스 제한을 건 뒤 사용자 코드를 실행한다.
+python3 콜드 스타트와 prlimit/time 실행 비용이 사라지고, 측정 시간에는 사용자 코드 실행만 포함된다.
+
+프로토콜 (AF_UNIX SOCK_SEQPACKET):
+  judge -> zygote : JSON 요청 + [stdin, stdout, stderr] fd
+  zygote -> judge : JSON 응답 {"returncode", "cpu_ms", "wall_ms", "memory_kb", "timed_out"}
+"""
+import json
+import os
+import queue
+import resource
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+# 사용자 코드에서 자주 쓰는 표준 라이브러리 (zygote 에서 미리 import)
+PRELOAD_MODULES = [
+    "math", "collections", "heapq", "bisect", "itertools", "functools",
+    "re", "string", "copy", "operator", "decimal", "fractions",
+    "statistics", "random", "array", "queue", "typing", "dataclasses",
+]
+
+_MAX_MESSAGE = 64 * 1024
+# CPU 시간 제한 확인 최소 간격 (/proc 의 CPU 시간은 clock tick 단위)
+CPU_POLL_SEC = 0.005
+_CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+
+class ZygoteError(Exception):
+    pass
+
+
+# -------------------------------------------------
+# zygote 프로세스 쪽
+# -------------------------------------------------
+def _run_child(req: dict, fds: list, report_w: int):
+    """
+    fork 된 자식: fd 를 연결하고 제한을 건 뒤 사용자 코드를 __main__ 으로 실행한다.
+    req 에 "argv" 가 있으면 (컴파일된 실행 파일) 그 프로그램으로 exec 한다.
+    exec 해도 zygote 의 RSS 가 ru_maxrss 에 남으므로 argv 는 memwatch 도우미로 감싸서 보낸다.
+    """
+    import traceback
+    import types
+
+    exit_code = 0
+    try:
+        os.setsid()
+        cgroup_procs = req.get("cgroup_procs")
+        if cgroup_procs:
+            # 테스트케이스 전용 cgroup 으로 이동 (메모리 제한/측정은 cgroup 이 담당)
+            with open(cgroup_procs, "w") as f:
+                f.write("0")
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+
+        limit = req.get("address_space_bytes")
+        if limit:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        cpu_limit_s = req.get("cpu_limit_s")
+        if cpu_limit_s:
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit_s, cpu_limit_s + 1))
+        output_limit = req.get("output_limit_bytes")
+        if output_limit:
+            # 출력 파일이 이 크기를 넘으면 write 가 실패한다 (EFBIG)
+            resource.setrlimit(resource.RLIMIT_FSIZE, (output_limit, output_limit))
+
+        argv = req.get("argv")
+        if argv:
+            if req.get("cwd"):
+                os.chdir(req["cwd"])
+            try:
+                os.execv(argv[0], argv)
+            except OSError:
+                os._exit(127)
+
+        sys.stdin = open(0, "r", encoding="utf-8", closefd=False)
+        sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", closefd=False)
+
+        code_path = req["code_path"]
+        sys.argv = [code_path]
+        sys.path[0] = os.path.dirname(code_path)
+        main = types.ModuleType("__main__")
+        main.__file__ = code_path
+        sys.modules["__main__"] = main
+
+        with open(code_path, "r", encoding="utf-8") as f:
+            source = f.read()
+        try:
+            code_obj = compile(source, code_path, "exec")
+        except SyntaxError:
+            traceback.print_exc(limit=0)
+            exit_code = 1
+        else:
+            start = time.perf_counter()
+            try:
+                exec(code_obj, main.__dict__)
+            except SystemExit as e:
+                if e.code is None:
+                    exit_code = 0
+                elif isinstance(e.code, int):
+                    exit_code = e.code
+                else:
+                    print(e.code, file=sys.stderr)
+                    exit_code = 1
+            except BaseException as e:
+                # zygote 프레임은 빼고 사용자 코드 traceback 만 출력
+                traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+                exit_code = 1
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            os.write(report_w, f"{elapsed_ms:.3f}".encode())
+
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except Exception:
+            exit_code = exit_code or 1
+    except BaseException:
+        exit_code = 1
+    finally:
+        os._exit(exit_code & 0xFF)
+
+
+def kill_group(pid: int):
+    """start_new_session 으로 띄운 자식과 그 프로세스 그룹 전체에 SIGKILL"""
+    for kill in (os.killpg, os.kill):
+        try:
+            kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def cpu_time_ms(pid: int) -> int:
+    """실행 중인 프로세스가 지금까지 쓴 CPU 시간 (user + sys, ms). 이미 끝났으면 0"""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            # comm 에 공백/괄호가 있을 수 있으므로 마지막 ')' 뒤부터 센다 (utime, stime 은 14, 15 번째 필드)
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) * 1000 // _CLK_TCK
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def next_wait_s(pid: int, deadline: float, cpu_limit_ms: int = None):
+    """
+    다음으로 종료를 기다릴 시간 (초). 벽시계 deadline 이 지났거나 CPU 시간이 cpu_limit_ms 를 넘었으면 None.
+    CPU 시간은 한 코어로 남은 만큼 기다렸다가 다시 확인한다 (가까워지면 CPU_POLL_SEC 간격)
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return None
+    if not cpu_limit_ms:
+        return remaining
+    cpu_left_ms = cpu_limit_ms - cpu_time_ms(pid)
+    if cpu_left_ms < 0:
+        return None
+    return min(remaining, max(cpu_left_ms / 1000, CPU_POLL_SEC))
+
+
+def wait_with_deadline(pid: int, timeout_s: float, cpu_limit_ms: int = None):
+    """
+    자식이 끝날 때까지 최대 timeout_s 동안 기다린다. 시간 초과면 프로세스 그룹 전체를 죽인다.
+    cpu_limit_ms 가 있으면 자식의 CPU 시간도 확인해서 밀리초 제한을 넘는 대로 죽인다
+    (RLIMIT_CPU 는 초 단위라서 백스톱으로만 쓴다).
+    (status, rusage, timed_out). rusage 는 os.wait4 가 돌려준 그 자식의 CPU 시간/최대 RSS
+    """
+    timed_out = False
+    deadline = time.monotonic() + timeout_s
+    try:
+        pidfd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        pidfd = None
+
+    if pidfd is not None:
+        try:
+            while True:
+                wait_s = next_wait_s(pid, deadline, cpu_limit_ms)
+                if wait_s is None:
+                    timed_out = True
+                    break
+                ready, _, _ = select.select([pidfd], [], [], wait_s)
+                if ready:
+                    break
+        finally:
+            os.close(pidfd)
+    else:
+        # pidfd 를 지원하지 않는 커널: 짧은 간격으로 확인
+        while True:
+            waited_pid, status, usage = os.wait4(pid, os.WNOHANG)
+            if waited_pid == pid:
+                return status, usage, False
+            if next_wait_s(pid, deadline, cpu_limit_ms) is None:
+                timed_out = True
+                break
+            time.sleep(0.005)
+
+    if timed_out:
+        kill_group(pid)
+
+    _, status, usage = os.wait4(pid, 0)
+    return status, usage, timed_out
+
+def _handle_request(sock: socket.socket, req: dict, fds: list):
+    report_r, report_w = os.pipe()
+    started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        sock.close()
+        os.close(report_r)
+        _run_child(req, fds, report_w)
+
+    os.close(report_w)
+    for fd in fds:
+        os.close(fd)
+
+    status, usage, timed_out = wait_with_deadline(pid, req["wall_limit_ms"] / 1000, req.get("cpu_limit_ms"))
+    wall_ms = (time.perf_counter() - started) * 1000
+    report = os.read(report_r, 64)
+    os.close(report_r)
+
+    if os.WIFSIGNALED(status):
+        returncode = -os.WTERMSIG(status)
+    else:
+        returncode = os.WEXITSTATUS(status)
+
+    # 벽시계 시간은 자식이 직접 잰 사용자 코드 실행 시간을 우선 사용 (시그널로 죽었으면 fork~종료 시간).
+    # 판정에 쓰는 CPU 시간은 커널이 잰 값 (judge 가 바빠도 흔들리지 않는다)
+    if report:
+        wall_ms = float(report)
+
+    sock.send(json.dumps({
+        "returncode": returncode,
+        "cpu_ms": int((usage.ru_utime + usage.ru_stime) * 1000),
+        "wall_ms": int(wall_ms),
+        "memory_kb": int(usage.ru_maxrss),
+        "timed_out": timed_out,
+    }).encode())
+
+
+def serve(fd: int):
+    for name in PRELOAD_MODULES:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+
+    sock = socket.socket(fileno=fd)
+    while True:
+        try:
+            msg, fds, _, _ = socket.recv_fds(sock, _MAX_MESSAGE, 3)
+        except OSError:
+            break
+        if not msg:
+            break  # judge 쪽 소켓이 닫힘
+        try:
+            _handle_request(sock, json.loads(msg), fds)
+        except Exception as e:
+            for fd in fds:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+            sock.send(json.dumps({"error": str(e)}).encode())
+
+
+# -------------------------------------------------
+# judge 쪽
+# -------------------------------------------------
+class Zygote:
+    def __init__(self):
+        parent_sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.sock = parent_sock
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), str(child_sock.fileno())],
+            pass_fds=(child_sock.fileno(),),
+            stdin=subprocess.DEVNULL,
+        )
+        child_sock.close()
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def run(self, code_path: str, stdin_fd: int, stdout_fd: int, stderr_fd: int, limits: dict) -> dict:
+        req = json.dumps({"code_path": code_path, **limits}).encode()
+        try:
+            socket.send_fds(self.sock, [req], [stdin_fd, stdout_fd, stderr_fd])
+            reply = self.sock.recv(_MAX_MESSAGE)
+        except OSError as e:
+            raise ZygoteError(f"zygote communication failed: {e}")
+        return self._parse_reply(reply)
+
+    async def run_async(self, loop, code_path: str, stdin_fd: int, stdout_fd: int, stderr_fd: int,
+                        limits: dict) -> dict:
+        """run 과 같지만 응답을 이벤트 루프에서 기다린다 (sock 은 논블로킹이어야 한다)"""
+        req = json.dumps({"code_path": code_path, **limits}).encode()
+        try:
+            socket.send_fds(self.sock, [req], [stdin_fd, stdout_fd, stderr_fd])
+            reply = await loop.sock_recv(self.sock, _MAX_MESSAGE)
+        except OSError as e:
+            raise ZygoteError(f"zygote communication failed: {e}")
+        return self._parse_reply(reply)
+
+    async def drain_async(self, loop) -> bool:
+        """응답을 기다리다 취소된 요청의 응답을 읽어 버린다. 다시 쓸 수 있으면 True"""
+        try:
+            return bool(await loop.sock_recv(self.sock, _MAX_MESSAGE))
+        except OSError:
+            return False
+
+    @staticmethod
+    def _parse_reply(reply: bytes) -> dict:
+        if not reply:
+            raise ZygoteError("zygote exited")
+        data = json.loads(reply)
+        if "error" in data:
+            raise ZygoteError(data["error"])
+        return data
+
+    def close(self):
+        try:
+            self.sock.close()
+        finally:
+            try:
+                self.proc.kill()
+                self.proc.wait(timeout=1)
+            except Exception:
+                pass
+
+
+class ZygotePool:
+    """zygote 를 size 개 미리 띄워 두고 테스트케이스마다 하나씩 빌려 쓴다."""
+
+    def __init__(self, size: int):
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(Zygote())
+
+    def run(self, code_path: str, stdin_fd: int, stdout_fd: int, stderr_fd: int, limits: dict) -> dict:
+        zygote = self._idle.get()
+        if not zygote.alive():
+            zygote.close()
+            zygote = Zygote()
+        try:
+            return zygote.run(code_path, stdin_fd, stdout_fd, stderr_fd, limits)
+        except ZygoteError:
+            # 프로토콜이 깨진 zygote 는 버리고 새로 띄운다
+            zygote.close()
+            zygote = Zygote()
+            raise
+        finally:
+            self._idle.put(zygote)
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]))
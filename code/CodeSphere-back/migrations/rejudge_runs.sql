@@ -0,0 +1,26 @@
+-- 재채점 작업 테이블 (app/model/models.py 의 RejudgeRun, app/services/rejudge.py)
+--   psql "$SQLALCHEMY_DATABASE_URL" -f migrations/rejudge_runs.sql
+CREATE TABLE IF NOT EXISTS rejudge_runs (
+    run_id        BIGSERIAL PRIMARY KEY,
+    -- 대상 조건 (NULL 이면 조건 없음)
+    real_pid      INTEGER REFERENCES problems (real_pid) ON DELETE CASCADE,
+    user_id       INTEGER REFERENCES users (user_id) ON DELETE CASCADE,
+    result_filter JSON,
+    fail_fast     BOOLEAN NOT NULL DEFAULT FALSE,
+
+    status        VARCHAR NOT NULL DEFAULT 'PENDING',  -- PENDING / RUNNING / DONE / ERROR / CANCELLED
+    cursor        BIGINT NOT NULL DEFAULT 0,           -- 마지막으로 반영한 solution_id
+    total         INTEGER,
+    processed     INTEGER NOT NULL DEFAULT 0,
+    changed       INTEGER NOT NULL DEFAULT 0,
+    failed        INTEGER NOT NULL DEFAULT 0,
+    error         TEXT,
+
+    created_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+    started_at    TIMESTAMPTZ,
+    updated_at    TIMESTAMPTZ,
+    finished_at   TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS ix_rejudge_runs_real_pid ON rejudge_runs (real_pid);
+CREATE INDEX IF NOT EXISTS ix_rejudge_runs_status ON rejudge_runs (status);
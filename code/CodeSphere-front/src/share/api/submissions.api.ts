@@ -25,6 +25,70 @@ export interface SubmissionResult {
   testCases: TestCase[];
 }
 
+interface SubmissionQueued {
+  submission_id: number;
+  status: SubmissionStatus;
+}
+
+type SubmissionStatus = 'PENDING' | 'RUNNING' | 'DONE' | 'ERROR';
+
+export interface SubmissionStatusResult {
+  submission_id: number;
+  status: SubmissionStatus;
+  result: string | null;
+  passed: number | null;
+  total: number | null;
+  runtime_ms: number | null;
+  memory_kb: number | null;
+}
+
+// 채점 상태 조회: 처음에는 짧게, 이후 간격을 늘려 가며 조회하고 횟수/전체 시간을 넘으면 포기한다
+const SUBMISSION_POLL_INITIAL_MS = 500;
+const SUBMISSION_POLL_MAX_INTERVAL_MS = 5000;
+const SUBMISSION_POLL_BACKOFF = 1.5;
+const SUBMISSION_POLL_MAX_ATTEMPTS = 60;
+const SUBMISSION_POLL_TIMEOUT_MS = 3 * 60 * 1000;
+
+export async function getSubmissionStatus(
+  submissionId: number,
+  auth: string,
+): Promise<SubmissionStatusResult> {
+  return apiClient.get(`/submissions/status/${submissionId}`, auth);
+}
+
+// DONE 이 될 때까지 상태를 조회한다. ERROR 이거나 제한을 넘기면 예외
+async function waitForSubmission(
+  submissionId: number,
+  auth: string,
+): Promise<SubmissionStatusResult> {
+  const deadline = Date.now() + SUBMISSION_POLL_TIMEOUT_MS;
+  let interval = SUBMISSION_POLL_INITIAL_MS;
+
+  for (let attempt = 1; ; attempt++) {
+    const status = await getSubmissionStatus(submissionId, auth);
+    if (status.status === 'DONE') {
+      return status;
+    }
+    if (status.status === 'ERROR') {
+      throw new Error('채점 서버 오류');
+    }
+    if (
+      attempt >= SUBMISSION_POLL_MAX_ATTEMPTS ||
+      Date.now() + interval > deadline
+    ) {
+      throw new Error(
+        '채점이 너무 오래 걸립니다. 잠시 후 다시 확인해 주세요.',
+      );
+    }
+
+    await new Promise((resolve) => setTimeout(resolve, interval));
+    interval = Math.min(
+      interval * SUBMISSION_POLL_BACKOFF,
+      SUBMISSION_POLL_MAX_INTERVAL_MS,
+    );
+  }
+}
+
 export async function postSubmissions({
   real_pid,
   language,
@@ -32,7 +96,8 @@ export async function postSubmissions({
   auth,
 }: PostSubmissionsParams): Promise<SubmissionResult> {
   try {
-    const response = await apiClient.post(
+    // 제출은 채점 대기열에 등록되고, 채점이 끝날 때까지 상태를 조회한다
+    const queued: SubmissionQueued = await apiClient.post(
       '/submissions/submit',
       {
         real_pid,
@@ -41,7 +106,17 @@ export async function postSubmissions({
       },
       auth,
     );
-    return response;
+
+    const status = await waitForSubmission(queued.submission_id, auth);
+
+    return {
+      result: status.result ?? 'FAIL',
+      passed: status.passed ?? 0,
+      total: status.total ?? 0,
+      runtime_ms: status.runtime_ms ?? 0,
+      memory_kb: status.memory_kb ?? 0,
+      testCases: [],
+    };
   } catch (error) {
     console.error('제출 중 오류 발생:', error);
     throw error;
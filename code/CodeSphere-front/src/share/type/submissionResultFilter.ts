@@ -4,6 +4,7 @@ export type SubmissionResultFilter =
   | 'TLE'
   | 'RTE'
   | 'MLE'
+  | 'OLE'
   | 'CE';
 
 export const SubmissionResultFilterLabels: Record<
@@ -15,5 +16,6 @@ export const SubmissionResultFilterLabels: Record<
   TLE: '시간 초과',
   RTE: '런타임 에러',
   MLE: '메모리 초과',
+  OLE: '출력 초과',
   CE: '컴파일 에러',
 };